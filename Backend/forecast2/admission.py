@@ -0,0 +1,166 @@
+# Backend/forecast2/admission.py
+"""
+Admission Control
+Bounds queued forecast work per priority class and sheds batch work first
+
+Requests are either 'interactive' (dashboard, user-facing) or 'batch'
+(scheduled and bulk triggers). Each class has a bound on work admitted but
+not finished; past it the request is rejected with a Retry-After estimated
+from recent throughput. Batch work is also rejected once total load reaches
+the batch shedding threshold, which leaves the remaining capacity to
+interactive requests, and admitted batch jobs yield their turn to any
+waiting interactive job when an execution slot frees up.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+PRIORITIES = ('interactive', 'batch')
+
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, 0)) or default
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted
+    """
+
+    def __init__(self, priority, retry_after):
+        super().__init__(f"Forecast service is at capacity for {priority} work")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-priority admission bounds plus a priority-ordered execution gate
+    """
+
+    def __init__(self, slots=None, limits=None, shed_batch_at=None):
+        """
+        Args:
+            slots: Jobs allowed to run at once (default: FORECAST_WORKERS or all cores)
+            limits: {priority: max admitted (running + waiting)}
+                (default: FORECAST_MAX_INTERACTIVE=32, FORECAST_MAX_BATCH=128)
+            shed_batch_at: Total admitted work at which new batch work is
+                rejected (default: FORECAST_SHED_BATCH_AT or the batch limit)
+        """
+        self.slots = slots or _env_int('FORECAST_WORKERS', os.cpu_count() or 1)
+        self.limits = limits or {
+            'interactive': _env_int('FORECAST_MAX_INTERACTIVE', 32),
+            'batch': _env_int('FORECAST_MAX_BATCH', 128),
+        }
+        self.shed_batch_at = shed_batch_at or _env_int('FORECAST_SHED_BATCH_AT', self.limits['batch'])
+
+        self._cond = threading.Condition()
+        self._admitted = {priority: 0 for priority in PRIORITIES}
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._running = 0
+        self._rejected = {priority: 0 for priority in PRIORITIES}
+
+        # Recent completion times, for the observed throughput
+        self._completions = deque(maxlen=100)
+
+    def throughput(self):
+        """
+        Jobs completed per second over the last minute
+        (one per slot per second until enough have been observed)
+        """
+        now = time.monotonic()
+        while self._completions and now - self._completions[0] > THROUGHPUT_WINDOW_SECONDS:
+            self._completions.popleft()
+        if len(self._completions) < 2:
+            return float(self.slots)
+        span = self._completions[-1] - self._completions[0]
+        return (len(self._completions) - 1) / max(span, 1e-3)
+
+    def _retry_after(self, depth):
+        """
+        Seconds until `depth` admitted jobs drain at the observed throughput
+        """
+        return int(min(300, max(1, math.ceil(depth / max(self.throughput(), 1e-3)))))
+
+    def admit(self, priority='interactive'):
+        """
+        Reserve a place for one job or raise Overloaded
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}. Use one of {PRIORITIES}")
+
+        with self._cond:
+            total = sum(self._admitted.values())
+            full = self._admitted[priority] >= self.limits[priority]
+            shed = priority == 'batch' and total >= self.shed_batch_at
+            if full or shed:
+                self._rejected[priority] += 1
+                raise Overloaded(priority, self._retry_after(total))
+            self._admitted[priority] += 1
+
+    def _acquire_slot(self, priority):
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                # Batch jobs let waiting interactive jobs take free slots first
+                while self._running >= self.slots or (
+                    priority == 'batch' and self._waiting['interactive'] > 0
+                ):
+                    self._cond.wait()
+            finally:
+                self._waiting[priority] -= 1
+            self._running += 1
+
+    def _release(self, priority, ran):
+        with self._cond:
+            self._admitted[priority] -= 1
+            if ran:
+                self._running -= 1
+                self._completions.append(time.monotonic())
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority='interactive'):
+        """
+        Admit a job and hold an execution slot while it runs
+
+        Raises:
+            Overloaded: The priority class is full (or batch work is being shed)
+        """
+        self.admit(priority)
+        ran = False
+        try:
+            self._acquire_slot(priority)
+            ran = True
+            yield
+        finally:
+            self._release(priority, ran)
+
+    def load(self):
+        """
+        Current load, for schedulers pacing their triggers
+        """
+        with self._cond:
+            total = sum(self._admitted.values())
+            return {
+                'slots': self.slots,
+                'running': self._running,
+                'admitted': dict(self._admitted),
+                'waiting': dict(self._waiting),
+                'limits': dict(self.limits),
+                'shed_batch_at': self.shed_batch_at,
+                'rejected': dict(self._rejected),
+                'throughput_per_second': round(self.throughput(), 3),
+                'accepting': {
+                    'interactive': self._admitted['interactive'] < self.limits['interactive'],
+                    'batch': self._admitted['batch'] < self.limits['batch'] and total < self.shed_batch_at,
+                },
+                'retry_after': self._retry_after(total) if total >= self.slots else 0,
+            }
@@ -0,0 +1,67 @@
+// forecast2/alertStub.js
+// Local stand-in for the Node alert endpoint, used by load_test.py
+//
+// Accepts POST /api/forecast/trigger-alerts like
+// controllers/forecastTriggerController.js (without touching the database),
+// optionally after a fixed delay, and counts calls. GET /stats returns the
+// counts.
+//
+// Usage: node alertStub.js [--port 5001] [--delay-ms 0]
+
+import http from "http";
+
+const arg = (name, fallback) => {
+  const index = process.argv.indexOf(name);
+  return index >= 0 ? Number(process.argv[index + 1]) : fallback;
+};
+
+const port = arg("--port", 5001);
+const delayMs = arg("--delay-ms", 0);
+const stats = { received: 0, invalid: 0, products: new Set() };
+
+const reply = (res, status, body) => {
+  res.writeHead(status, { "Content-Type": "application/json" });
+  res.end(JSON.stringify(body));
+};
+
+const server = http.createServer((req, res) => {
+  if (req.method === "GET" && req.url === "/stats") {
+    return reply(res, 200, {
+      received: stats.received,
+      invalid: stats.invalid,
+      products: stats.products.size
+    });
+  }
+
+  if (req.method !== "POST" || req.url !== "/api/forecast/trigger-alerts") {
+    return reply(res, 404, { message: "Not found" });
+  }
+
+  let body = "";
+  req.on("data", (chunk) => {
+    body += chunk;
+  });
+  req.on("end", () => {
+    let productId;
+    try {
+      productId = JSON.parse(body || "{}").productId;
+    } catch {
+      productId = undefined;
+    }
+
+    if (!productId) {
+      stats.invalid++;
+      return reply(res, 400, { message: "productId is required to trigger alerts" });
+    }
+
+    stats.received++;
+    stats.products.add(productId);
+    setTimeout(() => {
+      reply(res, 200, { message: "Alert engine executed successfully", productId });
+    }, delayMs);
+  });
+});
+
+server.listen(port, "127.0.0.1", () => {
+  console.log(`alert stub listening on ${port}`);
+});
@@ -1,13 +1,210 @@
 # app.py
 # Python forecast runner – triggers Node.js alert engine after forecast
 
-from fastapi import FastAPI
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Optional
+
+import anyio
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
 import requests
 
+from admission import AdmissionController, Overloaded, PRIORITIES
+from models.cascade import CascadeDecisions, CascadeForecaster
+from models.change_detection import ChangeDetector
+from models.config import apply_thread_limits
+from models.deadline import Deadline, DeadlineExceeded
+from models.hierarchy import Hierarchy, HierarchicalForecaster, demand_matrix
+from models.history import prediction_records
+from models.replenishment import pad_samples, plan_replenishment
+from models.risk import RiskLevels, evaluate_catalogue, risk_records
+from workers import DEFAULT_DEADLINE_SECONDS, MODELS, WorkerPool, fallback_forecast, preload
+
 # ---------------------------
 # FastAPI App Instance
 # ---------------------------
-app = FastAPI(title="Forecast Trigger Service")
+# Bounded queues per priority class; batch work is shed first
+admission = AdmissionController()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Admitted jobs wait for a slot on a request thread, so the thread pool
+    # must hold every admitted job or waiting batch work could starve it
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, sum(admission.limits.values()) + 8)
+    # BLAS limits are process-wide: set them once, not per request
+    apply_thread_limits()
+
+    if PREFORK:
+        # Import the numeric stack once, then fork and warm up the workers
+        # in the background; /ready reports healthy once they are warm
+        preload()
+        get_worker_pool()
+    stop_saving = threading.Event()
+    threading.Thread(target=_save_state_periodically, args=(stop_saving,), daemon=True).start()
+    yield
+    stop_saving.set()
+    save_state()
+    # uvicorn re-raises SIGTERM after shutdown, which skips the atexit
+    # cleanup of daemon processes: stop the workers here
+    if _pool["instance"] is not None:
+        _pool["instance"].close()
+
+
+app = FastAPI(title="Forecast Trigger Service", lifespan=lifespan)
+
+# Cascade decisions are remembered per product for FORECAST_CASCADE_TTL_DAYS
+cascade = CascadeForecaster(
+    decisions=CascadeDecisions(
+        path=os.environ.get("FORECAST_CASCADE_DECISIONS"),
+        ttl_days=int(os.environ.get("FORECAST_CASCADE_TTL_DAYS", 7)),
+    ),
+    min_gain=float(os.environ.get("FORECAST_CASCADE_MIN_GAIN", 0.05)),
+)
+
+
+class DemandPoint(BaseModel):
+    date: str
+    quantity: float
+
+
+class ForecastRequest(BaseModel):
+    historical_data: List[DemandPoint]
+    model: str = "xgboost"
+    horizon: int = 14
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+    notify: bool = False
+    end_date: Optional[str] = None
+    category: Optional[str] = None
+
+
+class SaleDelta(BaseModel):
+    product_id: int
+    date: str
+    quantity: float
+
+
+class IngestRequest(BaseModel):
+    sales: List[SaleDelta]
+    end_date: Optional[str] = None
+
+
+class HierarchyProduct(BaseModel):
+    product_id: int
+    category: str
+    store: Optional[str] = None
+
+
+class HierarchicalRequest(BaseModel):
+    products: List[HierarchyProduct]
+    sales: List[SaleDelta]
+    horizon: int = 14
+    proportions: str = "historical"
+    reconciliation: str = "none"
+    disaggregate_level: Optional[str] = None
+    end_date: Optional[str] = None
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+
+
+class RiskRequest(BaseModel):
+    product_ids: List[int]
+    forecast: List[List[float]]
+    current_stock: List[float]
+    lead_time: List[float]
+    overstock_limit: List[float]
+    notify: bool = True
+
+
+class ReorderPlanRequest(BaseModel):
+    product_ids: List[int]
+    forecast: List[List[float]]
+    demand_std: List[float]
+    lead_time_samples: List[List[float]]
+    current_stock: List[float]
+    on_order: Optional[List[float]] = None
+    service_level: float = 0.95
+    review_period: float = 7
+
+
+class CascadeRequest(BaseModel):
+    historical_data: List[DemandPoint]
+    horizon: int = 14
+    force: Optional[bool] = False
+    end_date: Optional[str] = None
+    deadline_seconds: float = DEFAULT_DEADLINE_SECONDS
+    category: Optional[str] = None
+
+
+# Node alert engine endpoint called after forecasts
+ALERT_URL = os.environ.get("FORECAST_ALERT_URL", "http://localhost:5001/api/forecast/trigger-alerts")
+
+# Running demand statistics per product; products whose demand diverges
+# from their last forecast are queued for reforecasting
+change_detector = ChangeDetector(path=os.environ.get("FORECAST_CHANGE_STATE"))
+
+# Last risk levels per product; only changes are sent to the alert engine
+risk_levels = RiskLevels(path=os.environ.get("FORECAST_RISK_LEVELS"))
+
+# Cascade decisions and change-detection state are written every
+# FORECAST_STATE_SAVE_SECONDS (when changed) and on shutdown rather than per
+# request
+STATE_SAVE_SECONDS = float(os.environ.get("FORECAST_STATE_SAVE_SECONDS", 60))
+
+
+def save_state():
+    cascade.decisions.save()
+    change_detector.save()
+
+
+def _save_state_periodically(stop):
+    while not stop.wait(STATE_SAVE_SECONDS):
+        try:
+            save_state()
+        except OSError as e:
+            print(f"⚠ State save failed: {e}")
+
+# Worker processes for deadline-bound forecast jobs. With FORECAST_PREFORK=1
+# they are forked and warmed up at startup; otherwise on first use
+PREFORK = os.environ.get("FORECAST_PREFORK", "0") == "1"
+WARMUP_MODELS = [m for m in os.environ.get("FORECAST_WARMUP_MODELS", ",".join(MODELS)).split(",") if m]
+
+_pool = {"instance": None}
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    with _pool_lock:
+        if _pool["instance"] is None:
+            _pool["instance"] = WorkerPool(warmup_models=WARMUP_MODELS if PREFORK else ())
+        return _pool["instance"]
+
+
+def run_date(end_date: Optional[str] = None):
+    """
+    Run date of a request: histories are zero-filled through it and
+    forecasts start the day after (default: today)
+    """
+    return end_date or date.today().isoformat()
+
+
+def check_priority(priority: str):
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=422, detail=f"Unknown priority: {priority}. Use one of {PRIORITIES}")
+
+
+def overloaded(e: Overloaded):
+    """
+    429 response telling the caller when capacity should be available
+    """
+    return HTTPException(
+        status_code=429,
+        detail={"error": str(e), "priority": e.priority, "retryAfter": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
 # ---------------------------
@@ -18,11 +215,16 @@ def run_forecast(product_id: int):
     Runs forecast logic for a given product
     and notifies the Node.js backend to evaluate alerts.
     """
+    trigger_alerts(product_id)
+
 
-    # Trigger alert engine (Node.js)
+def trigger_alerts(product_id: int):
+    """
+    Ask the Node.js alert engine to re-evaluate one product
+    """
     try:
         requests.post(
-            "http://localhost:5001/api/forecast/trigger-alerts",
+            ALERT_URL,
             json={"productId": product_id},
             timeout=3,
         )
@@ -35,11 +237,294 @@ def run_forecast(product_id: int):
 # API Endpoint
 # ---------------------------
 @app.post("/run/{product_id}")
-def run(product_id: int):
-    run_forecast(product_id)
+def run(product_id: int, priority: str = "batch"):
+    check_priority(priority)
+    try:
+        with admission.slot(priority):
+            run_forecast(product_id)
+    except Overloaded as e:
+        raise overloaded(e)
     return {"status": "forecast triggered", "productId": product_id}
 
 
+@app.get("/load")
+def load():
+    """
+    Current queue depth, throughput and whether each priority is accepting work
+    """
+    return admission.load()
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the pre-forked workers have warmed up
+    """
+    pool = _pool["instance"]
+    if pool is None:
+        if PREFORK:
+            raise HTTPException(status_code=503, detail={"ready": False})
+        return {"ready": True, "prefork": False}
+
+    status = pool.status()
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    return {**status, "prefork": PREFORK}
+
+
+@app.post("/forecast/{product_id}")
+def run_model_forecast(product_id: int, request: ForecastRequest, priority: str = "interactive"):
+    """
+    Fit and forecast one product in a worker process, within a deadline
+
+    Jobs that miss the deadline return a baseline forecast with "fallback": true.
+    With notify=true the alert engine re-evaluates the product afterwards.
+    """
+    if request.model not in MODELS:
+        raise HTTPException(status_code=422, detail=f"Unknown model: {request.model}. Use one of {MODELS}")
+
+    job = {
+        "model": request.model,
+        "historical_data": [point.model_dump() for point in request.historical_data],
+        "horizon": request.horizon,
+        "end_date": run_date(request.end_date),
+        "product_id": product_id,
+        "category": request.category,
+    }
+    check_priority(priority)
+    try:
+        with admission.slot(priority):
+            result = get_worker_pool().submit(job, request.deadline_seconds)
+    except Overloaded as e:
+        raise overloaded(e)
+    if "error" in result:
+        raise HTTPException(status_code=422, detail=result["error"])
+    change_detector.set_forecast(product_id, result["predictions"])
+    if request.notify:
+        trigger_alerts(product_id)
+    result["productId"] = product_id
+    return result
+
+
+@app.post("/ingest")
+def ingest_sales(request: IngestRequest):
+    """
+    Fold sale deltas into per-product change detectors
+
+    Every day before the run date (end_date, default today) is then closed
+    for all products, as zero demand where no sales arrived. Deltas for days
+    already closed are rejected and listed under "late". Returns the
+    products this batch queued for reforecasting; everything else keeps its
+    cached forecast.
+    """
+    queued, late = change_detector.ingest(
+        ((sale.product_id, sale.date, sale.quantity) for sale in request.sales),
+        run_date=run_date(request.end_date),
+    )
+    return {
+        "ingested": len(request.sales) - len(late),
+        "late": [{"productId": product_id, "date": day} for product_id, day in late],
+        "queued": queued,
+    }
+
+
+@app.post("/reforecast-queue/drain")
+def drain_reforecast_queue(limit: Optional[int] = None):
+    """
+    Take the products waiting for a reforecast, oldest first
+    """
+    products = change_detector.drain(limit)
+    return {"products": products}
+
+
+@app.get("/change-status")
+def change_status(product_id: Optional[int] = None):
+    """
+    Queue summary, or one product's running statistics
+    """
+    status = change_detector.status(product_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"No sales ingested for product {product_id}")
+    return status
+
+
+@app.post("/hierarchical-forecast")
+def hierarchical_forecast(request: HierarchicalRequest, priority: str = "batch"):
+    """
+    Forecast a catalogue through its category (and store) totals
+
+    XGBoost is fitted per aggregate node only and each product gets a share
+    of its parent's forecast, optionally reconciled across levels. Fits that
+    cannot finish within the deadline fall back to per-product baselines
+    ("fallback": true). Runs in the API process, so the deadline is
+    cooperative only (checked between fits, boosting rounds and rollout
+    steps) and starts once the request is admitted.
+    """
+    if not request.products:
+        return {"fits": 0, "aggregates": [], "products": []}
+
+    product_ids = [product.product_id for product in request.products]
+    levels = {"category": [product.category for product in request.products]}
+    if all(product.store is not None for product in request.products):
+        levels["store"] = [product.store for product in request.products]
+
+    check_priority(priority)
+    try:
+        with admission.slot(priority):
+            deadline = Deadline(request.deadline_seconds)
+            values, start_date = demand_matrix(
+                product_ids,
+                [sale.product_id for sale in request.sales],
+                [sale.date for sale in request.sales],
+                [sale.quantity for sale in request.sales],
+                end_date=run_date(request.end_date),
+            )
+            forecaster = HierarchicalForecaster(
+                disaggregate_level=request.disaggregate_level,
+                proportions=request.proportions,
+                reconciliation=request.reconciliation,
+            )
+            try:
+                result = forecaster.forecast(
+                    values, start_date, Hierarchy(product_ids, levels), request.horizon, deadline=deadline
+                )
+                fallback = False
+            except DeadlineExceeded:
+                result, fallback = forecaster.fallback(values, request.horizon), True
+    except Overloaded as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    last_date = str(start_date + values.shape[1] - 1)
+    products = []
+    for row, product_id in enumerate(product_ids):
+        predictions = prediction_records(
+            result["forecast"][row], last_date, 0.80, 1.20,
+            bounds=(result["lower"][row], result["upper"][row])
+        )
+        change_detector.set_forecast(product_id, predictions)
+        products.append({"productId": product_id, "predictions": predictions})
+
+    return {
+        "level": result["level"],
+        "fallback": fallback,
+        "fits": result["fits"],
+        "aggregates": [
+            {"level": level, "key": key, "model": result["models"][(level, key)], "predicted": forecast.round(3).tolist()}
+            for (level, key), forecast in result["aggregates"].items()
+        ],
+        "products": products,
+    }
+
+
+@app.post("/risk")
+def evaluate_risk(request: RiskRequest, priority: str = "batch"):
+    """
+    Stockout and overstock risk for a batch of products in one pass
+
+    Products whose risk level changed since the last evaluation are sent to
+    the alert engine (notify=true); the others are not re-evaluated there.
+    """
+    n = len(request.product_ids)
+    columns = [request.forecast, request.current_stock, request.lead_time, request.overstock_limit]
+    if any(len(column) != n for column in columns):
+        raise HTTPException(status_code=422, detail="forecast and stock vectors must have one entry per product")
+    if len({len(row) for row in request.forecast}) > 1:
+        raise HTTPException(status_code=422, detail="forecast rows must share one horizon")
+    if n == 0:
+        return {"evaluated": 0, "risk": [], "crossings": []}
+
+    check_priority(priority)
+    try:
+        with admission.slot(priority):
+            table = evaluate_catalogue(
+                request.product_ids, request.forecast, request.current_stock,
+                request.lead_time, request.overstock_limit
+            )
+            crossed = risk_levels.crossings(table)
+    except Overloaded as e:
+        raise overloaded(e)
+
+    if request.notify:
+        for product_id in crossed["productId"].tolist():
+            trigger_alerts(product_id)
+
+    return {
+        "evaluated": n,
+        "risk": risk_records(table),
+        "crossings": crossed["productId"].tolist(),
+    }
+
+
+@app.post("/reorder-plan")
+def reorder_plan(request: ReorderPlanRequest, priority: str = "batch"):
+    """
+    Reorder point, safety stock and suggested order quantity for a batch of products
+    """
+    n = len(request.product_ids)
+    columns = [request.forecast, request.demand_std, request.lead_time_samples, request.current_stock]
+    if request.on_order is not None:
+        columns.append(request.on_order)
+    if any(len(column) != n for column in columns):
+        raise HTTPException(status_code=422, detail="every vector must have one entry per product")
+    if n == 0:
+        return {"planned": 0, "plan": []}
+    if len({len(row) for row in request.forecast}) > 1:
+        raise HTTPException(status_code=422, detail="forecast rows must share one horizon")
+
+    check_priority(priority)
+    try:
+        with admission.slot(priority):
+            plan = plan_replenishment(
+                request.product_ids, request.forecast, request.demand_std,
+                pad_samples(request.lead_time_samples), request.current_stock,
+                on_order=request.on_order if request.on_order is not None else 0.0,
+                service_level=request.service_level, review_period=request.review_period,
+            )
+    except Overloaded as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {"planned": n, "plan": plan.round(3).to_dict("records")}
+
+
+@app.post("/cascade/{product_id}")
+def run_cascade(product_id: int, request: CascadeRequest, priority: str = "interactive"):
+    """
+    Forecast with the cheapest model tier that holds up on a holdout
+
+    If the evaluation or fit cannot finish within the deadline, a baseline
+    forecast marked "fallback": true is returned instead. Runs in the API
+    process, so the deadline is cooperative only (checked between tiers,
+    boosting rounds, training batches and rollout steps) and starts once
+    the request is admitted.
+    """
+    check_priority(priority)
+    history = [point.model_dump() for point in request.historical_data]
+    end_date = run_date(request.end_date)
+    try:
+        with admission.slot(priority):
+            deadline = Deadline(request.deadline_seconds)
+            try:
+                result = cascade.forecast(
+                    product_id, history, request.horizon, force=request.force, end_date=end_date,
+                    deadline=deadline, category=request.category
+                )
+            except DeadlineExceeded as e:
+                job = {"model": "cascade", "historical_data": history, "horizon": request.horizon, "end_date": end_date}
+                result = fallback_forecast(job, "deadline")
+                result["detail"] = str(e)
+    except Overloaded as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    change_detector.set_forecast(product_id, result["predictions"])
+    result["productId"] = product_id
+    return result
+
+
 # ---------------------------
 # App Runner
 # ---------------------------
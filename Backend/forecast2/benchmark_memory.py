@@ -0,0 +1,125 @@
+"""
+Float32 Low-Memory Mode Benchmark
+AI-Enabled Inventory Forecasting System
+
+Compares the memory needed for a batch of feature matrices in float64 and
+float32 precision (models/config.py set_precision), and checks that
+forecast accuracy does not change materially. LSTM sequences are float32
+in both modes, so they are not compared here.
+
+Usage:
+    python benchmark_memory.py [--products 10000] [--days 730] [--accuracy-products 20]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.config import float_dtype, set_precision
+from models.linear_regression import LinearRegressionForecaster
+from models.xgboost_model import XGBoostForecaster
+from test_model_accuracy import generate_sample_sme_data
+
+
+LOOKBACK = 7
+HOLDOUT_DAYS = 30
+
+
+def product_history(seed, days):
+    """Synthetic history for one product (reproducible per seed)."""
+    np.random.seed(seed)
+    df = generate_sample_sme_data(days=days)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df[['date', 'quantity']].to_dict('records')
+
+
+def measure_batch(products, days, precision):
+    """Bytes needed for the batch's feature matrices."""
+    set_precision(precision)
+    forecaster = XGBoostForecaster()
+
+    feature_bytes = 0
+    rows = 0
+    start = time.perf_counter()
+
+    for seed in range(products):
+        history = product_history(seed, days)
+        features = forecaster.create_features(history, LOOKBACK)
+        feature_bytes += int(features.memory_usage(index=False, deep=True).sum())
+        rows += len(features)
+
+    return {
+        'precision': precision,
+        'feature_rows': rows,
+        'feature_matrix_mb': round(feature_bytes / 1e6, 1),
+        'demand_matrix_mb': round(products * days * np.dtype(float_dtype()).itemsize / 1e6, 1),
+        'seconds': round(time.perf_counter() - start, 2)
+    }
+
+
+def measure_accuracy(products, days, precision):
+    """Holdout MAE of both regressors under one precision mode."""
+    set_precision(precision)
+    errors = {'linear_regression': [], 'xgboost': []}
+
+    for seed in range(products):
+        history = product_history(seed, days)
+        train, test = history[:-HOLDOUT_DAYS], history[-HOLDOUT_DAYS:]
+        actual = np.array([row['quantity'] for row in test], dtype=float)
+
+        for name, model in (('linear_regression', LinearRegressionForecaster()), ('xgboost', XGBoostForecaster())):
+            model.fit(train, LOOKBACK)
+            predicted = np.array([p['predicted'] for p in model.predict(train, HOLDOUT_DAYS)])
+            errors[name].append(np.mean(np.abs(actual - predicted)))
+
+    return {name: round(float(np.mean(values)), 4) for name, values in errors.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--accuracy-products', type=int, default=20)
+    parser.add_argument('--output', help='Optional JSON output path')
+    args = parser.parse_args()
+
+    print(f"Memory: {args.products} products x {args.days} days")
+    memory = []
+    for precision in ('float64', 'float32'):
+        result = measure_batch(args.products, args.days, precision)
+        memory.append(result)
+        print(f"  {precision}: features {result['feature_matrix_mb']} MB, "
+              f"demand matrix {result['demand_matrix_mb']} MB  ({result['seconds']}s)")
+
+    print(f"\nAccuracy: holdout MAE over {args.accuracy_products} products")
+    accuracy = {}
+    for precision in ('float64', 'float32'):
+        accuracy[precision] = measure_accuracy(args.accuracy_products, args.days, precision)
+        print(f"  {precision}: {accuracy[precision]}")
+
+    set_precision('float64')
+
+    saving = 1 - memory[1]['feature_matrix_mb'] / max(memory[0]['feature_matrix_mb'], 1e-9)
+    print(f"\n✓ Feature memory reduced by {saving:.0%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'products': args.products,
+                'days': args.days,
+                'memory': memory,
+                'accuracy': accuracy
+            }, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Training-Window Benchmark
+AI-Enabled Inventory Forecasting System
+
+Fits Linear Regression and XGBoost on growing histories (up to five years)
+under several training-window policies (models/config.py
+set_training_window) and reports fit time per history length plus holdout
+MAE on the longest history. With a window, fit time flattens once the
+history is longer than the window.
+
+Usage:
+    python benchmark_training_window.py [--years 5] [--products 5] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.config import get_training_window, set_training_window
+from models.linear_regression import LinearRegressionForecaster
+from models.xgboost_model import XGBoostForecaster
+from test_model_accuracy import generate_sample_sme_data
+
+
+LOOKBACK = 7
+HOLDOUT_DAYS = 30
+
+# name: (max_days, half_life_days, weekly_after_days); 0 disables
+POLICIES = {
+    'all_history': (0, 0, 0),
+    'window_730': (730, 0, 0),
+    'window_730_weighted': (730, 365, 0),
+    'weekly_after_180': (730, 0, 180),
+}
+
+MODELS = {
+    'linear_regression': LinearRegressionForecaster,
+    'xgboost': XGBoostForecaster,
+}
+
+
+def product_history(seed, days):
+    """Synthetic history for one product (reproducible per seed)."""
+    np.random.seed(seed)
+    df = generate_sample_sme_data(days=days)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df[['date', 'quantity']].to_dict('records')
+
+
+def measure_fit_time(policy, lengths, products, repeats=3):
+    """Mean (over products) of the best-of-`repeats` fit seconds per model and history length."""
+    set_training_window(*policy)
+    timings = {name: {} for name in MODELS}
+
+    for days in lengths:
+        histories = [product_history(seed, days) for seed in range(products)]
+        for name, cls in MODELS.items():
+            best = []
+            for history in histories:
+                runs = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    cls().fit(history, LOOKBACK)
+                    runs.append(time.perf_counter() - start)
+                best.append(min(runs))
+            timings[name][days] = round(float(np.mean(best)), 4)
+    return timings
+
+
+def measure_accuracy(policy, days, products):
+    """Holdout MAE per model on the longest history under one policy."""
+    set_training_window(*policy)
+    errors = {name: [] for name in MODELS}
+
+    for seed in range(products):
+        history = product_history(seed, days)
+        train, test = history[:-HOLDOUT_DAYS], history[-HOLDOUT_DAYS:]
+        actual = np.array([row['quantity'] for row in test], dtype=float)
+
+        for name, cls in MODELS.items():
+            model = cls()
+            model.fit(train, LOOKBACK)
+            predicted = np.array([p['predicted'] for p in model.predict(train, HOLDOUT_DAYS)])
+            errors[name].append(np.mean(np.abs(actual - predicted)))
+
+    return {name: round(float(np.mean(values)), 4) for name, values in errors.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--output', help='Optional JSON output path')
+    args = parser.parse_args()
+
+    lengths = [365 * year for year in range(1, args.years + 1)]
+    default_policy = get_training_window()
+    results = {}
+
+    for name, policy in POLICIES.items():
+        print(f"\n{name} (max_days, half_life_days, weekly_after_days) = {policy}")
+        timings = measure_fit_time(policy, lengths, args.products)
+        accuracy = measure_accuracy(policy, lengths[-1], args.products)
+        results[name] = {'policy': policy, 'fit_seconds': timings, 'holdout_mae': accuracy}
+
+        for model in MODELS:
+            row = '  '.join(f"{days // 365}y {seconds * 1000:6.1f}ms" for days, seconds in timings[model].items())
+            print(f"  {model:18s} {row}   MAE {accuracy[model]:.3f}")
+
+    set_training_window(**default_policy)
+
+    baseline = results['all_history']['fit_seconds']['xgboost'][lengths[-1]]
+    windowed = results['window_730']['fit_seconds']['xgboost'][lengths[-1]]
+    print(f"\n✓ XGBoost fit at {args.years} years: {baseline * 1000:.1f}ms -> {windowed * 1000:.1f}ms with a 730-day window")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'products': args.products,
+                'lengths': lengths,
+                'results': results
+            }, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+XGBoost Thread Budget Benchmark
+AI-Enabled Inventory Forecasting System
+
+Measures total fit throughput when several products are trained at the same
+time, with and without the global thread budget (models/config.py).
+
+Usage:
+    python benchmark_xgboost_threads.py [--products 32] [--days 365]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.config import get_thread_budget, set_thread_budget
+from models.xgboost_model import XGBoostForecaster
+from test_model_accuracy import generate_sample_sme_data
+
+
+CONCURRENCY_LEVELS = [1, 4, 16]
+
+
+def build_catalogue(products, days):
+    """Generate one synthetic history per product."""
+    catalogue = []
+    for _ in range(products):
+        df = generate_sample_sme_data(days=days)
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        catalogue.append(df[['date', 'quantity']].to_dict('records'))
+    return catalogue
+
+
+def run_fits(catalogue, concurrency, budgeted):
+    """Fit every product with `concurrency` fits in flight and return fits/sec."""
+    if budgeted:
+        set_thread_budget(concurrent_fits=concurrency)
+        make_model = XGBoostForecaster
+    else:
+        # XGBoost default threading: every booster grabs all cores
+        make_model = lambda: XGBoostForecaster(n_jobs=os.cpu_count())
+
+    def fit_one(history):
+        make_model().fit(history)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fit_one, catalogue))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'budgeted': budgeted,
+        'threads_per_fit': get_thread_budget()['threads_per_fit'] if budgeted else os.cpu_count(),
+        'seconds': round(elapsed, 3),
+        'fits_per_second': round(len(catalogue) / elapsed, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=32)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--output', help='Optional JSON output path')
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"Generating {args.products} products x {args.days} days...")
+    catalogue = build_catalogue(args.products, args.days)
+
+    results = []
+    for concurrency in CONCURRENCY_LEVELS:
+        for budgeted in (False, True):
+            result = run_fits(catalogue, concurrency, budgeted)
+            results.append(result)
+            label = 'budgeted' if budgeted else 'default '
+            print(f"  {concurrency:>2} concurrent ({label}, {result['threads_per_fit']:>2} threads/fit): "
+                  f"{result['fits_per_second']:>7} fits/s  ({result['seconds']}s)")
+
+    set_thread_budget(concurrent_fits=1)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'cpu_count': os.cpu_count(),
+                'products': args.products,
+                'days': args.days,
+                'results': results
+            }, f, indent=2)
+        print(f"\n✓ Results saved: {args.output}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
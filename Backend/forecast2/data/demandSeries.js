@@ -1,18 +1,24 @@
 // forecast/data/demandSeries.js
 import prisma from "../../config/prisma.js";
 
+// Days of sales history loaded per product (0: all history). Set it no
+// shorter than the Python training window, FORECAST_TRAIN_MAX_DAYS.
+const DEFAULT_DAYS_BACK = Number(process.env.FORECAST_HISTORY_DAYS) || 0;
+
 /**
  * Build daily demand series for a product
  * @param {number} productId
- * @param {number} daysBack
+ * @param {number} daysBack - Days of history to load (0: all)
  */
-export const getDailyDemandSeries = async (productId, daysBack = 60) => {
+export const getDailyDemandSeries = async (productId, daysBack = DEFAULT_DAYS_BACK) => {
   const startDate = new Date();
   startDate.setDate(startDate.getDate() - daysBack);
 
-  // Step 1: Aggregate quantities sold per sale
+  // Step 1: Aggregate quantities sold per sale (within the window, if any)
   const saleItems = await prisma.saleItem.findMany({
-    where: { productId },
+    where: daysBack > 0
+      ? { productId, sale: { createdAt: { gte: startDate } } }
+      : { productId },
     select: {
       quantity: true,
       sale: { select: { createdAt: true } },
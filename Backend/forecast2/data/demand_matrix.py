@@ -0,0 +1,210 @@
+# Backend/forecast2/data/demand_matrix.py
+"""
+Shared Demand Matrix
+One dense (products x days) float32 file that every forecast worker memory-maps
+
+build_demand_matrix() materializes all products' daily demand into
+<prefix>.npy plus an index sidecar <prefix>.index.json. Workers call
+open_demand_matrix() to map it read-only; the OS page cache holds a single
+copy however many processes read it, and each product is a zero-copy row
+view that the forecasters accept in place of a list of dicts. Rows are
+aligned on the catalogue calendar; the index also records where each
+product's history starts, and row() trims the leading days before it.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _paths(prefix):
+    return f"{prefix}.npy", f"{prefix}.index.json"
+
+
+def build_demand_matrix(prefix, series_by_product, start_date=None, end_date=None):
+    """
+    Write every product's daily demand into one dense matrix file
+
+    Args:
+        prefix: Output path without extension
+        series_by_product: {product_id: [{'date', 'quantity' or 'demand'}, ...]}
+            (the shape produced by getDailyDemandSeries)
+        start_date, end_date: Calendar range (default: span of the data)
+
+    Returns:
+        DemandMatrix opened on the new file
+    """
+    product_ids = list(series_by_product)
+
+    # Flatten to (row, day, quantity) arrays once, then scatter vectorized
+    rows, dates, quantities = [], [], []
+    for row, product_id in enumerate(product_ids):
+        points = series_by_product[product_id]
+        rows.append(np.full(len(points), row, dtype=np.int64))
+        dates.extend(point['date'] for point in points)
+        quantities.extend(point.get('quantity', point.get('demand', 0)) for point in points)
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    days = (pd.to_datetime(pd.Series(dates, dtype=object)).values.astype('datetime64[D]') - EPOCH).astype(np.int64)
+    quantities = pd.to_numeric(pd.Series(quantities, dtype=object), errors='coerce').fillna(0).to_numpy(np.float32)
+
+    first = (np.datetime64(start_date, 'D') - EPOCH).astype(np.int64) if start_date else (days.min() if len(days) else 0)
+    last = (np.datetime64(end_date, 'D') - EPOCH).astype(np.int64) if end_date else (days.max() if len(days) else first)
+    n_days = int(last - first + 1)
+
+    in_range = (days >= first) & (days <= last)
+    matrix_path, index_path = _paths(prefix)
+    os.makedirs(os.path.dirname(os.path.abspath(matrix_path)), exist_ok=True)
+
+    matrix = np.lib.format.open_memmap(matrix_path, mode='w+', dtype=np.float32, shape=(len(product_ids), n_days))
+    matrix[:] = 0
+    np.add.at(matrix, (rows[in_range], days[in_range] - first), quantities[in_range])
+    matrix.flush()
+    del matrix
+
+    # Each product's first recorded day (n_days for products without data)
+    first_days = np.full(len(product_ids), n_days, dtype=np.int64)
+    started = days <= last
+    np.minimum.at(first_days, rows[started], np.maximum(days[started] - first, 0))
+
+    with open(index_path, 'w') as f:
+        json.dump({
+            'start_date': str(EPOCH + int(first)),
+            'days': n_days,
+            'product_ids': product_ids,
+            'first_days': first_days.tolist()
+        }, f)
+
+    return open_demand_matrix(prefix)
+
+
+def open_demand_matrix(prefix):
+    """
+    Memory-map a matrix written by build_demand_matrix (read-only)
+    """
+    matrix_path, index_path = _paths(prefix)
+    with open(index_path) as f:
+        index = json.load(f)
+    return DemandMatrix(
+        np.load(matrix_path, mmap_mode='r'), index['start_date'], index['product_ids'], index.get('first_days')
+    )
+
+
+class DemandMatrix:
+    """
+    Read-only view over the shared demand matrix
+    """
+
+    def __init__(self, values, start_date, product_ids, first_days=None):
+        self.values = values
+        self.start_date = np.datetime64(start_date, 'D')
+        self.product_ids = list(product_ids)
+        # Offset of each product's first recorded day (default: calendar start)
+        if first_days is None:
+            first_days = np.zeros(len(self.product_ids), dtype=np.int64)
+        self.first_days = np.asarray(first_days, dtype=np.int64)
+        self._rows = {product_id: row for row, product_id in enumerate(self.product_ids)}
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def __contains__(self, product_id):
+        return product_id in self._rows
+
+    def row(self, product_id, days_back=None):
+        """
+        Zero-copy view of one product's demand, from its first recorded day
+
+        Args:
+            product_id: Product to read
+            days_back: Only the last N days (default: full history)
+        """
+        row = self._rows[product_id]
+        offset = int(self.first_days[row])
+        values = self.values[row, offset:]
+        start = self.start_date + offset
+        if days_back is not None and days_back < len(values):
+            start = start + (len(values) - days_back)
+            values = values[-days_back:]
+        return DemandRow(values, start)
+
+    def rows(self, product_ids=None):
+        """
+        Zero-copy (products, days) view for a batch, when rows are contiguous;
+        otherwise a gathered copy
+        """
+        if product_ids is None:
+            return self.values
+        index = np.fromiter((self._rows[pid] for pid in product_ids), dtype=np.int64)
+        if len(index) and np.all(np.diff(index) == 1):
+            return self.values[index[0]:index[-1] + 1]
+        return self.values[index]
+
+
+class DemandRow:
+    """
+    One product's daily demand backed by the shared matrix
+
+    Behaves like a list of {'date', 'quantity'} dicts, so it can be passed
+    anywhere historical_data is expected, and exposes to_history_frame()
+    so the forecasters skip dict parsing.
+    """
+
+    def __init__(self, values, start_date):
+        self.values = values
+        self.start_date = np.datetime64(start_date, 'D')
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, _, step = i.indices(len(self.values))
+            if step != 1:
+                raise ValueError("DemandRow slices must be contiguous")
+            return DemandRow(self.values[i], self.start_date + start)
+        if i < 0:
+            i += len(self.values)
+        return {'date': str(self.start_date + i), 'quantity': float(self.values[i])}
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self[i]
+
+    @property
+    def dates(self):
+        return self.start_date + np.arange(len(self.values))
+
+    def to_history_frame(self, end_date=None):
+        """
+        History frame over the row (see models/history.py history_frame);
+        quantities stay float32, zero-filled through `end_date` if later
+        """
+        quantity = np.asarray(self.values)
+        if end_date is not None and len(quantity):
+            extra = int((np.datetime64(pd.Timestamp(end_date), 'D') - self.start_date).astype(np.int64)) + 1 - len(quantity)
+            if extra > 0:
+                quantity = np.concatenate([quantity, np.zeros(extra, dtype=quantity.dtype)])
+        return pd.DataFrame({
+            'date': (self.start_date + np.arange(len(quantity))).astype('datetime64[ns]'),
+            'quantity': quantity
+        }, copy=False)
+
+
+if __name__ == "__main__":
+    # Materialize a JSON export ({productId: [{date, demand}, ...]}) into a shared matrix
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python demand_matrix.py <series.json> <output_prefix>")
+        sys.exit(1)
+
+    with open(sys.argv[1]) as f:
+        series = json.load(f)
+
+    matrix = build_demand_matrix(sys.argv[2], {int(pid) if str(pid).isdigit() else pid: points for pid, points in series.items()})
+    print(f"✓ {len(matrix)} products x {matrix.values.shape[1]} days -> {_paths(sys.argv[2])[0]}")
@@ -0,0 +1,296 @@
+"""
+Forecast Service Load Test
+AI-Enabled Inventory Forecasting System
+
+Drives app.py end to end (request, features, fit, predict, alert trigger)
+with a synthetic catalogue at a fixed concurrency. By default it starts a
+local stand-in for the Node alert endpoint (alertStub.js) and the service
+itself (uvicorn) pointed at it via FORECAST_ALERT_URL, then reports
+p50/p95/p99 latency, throughput, error and shed rates, and the service's
+CPU and RSS (worker processes included, needs psutil). Results can be
+saved as JSON to track trends between runs.
+
+Usage:
+    python load_test.py [--products 2000] [--requests 500] [--concurrency 8]
+                        [--models xgboost,linear_regression] [--output results.json]
+    python load_test.py --url http://localhost:5002 ...   (existing service, no stub)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import threading
+import subprocess
+import numpy as np
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_model_accuracy import generate_sample_catalogue
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PERCENTILES = (50, 95, 99)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout, ok=(200,)):
+    """Poll a URL until it answers with an accepted status."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code in ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def start_alert_stub(port, delay_ms=0):
+    """Start alertStub.js (needs node on PATH)."""
+    node = shutil.which('node')
+    if node is None:
+        raise RuntimeError("node not found; test an existing service with --url instead")
+    process = subprocess.Popen(
+        [node, os.path.join(HERE, 'alertStub.js'), '--port', str(port), '--delay-ms', str(delay_ms)],
+        stdout=subprocess.DEVNULL
+    )
+    wait_for(f"http://127.0.0.1:{port}/stats", timeout=15)
+    return process
+
+
+def start_service(port, alert_url, prefork=False, timeout=300):
+    """Start app.py under uvicorn and wait until /ready answers 200."""
+    env = dict(os.environ, FORECAST_ALERT_URL=alert_url, FORECAST_PREFORK='1' if prefork else '0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=HERE, env=env
+    )
+    wait_for(f"http://127.0.0.1:{port}/ready", timeout=timeout)
+    return process
+
+
+def stop(process):
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU % and RSS of a process and its children."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+        self._root = psutil.Process(pid) if PSUTIL_AVAILABLE and pid else None
+        self._tracked = {}
+
+    def _processes(self):
+        processes = [self._root] + self._root.children(recursive=True)
+        for process in processes:
+            if process.pid not in self._tracked:
+                process.cpu_percent(None)  # First call only sets the baseline
+                self._tracked[process.pid] = process
+        return [self._tracked[p.pid] for p in processes]
+
+    def run(self):
+        if self._root is None:
+            return
+        self._processes()
+        while not self._done.wait(self.interval):
+            cpu, rss = 0.0, 0
+            for process in self._processes():
+                try:
+                    cpu += process.cpu_percent(None)
+                    rss += process.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.samples.append((cpu, rss / 2 ** 20))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        if not self.samples:
+            return {'cpu_percent_mean': None, 'cpu_percent_max': None, 'rss_mb_max': None}
+        cpu, rss = np.array(self.samples).T
+        return {
+            'cpu_percent_mean': round(float(cpu.mean()), 1),
+            'cpu_percent_max': round(float(cpu.max()), 1),
+            'rss_mb_max': round(float(rss.max()), 1),
+        }
+
+
+def latency_stats(seconds):
+    if not seconds:
+        return {f'p{p}_ms': None for p in PERCENTILES}
+    ms = np.asarray(seconds) * 1000
+    stats = {f'p{p}_ms': round(float(np.percentile(ms, p)), 1) for p in PERCENTILES}
+    stats.update({'mean_ms': round(float(ms.mean()), 1), 'max_ms': round(float(ms.max()), 1)})
+    return stats
+
+
+def summarize(results, elapsed):
+    """Latency, throughput and error rates over a list of result dicts."""
+    ok = [r for r in results if r['status'] == 200]
+    statuses = {}
+    for r in results:
+        statuses[str(r['status'])] = statuses.get(str(r['status']), 0) + 1
+    total = max(len(results), 1)
+    return {
+        'requests': len(results),
+        'succeeded': len(ok),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed > 0 else None,
+        'latency': latency_stats([r['seconds'] for r in ok]),
+        'error_rate': round(sum(r['status'] not in (200, 429) for r in results) / total, 4),
+        'shed_rate': round(sum(r['status'] == 429 for r in results) / total, 4),
+        'fallback_rate': round(sum(r['fallback'] for r in ok) / max(len(ok), 1), 4),
+        'statuses': statuses,
+    }
+
+
+def run_load(url, dates, demand, n_requests, concurrency, models, horizon, days_back, priority, deadline_seconds):
+    """Send n_requests forecast requests (notify=true) from `concurrency` threads."""
+    date_strings = dates.strftime('%Y-%m-%d').tolist()[-days_back:]
+    sessions = threading.local()
+
+    def send(i):
+        product = i % len(demand)
+        model = models[i % len(models)]
+        quantities = demand[product, -days_back:].tolist()
+        payload = {
+            'historical_data': [{'date': d, 'quantity': q} for d, q in zip(date_strings, quantities)],
+            'model': model,
+            'horizon': horizon,
+            'deadline_seconds': deadline_seconds,
+            'notify': True,
+        }
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+
+        start = time.perf_counter()
+        try:
+            response = sessions.session.post(
+                f"{url}/forecast/{product + 1}", params={'priority': priority}, json=payload,
+                timeout=deadline_seconds + 60
+            )
+            status = response.status_code
+            fallback = status == 200 and bool(response.json().get('fallback'))
+        except requests.RequestException:
+            status, fallback = 'connection_error', False
+        return {'model': model, 'status': status, 'seconds': time.perf_counter() - start, 'fallback': fallback}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(n_requests)))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=365, help='Days of synthetic history per product')
+    parser.add_argument('--days-back', type=int, default=180, help='Days of history sent per request')
+    parser.add_argument('--intermittent-share', type=float, default=0.3)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=10, help='Requests sent first and excluded from the report')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--models', default='xgboost,linear_regression')
+    parser.add_argument('--horizon', type=int, default=14)
+    parser.add_argument('--priority', default='interactive', choices=['interactive', 'batch'])
+    parser.add_argument('--deadline-seconds', type=float, default=30)
+    parser.add_argument('--alert-delay-ms', type=int, default=0, help='Stub response delay')
+    parser.add_argument('--prefork', action='store_true', help='Start the service with FORECAST_PREFORK=1')
+    parser.add_argument('--url', help='Existing service to test (no service or stub is started)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Optional JSON output path')
+    args = parser.parse_args()
+
+    models = [m for m in args.models.split(',') if m]
+    dates, demand = generate_sample_catalogue(args.products, args.days, args.intermittent_share, args.seed)
+    print(f"✓ Catalogue: {args.products} products x {args.days} days")
+
+    stub = service = None
+    url, stub_url = args.url, None
+    try:
+        if url is None:
+            stub_port, service_port = free_port(), free_port()
+            stub = start_alert_stub(stub_port, args.alert_delay_ms)
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            service = start_service(service_port, f"{stub_url}/api/forecast/trigger-alerts", args.prefork)
+            url = f"http://127.0.0.1:{service_port}"
+            print(f"✓ Service on {url}, alert stub on {stub_url}")
+
+        if args.warmup:
+            run_load(url, dates, demand, args.warmup, min(args.concurrency, args.warmup), models,
+                     args.horizon, args.days_back, args.priority, args.deadline_seconds)
+        alerts_before = requests.get(f"{stub_url}/stats", timeout=5).json()['received'] if stub_url else None
+
+        sampler = ResourceSampler(service.pid if service else None)
+        sampler.start()
+        results, elapsed = run_load(url, dates, demand, args.requests, args.concurrency, models,
+                                    args.horizon, args.days_back, args.priority, args.deadline_seconds)
+        resources = sampler.stop()
+
+        alerts = None
+        if stub_url:
+            received = requests.get(f"{stub_url}/stats", timeout=5).json()['received'] - alerts_before
+            alerts = {'received': received, 'expected': sum(r['status'] == 200 for r in results)}
+    finally:
+        stop(service)
+        stop(stub)
+
+    report = summarize(results, elapsed)
+    report['by_model'] = {model: summarize([r for r in results if r['model'] == model], elapsed) for model in models}
+    report.update({'elapsed_seconds': round(elapsed, 2), 'resources': resources, 'alerts': alerts})
+
+    latency = report['latency']
+    print(f"\n{report['requests']} requests at concurrency {args.concurrency} in {elapsed:.1f}s")
+    print(f"  throughput {report['throughput_rps']} req/s   p50 {latency['p50_ms']}ms   "
+          f"p95 {latency['p95_ms']}ms   p99 {latency['p99_ms']}ms")
+    print(f"  errors {report['error_rate']:.2%}   shed (429) {report['shed_rate']:.2%}   "
+          f"fallbacks {report['fallback_rate']:.2%}")
+    for model, stats in report['by_model'].items():
+        print(f"  {model:18s} p50 {stats['latency']['p50_ms']}ms  p95 {stats['latency']['p95_ms']}ms  "
+              f"p99 {stats['latency']['p99_ms']}ms")
+    if resources['rss_mb_max'] is not None:
+        print(f"  CPU mean {resources['cpu_percent_mean']}%  max {resources['cpu_percent_max']}%   "
+              f"RSS max {resources['rss_mb_max']} MB")
+    if alerts:
+        print(f"  alerts received {alerts['received']} / {alerts['expected']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'config': vars(args),
+                'results': report
+            }, f, indent=2)
+        print(f"✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
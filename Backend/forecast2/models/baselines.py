@@ -0,0 +1,262 @@
+# Backend/forecast2/models/baselines.py
+"""
+Vectorized Baseline Forecasts
+Moving average and exponential smoothing for a whole catalogue at once
+
+Every function takes a (products, days) matrix of zero-filled daily demand
+(e.g. data/demand_matrix.py DemandMatrix.rows()) and returns a
+(products, horizon) forecast. The smoothing recursions step through the
+days once, updating all products together with NumPy; when Numba is
+installed the same recursion can run as a compiled per-product loop.
+
+- moving_average:  mean of the last `window` days (movingAverage.js)
+- simple:          single exponential smoothing (exponentialSmoothing.js)
+- holt:            level + trend
+- holt_winters:    level + trend + additive seasonality (weekly by default)
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    from .history import history_frame, prediction_records
+except ImportError:
+    from history import history_frame, prediction_records
+
+
+METHODS = ('moving_average', 'simple', 'holt', 'holt_winters')
+
+# Interval bounds per method, as multiples of the prediction
+INTERVALS = {
+    'moving_average': (0.80, 1.20),
+    'simple': (0.75, 1.25),
+    'holt': (0.75, 1.25),
+    'holt_winters': (0.75, 1.25),
+}
+
+
+def _as_matrix(values):
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def moving_average(values, window=7, horizon=14):
+    """
+    Flat forecast at the mean of each product's last `window` days
+
+    Args:
+        values: Daily demand, shape (products, days)
+        window: Days to average
+        horizon: Number of days to forecast
+
+    Returns:
+        Forecasts, shape (products, horizon)
+    """
+    values = _as_matrix(values)
+    if values.shape[1] == 0:
+        return np.zeros((values.shape[0], horizon))
+    level = values[:, -window:].mean(axis=1)
+    return np.repeat(level[:, np.newaxis], horizon, axis=1)
+
+
+def _initial_state(values, beta, gamma, season_length):
+    """
+    Starting level, trend and seasonal indices, and the first day to smooth
+    """
+    products, days = values.shape
+    m = season_length
+
+    if gamma is not None:
+        level = values[:, :m].mean(axis=1)
+        trend = (values[:, m:2 * m].mean(axis=1) - level) / m if beta is not None else np.zeros(products)
+        season = values[:, :m] - level[:, np.newaxis]
+        return level, trend, season, m
+
+    level = values[:, 0].copy()
+    if beta is not None and days > 1:
+        trend = values[:, 1] - values[:, 0]
+    else:
+        trend = np.zeros(products)
+    return level, trend, np.zeros((products, 1)), 1
+
+
+def _smooth_numpy(values, alpha, beta, gamma, season_length, level, trend, season, start):
+    """
+    Run the recursion one day at a time, all products per step
+    """
+    seasonal = gamma is not None
+    for t in range(start, values.shape[1]):
+        y = values[:, t]
+        s = season[:, t % season_length] if seasonal else 0.0
+
+        previous = level
+        level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        if beta is not None:
+            trend = beta * (level - previous) + (1 - beta) * trend
+        if seasonal:
+            season[:, t % season_length] = gamma * (y - level) + (1 - gamma) * s
+    return level, trend, season
+
+
+def _smooth_loops(values, alpha, beta, gamma, season_length, level, trend, season, start):
+    """
+    Same recursion as _smooth_numpy as a per-product loop (compiled by Numba)
+
+    beta/gamma use -1.0 for "component disabled" so the kernel stays typed.
+    """
+    products, days = values.shape
+    for p in range(products):
+        lv = level[p]
+        tr = trend[p]
+        for t in range(start, days):
+            idx = t % season_length
+            s = season[p, idx] if gamma >= 0 else 0.0
+            previous = lv
+            lv = alpha * (values[p, t] - s) + (1 - alpha) * (lv + tr)
+            if beta >= 0:
+                tr = beta * (lv - previous) + (1 - beta) * tr
+            if gamma >= 0:
+                season[p, idx] = gamma * (values[p, t] - lv) + (1 - gamma) * s
+        level[p] = lv
+        trend[p] = tr
+    return level, trend, season
+
+
+if NUMBA_AVAILABLE:
+    _smooth_compiled = njit(cache=True)(_smooth_loops)
+
+
+def exponential_smoothing(values, alpha=0.3, beta=None, gamma=None, season_length=7,
+                          horizon=14, use_numba=None):
+    """
+    Exponential smoothing forecast for every product
+
+    Args:
+        values: Daily demand, shape (products, days)
+        alpha: Level smoothing
+        beta: Trend smoothing (None: no trend)
+        gamma: Seasonal smoothing (None: no seasonality)
+        season_length: Days per season when gamma is set
+        horizon: Number of days to forecast
+        use_numba: Use the compiled kernel (default: when Numba is installed)
+
+    Returns:
+        Non-negative forecasts, shape (products, horizon)
+    """
+    values = _as_matrix(values)
+    products, days = values.shape
+    if days == 0:
+        return np.zeros((products, horizon))
+    if gamma is not None and days < 2 * season_length:
+        raise ValueError(f"Insufficient data. Seasonal smoothing needs at least {2 * season_length} days, got {days}")
+
+    level, trend, season, start = _initial_state(values, beta, gamma, season_length)
+
+    if use_numba is None:
+        use_numba = NUMBA_AVAILABLE
+    if use_numba:
+        if not NUMBA_AVAILABLE:
+            raise ImportError("numba is not installed. Install with: pip install numba")
+        level, trend, season = _smooth_compiled(
+            values, float(alpha), -1.0 if beta is None else float(beta), -1.0 if gamma is None else float(gamma),
+            season_length if gamma is not None else 1, level, trend, np.ascontiguousarray(season), start
+        )
+    else:
+        level, trend, season = _smooth_numpy(values, alpha, beta, gamma, season_length, level, trend, season, start)
+
+    steps = np.arange(1, horizon + 1)
+    forecast = level[:, np.newaxis] + trend[:, np.newaxis] * steps
+    if gamma is not None:
+        forecast += season[:, (days - 1 + steps) % season_length]
+    return np.maximum(forecast, 0)
+
+
+def simple_smoothing(values, alpha=0.3, horizon=14, use_numba=None):
+    """Single exponential smoothing (flat forecast at the last level)"""
+    return exponential_smoothing(values, alpha, horizon=horizon, use_numba=use_numba)
+
+
+def holt(values, alpha=0.3, beta=0.1, horizon=14, use_numba=None):
+    """Holt's linear trend method"""
+    return exponential_smoothing(values, alpha, beta, horizon=horizon, use_numba=use_numba)
+
+
+def holt_winters(values, alpha=0.3, beta=0.1, gamma=0.1, season_length=7, horizon=14, use_numba=None):
+    """Additive Holt-Winters (weekly seasonality by default)"""
+    return exponential_smoothing(values, alpha, beta, gamma, season_length, horizon, use_numba)
+
+
+def baseline_forecast(values, method='holt_winters', horizon=14, **params):
+    """
+    Forecast every product with one baseline method
+
+    Args:
+        values: Daily demand, shape (products, days)
+        method: One of METHODS
+        horizon: Number of days to forecast
+        **params: Method parameters (window, alpha, beta, gamma, season_length)
+
+    Returns:
+        Forecasts, shape (products, horizon)
+    """
+    if method == 'moving_average':
+        return moving_average(values, horizon=horizon, **params)
+    if method == 'simple':
+        return simple_smoothing(values, horizon=horizon, **params)
+    if method == 'holt':
+        return holt(values, horizon=horizon, **params)
+    if method == 'holt_winters':
+        return holt_winters(values, horizon=horizon, **params)
+    raise ValueError(f"Unknown method: {method}. Use one of {METHODS}")
+
+
+def forecast_catalogue(demand_matrix, method='holt_winters', horizon=14, days_back=None, **params):
+    """
+    Baseline forecasts for every product in a shared demand matrix
+
+    Args:
+        demand_matrix: data/demand_matrix.py DemandMatrix
+        method: One of METHODS
+        horizon: Number of days to forecast
+        days_back: Only use the last N days (default: full calendar)
+
+    Returns:
+        {product_id: forecast array of length horizon}
+    """
+    values = demand_matrix.rows()
+    if days_back is not None:
+        values = values[:, -days_back:]
+    forecasts = baseline_forecast(values, method, horizon, **params)
+    return dict(zip(demand_matrix.product_ids, forecasts))
+
+
+def forecast_baseline(historical_data, horizon=7, method='holt_winters', end_date=None, **params):
+    """
+    Convenience function to forecast one product's history
+
+    Args:
+        historical_data: List of dicts with 'date' and 'quantity'
+        horizon: Number of days to forecast
+        method: One of METHODS
+        end_date: Run date (default: last sale date)
+
+    Returns:
+        dict with predictions and metrics
+    """
+    if len(historical_data) == 0:
+        raise ValueError("Insufficient data. Need at least 1 day of history")
+    df = history_frame(historical_data, end_date=end_date)
+
+    values = df['quantity'].to_numpy(dtype=np.float64)
+    forecast = baseline_forecast(values, method, horizon, **params)[0]
+    lower, upper = INTERVALS[method]
+
+    return {
+        'predictions': prediction_records(forecast, df['date'].iloc[-1], lower, upper),
+        'metrics': {'training_samples': len(values)},
+        'model_type': method
+    }
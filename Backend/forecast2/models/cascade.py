@@ -0,0 +1,282 @@
+# Backend/forecast2/models/cascade.py
+"""
+Model Cascade
+Escalates a product to a more expensive model only when it pays off
+
+Tiers, cheapest first: vectorized baselines, LinearRegressionForecaster,
+XGBoostForecaster, LSTMForecaster. Each tier is scored on a holdout of the
+last `holdout` days. The cascade moves on to the next tier only while the
+current one beat the previous by at least `min_gain` (relative MAE), and
+keeps the new tier only if it clears the same bar, so products whose
+demand a baseline already explains never reach XGBoost or LSTM.
+
+The chosen tier is remembered per product for `ttl_days`; within that
+period the product is fit and forecast with its tier directly, skipping
+the holdout evaluation.
+"""
+
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+try:
+    from .baselines import baseline_forecast, forecast_baseline
+    from .history import history_frame, history_records
+    from .linear_regression import LinearRegressionForecaster
+    from .tuning import tuned_configs
+    from .xgboost_model import XGBoostForecaster
+except ImportError:
+    from baselines import baseline_forecast, forecast_baseline
+    from history import history_frame, history_records
+    from linear_regression import LinearRegressionForecaster
+    from tuning import tuned_configs
+    from xgboost_model import XGBoostForecaster
+
+
+TIERS = ('baseline', 'linear_regression', 'xgboost', 'lstm')
+
+# Training days each tier needs (same thresholds as modelSelector.js auto mode)
+MIN_TRAINING_DAYS = {
+    'baseline': 1,
+    'linear_regression': 30,
+    'xgboost': 60,
+    'lstm': 90,
+}
+
+BASELINE_METHODS = ('moving_average', 'simple', 'holt_winters')
+
+
+def _lstm_forecaster():
+    # Imported lazily: TensorFlow is only loaded for products that reach this tier
+    try:
+        from .lstm_model import LSTMForecaster, TENSORFLOW_AVAILABLE
+    except ImportError:
+        from lstm_model import LSTMForecaster, TENSORFLOW_AVAILABLE
+    return LSTMForecaster() if TENSORFLOW_AVAILABLE else None
+
+
+def _model(tier, tuned=None):
+    """
+    Forecaster for a tier and extra fit() arguments; `tuned` is the
+    product's (XGBoost params, lookback) from TunedConfigs.params()
+    """
+    if tier == 'linear_regression':
+        return LinearRegressionForecaster(), {}
+    if tier == 'xgboost':
+        params, lookback = tuned or ({}, None)
+        return XGBoostForecaster(**params), ({'lookback': lookback} if lookback else {})
+    if tier == 'lstm':
+        return _lstm_forecaster(), {}
+    raise ValueError(f"Unknown tier: {tier}")
+
+
+class CascadeDecisions:
+    """
+    Per-product tier decisions with an expiry, optionally persisted as JSON
+
+    put() only updates memory; save() writes the file once per batch (or
+    periodically), so a catalogue run does not rewrite it per product.
+    """
+
+    def __init__(self, path=None, ttl_days=7):
+        """
+        Args:
+            path: JSON file to persist decisions on save() (None keeps them
+                in memory)
+            ttl_days: Days a decision stays valid
+        """
+        self.path = path
+        self.ttl_days = ttl_days
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._decisions = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._decisions = json.load(f)
+
+    def get(self, product_id, today=None):
+        """
+        Valid decision for a product, or None if missing or expired
+        """
+        today = today or date.today()
+        with self._lock:
+            decision = self._decisions.get(str(product_id))
+        if decision is None:
+            return None
+        age = (today - date.fromisoformat(decision['decided_on'])).days
+        return decision if 0 <= age < self.ttl_days else None
+
+    def put(self, product_id, decision):
+        with self._lock:
+            self._decisions[str(product_id)] = decision
+            self._dirty = True
+
+    def save(self, path=None):
+        """
+        Write the decisions if any changed since the last save
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                decisions = dict(self._decisions)
+                self._dirty = False
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(decisions, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def __len__(self):
+        return len(self._decisions)
+
+
+class CascadeForecaster:
+    """
+    Chooses the cheapest model tier whose holdout error is within reach
+    """
+
+    def __init__(self, decisions=None, min_gain=0.05, holdout=14, max_tier='lstm', tuned=None):
+        """
+        Args:
+            decisions: CascadeDecisions (default: in-memory, 7-day expiry)
+            min_gain: Relative MAE improvement needed to escalate a tier
+            holdout: Days held out for the error estimate
+            max_tier: Most expensive tier to consider
+            tuned: TunedConfigs for the XGBoost tier (default: the
+                FORECAST_TUNED_CONFIGS file, see tuning.tuned_configs)
+        """
+        self.decisions = decisions if decisions is not None else CascadeDecisions()
+        self.min_gain = min_gain
+        self.holdout = holdout
+        self.tiers = TIERS[:TIERS.index(max_tier) + 1]
+        self.tuned = tuned
+
+    def _forecast(self, tier, df, horizon, baseline_method=None, deadline=None, tuned=None):
+        """
+        Fit one tier on a history and forecast; returns (forecast array, full result)
+        """
+        if tier == 'baseline':
+            values = df['quantity'].to_numpy(dtype=np.float64)
+            return baseline_forecast(values, baseline_method, horizon)[0], None
+
+        model, fit_args = _model(tier, tuned)
+        records = history_records(df)
+        metrics = model.fit(records, deadline=deadline, **fit_args)
+        predictions = model.predict(records, horizon, deadline=deadline)
+        return np.array([p['predicted'] for p in predictions]), (predictions, metrics)
+
+    def _holdout_errors(self, df, deadline=None, tuned=None):
+        """
+        Walk the tiers on the holdout; returns (chosen tier, baseline method, errors)
+        """
+        train, actual = df.iloc[:-self.holdout], df['quantity'].to_numpy()[-self.holdout:]
+        errors = {}
+
+        # All baseline methods are cheap; keep the best one as the baseline tier
+        values = train['quantity'].to_numpy(dtype=np.float64)
+        for method in BASELINE_METHODS:
+            if method == 'holt_winters' and len(values) < 14:
+                continue
+            forecast = baseline_forecast(values, method, self.holdout)[0]
+            errors[method] = float(np.mean(np.abs(actual - forecast)))
+        baseline_method = min(errors, key=errors.get)
+        errors['baseline'] = errors[baseline_method]
+
+        chosen, previous_gain = 'baseline', None
+        for tier in self.tiers[1:]:
+            if len(train) < MIN_TRAINING_DAYS[tier]:
+                break
+            # Only pay for the next tier while the last step paid off
+            if previous_gain is not None and previous_gain < self.min_gain:
+                break
+            if tier == 'lstm' and _lstm_forecaster() is None:
+                break
+
+            try:
+                forecast, _ = self._forecast(tier, train, self.holdout, deadline=deadline, tuned=tuned)
+            except ValueError:
+                break
+            errors[tier] = float(np.mean(np.abs(actual - forecast)))
+
+            current = errors[chosen]
+            previous_gain = (current - errors[tier]) / max(current, 1e-9)
+            if previous_gain >= self.min_gain:
+                chosen = tier
+
+        return chosen, baseline_method, errors
+
+    def forecast(self, product_id, historical_data, horizon=7, today=None, force=False, end_date=None, deadline=None,
+                 category=None):
+        """
+        Forecast one product with its cascade tier
+
+        Args:
+            product_id: Product identifier (key for the remembered decision)
+            historical_data: List of dicts with 'date' and 'quantity'
+            horizon: Number of days to forecast
+            today: Date used for decision expiry (default: today)
+            force: Re-evaluate even if a valid decision exists
+            end_date: Run date; the history is zero-filled through it and
+                the forecast starts the day after (default: last sale date)
+            deadline: Optional Deadline (models/deadline.py) for the holdout
+                evaluation and the final fit; DeadlineExceeded is raised
+                and no decision is remembered if the evaluation cannot finish
+            category: Product category, for category-level tuned XGBoost
+                parameters when the product has none of its own
+
+        Returns:
+            dict with predictions, metrics, model_type and cascade details
+        """
+        if len(historical_data) == 0:
+            raise ValueError("Insufficient data. Need at least 1 day of history")
+        df = history_frame(historical_data, end_date=end_date)
+        today = today or date.today()
+        tuned = (self.tuned or tuned_configs()).params(product_id, category)
+
+        decision = None if force else self.decisions.get(product_id, today)
+        cached = decision is not None
+        if not cached:
+            if len(df) > self.holdout + 1:
+                tier, baseline_method, errors = self._holdout_errors(df, deadline, tuned)
+            else:
+                tier, baseline_method, errors = 'baseline', 'moving_average', {}
+            decision = {
+                'tier': tier,
+                'baseline_method': baseline_method,
+                'holdout_mae': errors,
+                'decided_on': today.isoformat()
+            }
+            self.decisions.put(product_id, decision)
+
+        tier = decision['tier']
+        if tier == 'baseline':
+            result = forecast_baseline(history_records(df), horizon, decision['baseline_method'])
+        else:
+            try:
+                _, (predictions, metrics) = self._forecast(tier, df, horizon, deadline=deadline, tuned=tuned)
+                result = {'predictions': predictions, 'metrics': metrics, 'model_type': tier}
+            except ValueError:
+                # The remembered tier no longer fits this history; fall back
+                result = forecast_baseline(history_records(df), horizon, decision['baseline_method'])
+                tier = 'baseline'
+
+        result['cascade'] = {
+            'tier': tier,
+            'baseline_method': decision['baseline_method'],
+            'holdout_mae': decision['holdout_mae'],
+            'decided_on': decision['decided_on'],
+            'cached': cached
+        }
+        return result
@@ -0,0 +1,367 @@
+# Backend/forecast2/models/change_detection.py
+"""
+Change Detection
+Running per-product demand statistics that decide when to reforecast
+
+Sale deltas are summed into the product's current day. A day closes when a
+sale for a later day arrives or when the ingest run ticks the catalogue
+forward to its run date (close_through), so products that stop selling keep
+closing days as zero demand. Each closed day is compared with what was
+expected: the last forecast for that date, or the running mean when there
+is no forecast. Deltas for days that are already closed are rejected rather
+than counted towards another day. Two tests run on the result:
+
+- a two-sided CUSUM on the residuals, scaled by their running mean
+  absolute deviation, for sustained shifts in level;
+- a drift check of cumulative actuals against the cumulative forecast
+  since it was made.
+
+A product is queued for reforecasting when either test fires or its
+forecast runs out; it stays out of the queue until a new forecast is
+registered. Unchanged products keep their cached forecast.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from .feature_rows import EPOCH, date_ordinals
+except ImportError:
+    from feature_rows import EPOCH, date_ordinals
+
+
+# CUSUM allowance and decision threshold, in residual standard deviations
+# (about one false alarm per 50 product-years on stable demand)
+CUSUM_K = 0.5
+CUSUM_H = 8.0
+
+# Cumulative actual vs forecast divergence that triggers a reforecast: more
+# than DRIFT_TOLERANCE of the forecast and outside the DRIFT_SIGMAS noise band
+DRIFT_TOLERANCE = 0.25
+DRIFT_SIGMAS = 3.0
+DRIFT_MIN_UNITS = 5.0
+DRIFT_MIN_DAYS = 3
+
+# Days of history before the running-mean reference is trusted
+WARMUP_DAYS = 14
+
+# Mean absolute deviation to standard deviation (normal residuals)
+MAD_TO_STD = 1.2533
+
+
+def _ordinal(date):
+    return int(date_ordinals([date])[0])
+
+
+class DemandMonitor:
+    """
+    Running statistics and change tests for one product
+    """
+
+    def __init__(self):
+        self.open_day = None        # epoch day still receiving sales
+        self.open_quantity = 0.0
+        self.days = 0               # closed days seen
+        self.mean = 0.0             # running mean of closed days
+        self.mad = None             # running mean absolute residual (winsorized)
+        self.cusum_up = 0.0
+        self.cusum_down = 0.0
+        self.forecast = {}          # epoch day -> predicted quantity
+        self.forecast_actual = 0.0
+        self.forecast_expected = 0.0
+        self.forecast_days = 0
+        self.pending = None         # reason, while a reforecast is queued
+
+    def set_forecast(self, predictions):
+        """
+        Use a new forecast as the reference and clear the change tests
+        """
+        self.forecast = {
+            _ordinal(p['date']): float(p.get('predicted', p.get('yhat', 0.0)))
+            for p in predictions
+        }
+        # A product without sales yet is monitored from its first forecast day
+        if self.open_day is None and self.forecast:
+            self.open_day = min(self.forecast)
+        # Seed the residual scale from the forecast's 95% interval width
+        widths = [
+            p['upper95'] - p['lower95'] for p in predictions
+            if p.get('upper95') is not None and p.get('lower95') is not None
+        ]
+        if widths:
+            self.mad = sum(widths) / len(widths) / (2 * 1.96 * MAD_TO_STD)
+        self.forecast_actual = self.forecast_expected = 0.0
+        self.forecast_days = 0
+        self.cusum_up = self.cusum_down = 0.0
+        self.pending = None
+
+    def is_closed(self, ordinal):
+        """
+        Whether the day has already been closed (its deltas would be late)
+        """
+        return self.open_day is not None and ordinal < self.open_day
+
+    def add(self, ordinal, quantity):
+        """
+        Add a sale delta; returns a reason string if the product should be reforecast
+        """
+        if self.is_closed(ordinal):
+            raise ValueError(f"Day {EPOCH + ordinal} is already closed")
+        if self.open_day is None:
+            self.open_day = ordinal
+
+        reason = self.close_through(ordinal - 1)
+        self.open_quantity += quantity
+        return reason
+
+    def close_through(self, ordinal):
+        """
+        Close every day up to and including `ordinal`; days without sales
+        close as zero demand. Returns a reason string if the product should
+        be reforecast.
+        """
+        if self.open_day is None:
+            return None
+        reason = None
+        while self.open_day <= ordinal:
+            reason = self._close_day(self.open_day, self.open_quantity) or reason
+            self.open_day += 1
+            self.open_quantity = 0.0
+        return reason
+
+    def _close_day(self, day, actual):
+        expected = self.forecast.get(day)
+        has_forecast = expected is not None
+        if not has_forecast:
+            expected = self.mean
+
+        residual = actual - expected
+        scale = self._scale(residual)
+
+        # Update the running statistics after computing the residual
+        self.days += 1
+        self.mean += (actual - self.mean) / self.days
+
+        if scale is None or (not has_forecast and self.days <= WARMUP_DAYS):
+            return None
+
+        z = residual / scale
+        self.cusum_up = max(0.0, self.cusum_up + z - CUSUM_K)
+        self.cusum_down = max(0.0, self.cusum_down - z - CUSUM_K)
+
+        if has_forecast:
+            self.forecast_actual += actual
+            self.forecast_expected += expected
+            self.forecast_days += 1
+
+        if self.pending is not None:
+            return None
+        if self.cusum_up > CUSUM_H or self.cusum_down > CUSUM_H:
+            return self._queue('level_shift_up' if self.cusum_up > CUSUM_H else 'level_shift_down')
+        if self.forecast_days >= DRIFT_MIN_DAYS:
+            gap = abs(self.forecast_actual - self.forecast_expected)
+            noise = DRIFT_SIGMAS * scale * math.sqrt(self.forecast_days)
+            if gap > max(DRIFT_TOLERANCE * self.forecast_expected, noise, DRIFT_MIN_UNITS):
+                return self._queue('forecast_divergence')
+        if self.forecast and day >= max(self.forecast):
+            return self._queue('forecast_expired')
+        return None
+
+    def _scale(self, residual):
+        """
+        Residual standard deviation estimate before this residual, then fold
+        it into the running MAD (None until one residual has been seen)
+        """
+        if self.mad is None:
+            self.mad = abs(residual)
+            return None
+        # Poisson floor keeps low-volume and flat series from alarming on noise
+        scale = max(self.mad * MAD_TO_STD, math.sqrt(self.mean), 1.0)
+        # Winsorized so a level shift does not inflate the scale that detects it
+        self.mad += 0.1 * (min(abs(residual), 3 * scale) - self.mad)
+        return scale
+
+    def _queue(self, reason):
+        self.pending = reason
+        self.cusum_up = self.cusum_down = 0.0
+        return reason
+
+    def status(self):
+        return {
+            'open_day': None if self.open_day is None else str(EPOCH + self.open_day),
+            'open_quantity': self.open_quantity,
+            'days': self.days,
+            'mean': round(self.mean, 4),
+            'cusum_up': round(self.cusum_up, 4),
+            'cusum_down': round(self.cusum_down, 4),
+            'forecast_days': self.forecast_days,
+            'forecast_actual': self.forecast_actual,
+            'forecast_expected': round(self.forecast_expected, 4),
+            'pending': self.pending,
+        }
+
+    def to_dict(self):
+        state = dict(vars(self))
+        state['forecast'] = {str(k): v for k, v in self.forecast.items()}
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        monitor = cls()
+        monitor.__dict__.update(state)
+        monitor.forecast = {int(k): v for k, v in state.get('forecast', {}).items()}
+        return monitor
+
+
+class ChangeDetector:
+    """
+    Monitors for a catalogue plus the queue of products to reforecast
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file to persist state (None keeps it in memory;
+                save() writes it, e.g. periodically and on shutdown)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._monitors = {}
+        self._queue = OrderedDict()  # product id -> reason, oldest first
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self._monitors = {pid: DemandMonitor.from_dict(s) for pid, s in state['monitors'].items()}
+            self._queue = OrderedDict(state['queue'])
+
+    def _monitor(self, product_id):
+        key = str(product_id)
+        if key not in self._monitors:
+            self._monitors[key] = DemandMonitor()
+        return self._monitors[key]
+
+    def ingest(self, events, run_date=None):
+        """
+        Fold sale deltas into the running statistics
+
+        Args:
+            events: Iterable of (product_id, date, quantity), in date order per product
+            run_date: Date of this ingest run; every day before it is then
+                closed for all products (see close_through)
+
+        Returns:
+            (queued, late): {product_id: reason} for products queued by this
+            batch, and the (product_id, date) of deltas rejected because
+            their day was already closed
+        """
+        events = list(events)
+        ordinals = date_ordinals([date for _, date, _ in events]) if events else []
+        queued, late = {}, []
+        with self._lock:
+            for (product_id, date, quantity), ordinal in zip(events, ordinals):
+                monitor = self._monitor(product_id)
+                if monitor.is_closed(int(ordinal)):
+                    late.append((product_id, date))
+                    continue
+                self._record(queued, product_id, monitor.add(int(ordinal), float(quantity)))
+                self._dirty = True
+            if run_date is not None:
+                self._close_all(_ordinal(run_date) - 1, queued)
+        return queued, late
+
+    def close_through(self, date):
+        """
+        Close every product's days up to and including `date`
+
+        Products without sales on those days close them as zero demand, so
+        a product that stopped selling still trips the level-shift, drift
+        and expiry tests. Run once per ingest with the day before the run date.
+
+        Returns:
+            {product_id: reason} for products queued by this tick
+        """
+        queued = {}
+        with self._lock:
+            self._close_all(_ordinal(date), queued)
+        return queued
+
+    def _close_all(self, ordinal, queued):
+        for product_id, monitor in self._monitors.items():
+            open_day = monitor.open_day
+            self._record(queued, product_id, monitor.close_through(ordinal))
+            self._dirty = self._dirty or monitor.open_day != open_day
+
+    def _record(self, queued, product_id, reason):
+        if reason is not None:
+            self._queue[str(product_id)] = reason
+            queued[str(product_id)] = reason
+
+    def set_forecast(self, product_id, predictions):
+        """
+        Register a new forecast for a product (clears it from the queue)
+        """
+        with self._lock:
+            self._monitor(product_id).set_forecast(predictions)
+            self._queue.pop(str(product_id), None)
+            self._dirty = True
+
+    def drain(self, limit=None):
+        """
+        Take up to `limit` queued products, oldest first
+
+        Returns:
+            List of {'productId', 'reason'}
+        """
+        with self._lock:
+            count = len(self._queue) if limit is None else min(limit, len(self._queue))
+            self._dirty = self._dirty or count > 0
+            return [
+                {'productId': product_id, 'reason': reason}
+                for product_id, reason in (self._queue.popitem(last=False) for _ in range(count))
+            ]
+
+    def status(self, product_id=None):
+        with self._lock:
+            if product_id is not None:
+                monitor = self._monitors.get(str(product_id))
+                return None if monitor is None else monitor.status()
+            reasons = list(self._queue.values())
+            return {
+                'products': len(self._monitors),
+                'queued': len(self._queue),
+                'reasons': {reason: reasons.count(reason) for reason in set(reasons)},
+            }
+
+    def save(self, path=None):
+        """
+        Write the state if anything changed since the last save
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                state = {
+                    'monitors': {pid: monitor.to_dict() for pid, monitor in self._monitors.items()},
+                    'queue': list(self._queue.items()),
+                }
+                self._dirty = False
+            try:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def __len__(self):
+        return len(self._monitors)
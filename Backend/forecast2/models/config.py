@@ -0,0 +1,237 @@
+# Backend/forecast2/models/config.py
+"""
+Compute Configuration
+Process-wide settings shared by the forecasting models
+"""
+
+import os
+import threading
+
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+
+BLAS_THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+PRECISIONS = ('float64', 'float32')
+
+# Compact dtypes for calendar columns in float32 mode
+CALENDAR_DTYPES = {
+    'day_of_week': np.int8,
+    'day_of_month': np.int8,
+    'week_of_month': np.int8,
+    'month': np.int8,
+    'is_weekend': np.int8,
+    'is_month_start': np.int8,
+    'is_month_end': np.int8,
+}
+
+_lock = threading.Lock()
+_precision = {'mode': 'float64'}
+_thread_budget = {
+    'total_threads': int(os.environ.get('FORECAST_THREADS', 0)) or (os.cpu_count() or 1),
+    'concurrent_fits': int(os.environ.get('FORECAST_CONCURRENT_FITS', 0)) or 1,
+}
+_thread_limits = {}
+# 0 disables a setting
+_training_window = {
+    'max_days': int(os.environ.get('FORECAST_TRAIN_MAX_DAYS', 0)),
+    'half_life_days': float(os.environ.get('FORECAST_TRAIN_HALF_LIFE_DAYS', 0)),
+    'weekly_after_days': int(os.environ.get('FORECAST_TRAIN_WEEKLY_AFTER_DAYS', 0)),
+}
+
+
+def set_thread_budget(total_threads=None, concurrent_fits=None):
+    """
+    Set the global thread budget shared by concurrent model fits
+
+    Args:
+        total_threads: Cores available to forecasting (default: all cores)
+        concurrent_fits: Number of fits expected to run at the same time
+
+    Returns:
+        dict with the resulting budget
+    """
+    with _lock:
+        if total_threads is not None:
+            _thread_budget['total_threads'] = max(1, int(total_threads))
+        if concurrent_fits is not None:
+            _thread_budget['concurrent_fits'] = max(1, int(concurrent_fits))
+        return dict(_thread_budget)
+
+
+def get_thread_budget():
+    """
+    Get the current thread budget
+    """
+    with _lock:
+        budget = dict(_thread_budget)
+    budget['threads_per_fit'] = max(1, budget['total_threads'] // budget['concurrent_fits'])
+    return budget
+
+
+def threads_per_fit():
+    """
+    Number of threads a single fit may use without oversubscribing the CPU
+    """
+    return get_thread_budget()['threads_per_fit']
+
+
+def apply_thread_limits(n_threads=None):
+    """
+    Limit BLAS/OpenMP thread pools for the whole process
+
+    threadpoolctl limits are process-wide, so they are applied once at
+    startup (app.py lifespan, each worker process) rather than around
+    individual fits, where concurrent request threads would overwrite each
+    other's limits. The same limit is exported to the environment for
+    libraries loaded later; variables already set by the user are left
+    untouched. Calling again with the same limit is a no-op.
+
+    Args:
+        n_threads: Threads per pool (default: threads_per_fit())
+
+    Returns:
+        The applied limit
+    """
+    n_threads = max(1, int(n_threads or threads_per_fit()))
+    with _lock:
+        if _thread_limits.get('threads') == n_threads:
+            return n_threads
+        for var in BLAS_THREAD_ENV_VARS:
+            os.environ.setdefault(var, str(n_threads))
+        if THREADPOOLCTL_AVAILABLE:
+            threadpool_limits(limits=n_threads, user_api='blas')
+        _thread_limits['threads'] = n_threads
+    return n_threads
+
+
+def set_precision(mode):
+    """
+    Set the numeric precision for feature matrices, sequences and buffers
+
+    Args:
+        mode: 'float64' (default) or 'float32' (half the memory; calendar
+            columns become int8 and the trend int32)
+    """
+    if mode not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {mode}. Use one of {PRECISIONS}")
+    _precision['mode'] = mode
+
+
+# Validated like any other setting, so a typo fails at import
+set_precision(os.environ.get('FORECAST_PRECISION', 'float64'))
+
+
+def get_precision():
+    """
+    Get the current precision mode
+    """
+    return _precision['mode']
+
+
+def float_dtype():
+    """
+    Float dtype for the current precision mode
+    """
+    return np.float32 if _precision['mode'] == 'float32' else np.float64
+
+
+def compact_features(features):
+    """
+    Downcast a feature DataFrame in place for the current precision mode
+
+    The forecasters already build their features in float_dtype(); in
+    float32 mode this narrows calendar columns to int8 and the trend to
+    int32. In float64 mode the frame is returned unchanged.
+    """
+    if _precision['mode'] != 'float32':
+        return features
+
+    for column in features.columns:
+        if column in CALENDAR_DTYPES or column.startswith('is_holiday_'):
+            features[column] = features[column].astype(np.int8)
+        elif column == 'trend':
+            features[column] = features[column].astype(np.int32)
+        elif features[column].dtype != np.float32:
+            features[column] = features[column].astype(np.float32)
+    return features
+
+
+def set_training_window(max_days=None, half_life_days=None, weekly_after_days=None):
+    """
+    Set the training-window policy applied to every fit
+
+    Args:
+        max_days: Train on at most the most recent N days of rows (0: all)
+        half_life_days: Exponential recency weights halving every N days,
+            passed to the models as sample_weight (0: equal weights)
+        weekly_after_days: Keep one row per week (weighted x7) for rows
+            older than N days (0: keep every day)
+
+    Returns:
+        dict with the resulting policy
+    """
+    with _lock:
+        if max_days is not None:
+            _training_window['max_days'] = max(0, int(max_days))
+        if half_life_days is not None:
+            _training_window['half_life_days'] = max(0.0, float(half_life_days))
+        if weekly_after_days is not None:
+            _training_window['weekly_after_days'] = max(0, int(weekly_after_days))
+        return dict(_training_window)
+
+
+def get_training_window():
+    """
+    Get the current training-window policy
+    """
+    with _lock:
+        return dict(_training_window)
+
+
+def training_selection(n_rows):
+    """
+    Rows of a date-ordered daily training set kept by the training-window
+    policy, and their sample weights
+
+    Downsampled weeks keep a different weekday each week, so every weekday
+    stays represented in older history.
+
+    Args:
+        n_rows: Training rows, one per day, oldest first
+
+    Returns:
+        (rows, weights): index array (None: all rows) and float weights
+        (None: equal weights)
+    """
+    policy = get_training_window()
+    age = np.arange(n_rows - 1, -1, -1)
+    keep = np.ones(n_rows, dtype=bool)
+    weights = np.ones(n_rows)
+
+    if policy['max_days']:
+        keep &= age < policy['max_days']
+    if policy['weekly_after_days']:
+        old = age >= policy['weekly_after_days']
+        keep &= ~old | (age % 7 == (age // 7) % 7)
+        weights[old] = 7.0
+    if policy['half_life_days']:
+        weights *= 0.5 ** (age / policy['half_life_days'])
+
+    weighted = bool(policy['half_life_days'] or policy['weekly_after_days'])
+    if keep.all() and not weighted:
+        return None, None
+    rows = np.flatnonzero(keep)
+    return rows, (weights[rows] if weighted else None)
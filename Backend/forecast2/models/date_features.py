@@ -0,0 +1,182 @@
+# Backend/forecast2/models/date_features.py
+"""
+Calendar Feature Table
+Precomputed calendar features indexed by epoch-day ordinal
+
+Every calendar column the forecasters use (day of week, day of month, week
+of month, month, weekend and month-boundary flags, plus optional regional
+holiday flags) is computed once for a date range and stored as one
+(days x columns) int8 matrix. A feature builder gathers all columns for any
+set of dates with a single fancy-indexing call:
+
+    table = get_calendar_table()
+    calendar = table.lookup(ordinals)      # {'day_of_week': ..., 'month': ...}
+
+Ordinals are days since 1970-01-01 (see date_ordinals).
+"""
+
+import os
+import threading
+import numpy as np
+
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+BASE_COLUMNS = (
+    'day_of_week', 'day_of_month', 'week_of_month', 'month',
+    'is_weekend', 'is_month_start', 'is_month_end',
+)
+
+DEFAULT_START = os.environ.get('FORECAST_CALENDAR_START', '2000-01-01')
+DEFAULT_END = os.environ.get('FORECAST_CALENDAR_END', '2040-12-31')
+
+
+def date_ordinals(dates):
+    """
+    Convert dates (strings, datetimes or datetime64) to epoch-day integers
+    """
+    return (np.asarray(dates, dtype='datetime64[D]') - EPOCH).astype(np.int64)
+
+
+def holiday_column(region):
+    """
+    Column name for a region's holiday flag, e.g. 'is_holiday_ke'
+    """
+    return f"is_holiday_{region.lower()}"
+
+
+class CalendarTable:
+    """
+    Calendar features for every day in [start, end]
+    """
+
+    def __init__(self, start=DEFAULT_START, end=DEFAULT_END, holidays=None):
+        """
+        Args:
+            start, end: First and last day covered (inclusive)
+            holidays: Optional {region: [dates]}; each region adds an
+                is_holiday_<region> column
+        """
+        self.first = int(date_ordinals([start])[0])
+        last = int(date_ordinals([end])[0])
+        if last < self.first:
+            raise ValueError(f"Calendar end {end} is before start {start}")
+
+        self.holidays = {region: list(dates) for region, dates in (holidays or {}).items()}
+        self.columns = list(BASE_COLUMNS) + [holiday_column(region) for region in self.holidays]
+        self._index = {name: col for col, name in enumerate(self.columns)}
+
+        ordinals = np.arange(self.first, last + 1, dtype=np.int64)
+        days = ordinals.astype('datetime64[D]')
+        month_start = days.astype('datetime64[M]')
+        next_month_start = (month_start + 1).astype('datetime64[D]')
+
+        day_of_week = (ordinals + 3) % 7  # 1970-01-01 was a Thursday
+        day_of_month = (days - month_start.astype('datetime64[D]')).astype(np.int64) + 1
+
+        values = np.zeros((len(ordinals), len(self.columns)), dtype=np.int8)
+        values[:, 0] = day_of_week
+        values[:, 1] = day_of_month
+        values[:, 2] = (day_of_month - 1) // 7 + 1
+        values[:, 3] = month_start.astype(np.int64) % 12 + 1
+        values[:, 4] = day_of_week >= 5
+        values[:, 5] = day_of_month == 1
+        values[:, 6] = days == next_month_start - 1
+
+        for region, dates in self.holidays.items():
+            offsets = date_ordinals(dates) - self.first if dates else np.empty(0, dtype=np.int64)
+            offsets = offsets[(offsets >= 0) & (offsets < len(ordinals))]
+            values[offsets, self._index[holiday_column(region)]] = 1
+
+        self.values = values
+
+    @property
+    def last(self):
+        return self.first + len(self.values) - 1
+
+    def covers(self, ordinals):
+        ordinals = np.asarray(ordinals)
+        return ordinals.size == 0 or (ordinals.min() >= self.first and ordinals.max() <= self.last)
+
+    def lookup(self, ordinals, columns=None):
+        """
+        Gather calendar columns for epoch-day ordinals
+
+        Args:
+            ordinals: Epoch-day integers, any shape
+            columns: Subset of column names (default: all)
+
+        Returns:
+            dict {column: array shaped like ordinals}
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if not self.covers(ordinals):
+            raise ValueError(
+                f"Dates outside the calendar table ({EPOCH + self.first} to {EPOCH + self.last}); "
+                f"widen it with configure_calendar()"
+            )
+
+        rows = self.values[ordinals - self.first]
+        return {
+            name: rows[..., self._index[name]]
+            for name in (self.columns if columns is None else columns)
+        }
+
+
+_lock = threading.Lock()
+_table = {'current': None}
+_settings = {'start': DEFAULT_START, 'end': DEFAULT_END, 'holidays': None}
+
+
+def configure_calendar(start=None, end=None, holidays=None):
+    """
+    Rebuild the shared calendar table
+
+    Args:
+        start, end: Range to cover (default: keep the current range)
+        holidays: {region: [dates]} holiday flags (default: keep current)
+
+    Returns:
+        The new CalendarTable
+    """
+    with _lock:
+        if start is not None:
+            _settings['start'] = start
+        if end is not None:
+            _settings['end'] = end
+        if holidays is not None:
+            _settings['holidays'] = holidays
+        _table['current'] = CalendarTable(_settings['start'], _settings['end'], _settings['holidays'])
+        return _table['current']
+
+
+def get_calendar_table(ordinals=None):
+    """
+    Shared calendar table, built on first use
+
+    Args:
+        ordinals: Optional ordinals the caller is about to look up; the
+            table is widened to cover them if needed
+
+    Returns:
+        CalendarTable
+    """
+    table = _table['current']
+    if table is None:
+        table = configure_calendar()
+
+    if ordinals is not None and not table.covers(ordinals):
+        ordinals = np.asarray(ordinals)
+        table = configure_calendar(
+            start=str(EPOCH + int(min(ordinals.min(), table.first))),
+            end=str(EPOCH + int(max(ordinals.max(), table.last))),
+        )
+    return table
+
+
+def calendar_features(dates, columns=None):
+    """
+    Calendar columns for dates (strings, datetimes or datetime64)
+    """
+    ordinals = date_ordinals(dates)
+    return get_calendar_table(ordinals).lookup(ordinals, columns)
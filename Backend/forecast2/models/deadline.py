@@ -0,0 +1,64 @@
+# Backend/forecast2/models/deadline.py
+"""
+Job Deadlines
+Wall-clock budgets that fits and rollouts check cooperatively
+
+A Deadline is passed down to fit() / predict(); training stops at the next
+epoch batch (Keras) or boosting round (XGBoost) once it has passed, and
+rollouts check it between horizon steps. Code that cannot finish raises
+DeadlineExceeded so the caller can fall back to a cheap forecast.
+"""
+
+import time
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a job runs past its deadline
+    """
+
+
+class Deadline:
+    """
+    A point in time (monotonic clock) a job must finish by
+    """
+
+    def __init__(self, seconds):
+        """
+        Args:
+            seconds: Budget from now
+        """
+        self.seconds = float(seconds)
+        self.expires_at = time.monotonic() + self.seconds
+
+    @classmethod
+    def until(cls, expires_at):
+        """
+        Deadline at a time.monotonic() value (shared by processes on one host)
+        """
+        deadline = cls(0)
+        deadline.expires_at = float(expires_at)
+        deadline.seconds = max(0.0, deadline.expires_at - time.monotonic())
+        return deadline
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage=None):
+        """
+        Raise DeadlineExceeded if the deadline has passed
+        """
+        if self.expired():
+            where = f" during {stage}" if stage else ""
+            raise DeadlineExceeded(f"Deadline of {self.seconds:.1f}s exceeded{where}")
+
+
+def check_deadline(deadline, stage=None):
+    """
+    deadline.check() that accepts None (no deadline)
+    """
+    if deadline is not None:
+        deadline.check(stage)
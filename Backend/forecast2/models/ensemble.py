@@ -0,0 +1,291 @@
+# Backend/forecast2/models/ensemble.py
+"""
+Linear Regression + XGBoost Ensemble
+Both models from one feature matrix, one rollout and one holdout
+
+The XGBoost feature set contains every Linear Regression feature, so the
+history is parsed and featurized once and the linear model is fitted on a
+column subset of the same matrix. Both models are fitted without the last
+`holdout` days; a batched rolling-origin backtest over those days scores
+them out of sample. The holdout MAEs set the blend weights (inverse MAE),
+and the holdout errors calibrate the intervals of each model and of the
+blend (see intervals.py).
+
+Forecasts for both models come from one recursive rollout: each step fills
+the feature rows of both models' paths in a single call and predicts the
+XGBoost rows with the booster and the linear rows with the folded weights,
+so the whole ensemble costs about as much as XGBoost alone.
+"""
+
+import numpy as np
+
+try:
+    from .config import float_dtype
+    from .deadline import check_deadline
+    from .feature_rows import calendar_fields, date_ordinals, ewm_last, fill_feature_rows, required_window
+    from .history import history_frame, prediction_records
+    from .intervals import CALIBRATION_HORIZON, CALIBRATION_ORIGINS, MIN_ORIGINS, EmpiricalIntervals, backtest_origins
+    from .linear_regression import LinearRegressionForecaster
+    from .xgboost_model import XGBoostForecaster
+    from .xgboost_runtime import EWM_SPAN
+except ImportError:
+    from config import float_dtype
+    from deadline import check_deadline
+    from feature_rows import calendar_fields, date_ordinals, ewm_last, fill_feature_rows, required_window
+    from history import history_frame, prediction_records
+    from intervals import CALIBRATION_HORIZON, CALIBRATION_ORIGINS, MIN_ORIGINS, EmpiricalIntervals, backtest_origins
+    from linear_regression import LinearRegressionForecaster
+    from xgboost_model import XGBoostForecaster
+    from xgboost_runtime import EWM_SPAN
+
+
+COMPONENTS = ('linear_regression', 'xgboost')
+
+# Days held out of the fit to score the models (CALIBRATION_HORIZON plus
+# enough origins for MIN_ORIGINS)
+HOLDOUT_DAYS = 28
+
+
+class EnsembleForecaster:
+    """
+    Linear Regression and XGBoost fitted on shared features, blended by holdout error
+    """
+
+    def __init__(self, holdout=HOLDOUT_DAYS, refit=False, **kwargs):
+        """
+        Args:
+            holdout: Days held out of the fit for scoring
+            refit: Refit both models on the full history after scoring, so
+                forecasts also learn from the latest days (opt-in: a second
+                XGBoost fit, about 45% more fit time)
+            **kwargs: XGBoost parameters
+        """
+        self.linear = LinearRegressionForecaster()
+        self.xgboost = XGBoostForecaster(**kwargs)
+        self.holdout = holdout
+        self.refit = refit
+        self.is_fitted = False
+        self.weights = None
+        self.holdout_mae = {}
+        self.intervals = None
+
+    def fit(self, historical_data, lookback=7, deadline=None, end_date=None):
+        """
+        Fit both models and score them on the holdout
+
+        Args:
+            historical_data: List of dicts with 'date' and 'quantity'
+            lookback: Number of past days to use as features
+            deadline: Optional Deadline (models/deadline.py)
+            end_date: Run date; days without sales up to it count as zero demand
+
+        Returns:
+            dict with per-model training metrics, weights and holdout MAEs
+        """
+        if len(historical_data) < lookback + 10:
+            raise ValueError(f"Insufficient data. Need at least {lookback + 10} days, got {len(historical_data)}")
+
+        df = history_frame(historical_data, end_date=end_date)
+        features_df = self.xgboost.create_features(df, lookback)
+        X = features_df.drop('target', axis=1)
+        y = features_df['target']
+        linear_columns = LinearRegressionForecaster.feature_columns(lookback)
+
+        quantities = df['quantity'].to_numpy(dtype=np.float64)
+        window = max(required_window(X.columns), lookback + 1)
+        split = len(quantities) - self.holdout - 1
+        origins = backtest_origins(len(quantities), window, CALIBRATION_HORIZON, CALIBRATION_ORIGINS, first=split)
+        # Short histories: fit on everything and blend equally
+        scored = len(origins) >= MIN_ORIGINS and len(X) - self.holdout >= 10
+        rows = len(X) - self.holdout if scored else len(X)
+
+        check_deadline(deadline, 'ensemble fit')
+        metrics = {
+            'linear_regression': self.linear.fit_features(X[linear_columns].iloc[:rows], y.iloc[:rows], lookback),
+            'xgboost': self.xgboost.fit_features(X.iloc[:rows], y.iloc[:rows], lookback, deadline=deadline),
+        }
+        self.is_fitted = True
+
+        if scored:
+            dates = df['date'].dt.strftime('%Y-%m-%d').to_numpy()
+            ewm = df['quantity'].ewm(span=EWM_SPAN, adjust=False).mean().to_numpy()
+            errors = self._score(quantities, dates, ewm, origins, window, deadline)
+        else:
+            self.weights = {name: 1.0 / len(COMPONENTS) for name in COMPONENTS}
+            self.holdout_mae, errors = {}, None
+
+        if scored and self.refit:
+            check_deadline(deadline, 'ensemble refit')
+            metrics['linear_regression'] = self.linear.fit_features(X[linear_columns], y, lookback)
+            metrics['xgboost'] = self.xgboost.fit_features(X, y, lookback, deadline=deadline)
+
+        # fit_features clears the models' intervals; use the holdout ones
+        intervals = {name: EmpiricalIntervals(e) for name, e in errors.items()} if errors else {}
+        self.linear.intervals = intervals.get('linear_regression')
+        self.xgboost.intervals = intervals.get('xgboost')
+        self.intervals = intervals.get('ensemble')
+
+        metrics.update({
+            'weights': self.weights,
+            'holdout_mae': self.holdout_mae,
+            'holdout_origins': len(origins) if scored else 0,
+            'refit': bool(scored and self.refit),
+        })
+        return metrics
+
+    def _score(self, quantities, dates, ewm, origins, window, deadline=None):
+        """
+        Backtest both models from the holdout origins, set the blend weights
+
+        Returns:
+            {name: errors (origins, CALIBRATION_HORIZON)} for both models and the blend
+        """
+        steps = np.arange(CALIBRATION_HORIZON)
+        histories = quantities[origins[:, np.newaxis] - window + 1 + np.arange(window)]
+        forecasts = self.rollout(histories, dates[origins], origins + 1, CALIBRATION_HORIZON, ewm[origins], deadline)
+        actuals = quantities[origins[:, np.newaxis] + 1 + steps]
+
+        errors = {name: actuals - forecast for name, forecast in forecasts.items()}
+        self.holdout_mae = {name: float(np.mean(np.abs(e))) for name, e in errors.items()}
+        inverse = {name: 1.0 / max(mae, 1e-9) for name, mae in self.holdout_mae.items()}
+        self.weights = {name: value / sum(inverse.values()) for name, value in inverse.items()}
+
+        errors['ensemble'] = actuals - self.blend(forecasts)
+        self.holdout_mae['ensemble'] = float(np.mean(np.abs(errors['ensemble'])))
+        return errors
+
+    def blend(self, forecasts):
+        """
+        Weighted sum of the component forecasts ({name: array})
+        """
+        return sum(self.weights[name] * forecasts[name] for name in COMPONENTS)
+
+    def rollout(self, histories, last_dates, trends=None, horizon=7, ewm=None, deadline=None):
+        """
+        Recursive forecasts of both models from one shared feature buffer
+
+        Same values as LinearArtifact.rollout and XGBoostRuntime.rollout run
+        separately. Rows 0..P-1 of the buffer follow the XGBoost path and rows
+        P..2P-1 the linear path; each step fills all rows in one call.
+
+        Args:
+            histories: Demand in date order, shape (products, >= window)
+            last_dates: Date of each product's last observation
+            trends: Observations per product (default: history width)
+            horizon: Number of days to forecast
+            ewm: EWM mean (span 7) of each full history (default: computed
+                from `histories`, which must then be the full histories)
+            deadline: Optional Deadline, checked between steps
+
+        Returns:
+            {'linear_regression': (products, horizon), 'xgboost': (products, horizon)}
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before prediction")
+
+        runtime = self.xgboost.runtime()
+        artifact = self.linear.export_artifact()
+        names = runtime.feature_names
+        linear_columns = [names.index(name) for name in artifact.feature_names]
+
+        histories = np.atleast_2d(np.asarray(histories, dtype=np.float64))
+        products, available = histories.shape
+        window = runtime.window
+        if available < window:
+            raise ValueError(f"Insufficient data. Need at least {window} days, got {available}")
+
+        trends = np.full(products, available, dtype=np.float64) if trends is None else np.asarray(trends, dtype=np.float64)
+        ewm = ewm_last(histories, EWM_SPAN) if ewm is None else np.asarray(ewm, dtype=np.float64)
+        last_ordinals = date_ordinals(np.atleast_1d(last_dates))
+
+        # The linear model reads the calendar of the latest known day, XGBoost
+        # that of the forecast day (as in their own rollouts)
+        ordinals = np.concatenate([last_ordinals + 1, last_ordinals])
+        trends = np.tile(trends, 2)
+        ewm = np.tile(ewm, 2)
+        alpha = 2.0 / (EWM_SPAN + 1)
+
+        buffer = np.empty((2 * products, window + horizon), dtype=float_dtype())
+        buffer[:, :window] = np.tile(histories[:, -window:], (2, 1))
+        rows = np.empty((2 * products, len(names)), dtype=float_dtype())
+
+        for step in range(horizon):
+            check_deadline(deadline, 'forecast')
+            end = window + step
+            fill_feature_rows(
+                rows,
+                names,
+                buffer[:, end - window:end],
+                trends + step,
+                calendar_fields(ordinals + step),
+                ewm,
+            )
+            buffer[:products, end] = np.maximum(runtime.predict_rows(rows[:products].astype(np.float32)), 0)
+            buffer[products:, end] = np.maximum(artifact.predict(rows[products:, linear_columns]), 0)
+            ewm += alpha * (buffer[:, end] - ewm)
+
+        return {
+            'linear_regression': buffer[products:, window:],
+            'xgboost': buffer[:products, window:],
+        }
+
+    def predict_components(self, historical_data, horizon=7, deadline=None, end_date=None):
+        """
+        Forecasts of both models and the blend (starting the day after
+        `end_date`, default: the last sale date)
+
+        Returns:
+            {'linear_regression', 'xgboost', 'ensemble'}: lists of prediction dicts
+        """
+        df = history_frame(historical_data, end_date=end_date)
+        quantities = df['quantity'].to_numpy(dtype=np.float64)
+        last_date = df['date'].iloc[-1]
+
+        forecasts = self.rollout(
+            quantities[np.newaxis, :],
+            [last_date.strftime('%Y-%m-%d')],
+            horizon=horizon,
+            deadline=deadline
+        )
+        forecasts = {name: forecast[0] for name, forecast in forecasts.items()}
+
+        # Holdout intervals when scored, otherwise each model's fixed ratios
+        return {
+            'linear_regression': prediction_records(forecasts['linear_regression'], last_date, 0.85, 1.15, self.linear.intervals),
+            'xgboost': prediction_records(forecasts['xgboost'], last_date, 0.80, 1.20, self.xgboost.intervals),
+            'ensemble': prediction_records(self.blend(forecasts), last_date, 0.80, 1.20, self.intervals),
+        }
+
+    def predict(self, historical_data, horizon=7, deadline=None, end_date=None):
+        """
+        Blended forecast for the next N days (list of prediction dicts)
+        """
+        return self.predict_components(historical_data, horizon, deadline, end_date)['ensemble']
+
+
+def forecast_ensemble(historical_data, horizon=7, lookback=7, deadline=None, end_date=None, **kwargs):
+    """
+    Convenience function to train and predict with the ensemble
+
+    Args:
+        historical_data: List of dicts with 'date' and 'quantity'
+        horizon: Number of days to forecast
+        lookback: Number of past days to use as features
+        deadline: Optional Deadline
+        end_date: Run date (default: last sale date)
+        **kwargs: EnsembleForecaster options and XGBoost parameters
+
+    Returns:
+        dict with blended predictions, per-model forecasts, weights and metrics
+    """
+    forecaster = EnsembleForecaster(**kwargs)
+    metrics = forecaster.fit(historical_data, lookback, deadline=deadline, end_date=end_date)
+    forecasts = forecaster.predict_components(historical_data, horizon, deadline=deadline, end_date=end_date)
+
+    return {
+        'predictions': forecasts.pop('ensemble'),
+        'components': forecasts,
+        'weights': forecaster.weights,
+        'metrics': metrics,
+        'model_type': 'ensemble'
+    }
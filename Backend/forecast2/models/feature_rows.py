@@ -0,0 +1,192 @@
+# Backend/forecast2/models/feature_rows.py
+"""
+NumPy Feature Rows
+Builds the forecasters' feature rows for many products at once
+
+Reproduces the last row of LinearRegressionForecaster.create_features /
+XGBoostForecaster.create_features from a (products, days) buffer of recent
+demand, so recursive forecasts can be rolled out without pandas, and the
+full training matrix of one history (feature_matrix) into a preallocated
+array of the working precision.
+"""
+
+import re
+import numpy as np
+
+try:
+    from .date_features import BASE_COLUMNS, EPOCH, date_ordinals, get_calendar_table
+except ImportError:
+    from date_features import BASE_COLUMNS, EPOCH, date_ordinals, get_calendar_table
+
+
+__all__ = [
+    'CALENDAR_FEATURES', 'EPOCH', 'calendar_columns', 'calendar_fields', 'date_ordinals',
+    'ewm_last', 'feature_matrix', 'fill_feature_rows', 'required_window',
+]
+
+CALENDAR_FEATURES = BASE_COLUMNS
+
+_ROLLING = re.compile(r'^rolling_(mean|std|min|max)_(\d+)$')
+_LAG = re.compile(r'^lag_(\d+)$')
+
+
+def calendar_columns():
+    """
+    Calendar columns currently available, including configured holiday flags
+    """
+    return list(get_calendar_table().columns)
+
+
+def calendar_fields(ordinals, columns=None):
+    """
+    Calendar features for epoch-day ordinals, gathered from the shared
+    lookup table (date_features.py)
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    return get_calendar_table(ordinals).lookup(ordinals, columns)
+
+
+def ewm_last(values, span=7):
+    """
+    Final value of pandas' ewm(span=span, adjust=False).mean() per row
+
+    Args:
+        values: Shape (products, days), oldest first
+
+    Returns:
+        Shape (products,)
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    alpha = 2.0 / (span + 1)
+    ewm = values[:, 0].copy()
+    for col in range(1, values.shape[1]):
+        ewm += alpha * (values[:, col] - ewm)
+    return ewm
+
+
+def _ewm_series(values, span=7):
+    """
+    pandas' ewm(span=span, adjust=False).mean() over one series
+    """
+    alpha = 2.0 / (span + 1)
+    out = np.empty(len(values))
+    ewm = None
+    for i, value in enumerate(np.asarray(values, dtype=np.float64).tolist()):
+        ewm = value if ewm is None else ewm + alpha * (value - ewm)
+        out[i] = ewm
+    return out
+
+
+def required_window(feature_names):
+    """
+    Number of trailing days needed to build a row with these features
+    """
+    width = 1
+    for name in feature_names:
+        lag = _LAG.match(name)
+        rolling = _ROLLING.match(name)
+        if lag:
+            width = max(width, int(lag.group(1)) + 1)
+        elif rolling:
+            width = max(width, int(rolling.group(2)))
+        elif name == 'lag_1_7_ratio':
+            width = max(width, 8)
+    return width
+
+
+def fill_feature_rows(out, feature_names, window, trend, calendar, ewm=None):
+    """
+    Write one feature row per product into `out`
+
+    Args:
+        out: Preallocated array, shape (products, len(feature_names))
+        feature_names: Column order the model was trained with
+        window: Recent demand, shape (products, >= required_window); the last
+            column is the "current" row
+        trend: Trend index per product, shape (products,)
+        calendar: Output of calendar_fields() for the row's date
+        ewm: EWM mean per product (needed for 'ewm_mean')
+
+    Returns:
+        out
+    """
+    for col, name in enumerate(feature_names):
+        if name == 'trend':
+            out[:, col] = trend
+        elif name in calendar:
+            out[:, col] = calendar[name]
+        elif name == 'ewm_mean':
+            out[:, col] = ewm
+        elif name == 'lag_1_7_ratio':
+            out[:, col] = window[:, -2] / (window[:, -8] + 1)
+        else:
+            lag = _LAG.match(name)
+            if lag:
+                out[:, col] = window[:, -1 - int(lag.group(1))]
+                continue
+
+            rolling = _ROLLING.match(name)
+            if not rolling:
+                raise ValueError(f"Unknown feature: {name}")
+
+            stat, size = rolling.group(1), int(rolling.group(2))
+            out[:, col] = _rolling(window[:, -size:], stat)
+    return out
+
+
+def feature_matrix(out, feature_names, quantity, ordinals):
+    """
+    Write one feature row per day of a product's history into `out`
+
+    Row t uses the days up to and including t, as in create_features; rows
+    before a full set of lags hold NaN lags. Each row's window is a view into
+    the history, so no intermediate float64 frame is built.
+
+    Args:
+        out: Preallocated array, shape (days, len(feature_names)), in the
+            working precision (models.config.float_dtype())
+        feature_names: Column order
+        quantity: Daily demand, oldest first
+        ordinals: Epoch-day ordinal of each day
+
+    Returns:
+        out
+    """
+    quantity = np.asarray(quantity)
+    width = required_window(feature_names)
+    padded = np.concatenate([np.full(width - 1, np.nan, dtype=out.dtype), quantity.astype(out.dtype, copy=False)])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, width)
+    available = set(calendar_columns())
+    calendar = calendar_fields(ordinals, [name for name in feature_names if name in available])
+    ewm = _ewm_series(quantity) if 'ewm_mean' in feature_names else None
+    return fill_feature_rows(out, feature_names, windows, np.arange(len(quantity)), calendar, ewm)
+
+
+def _rolling(values, stat):
+    """
+    Rolling statistic over the window, like pandas rolling(min_periods=1)
+
+    NaN entries (days before a product's first observation) are ignored;
+    std of a single value is 0, as after the forecasters' fillna(0).
+    """
+    if not np.isnan(values).any():
+        if stat == 'mean':
+            return values.mean(axis=1)
+        if stat == 'std':
+            return values.std(axis=1, ddof=1) if values.shape[1] > 1 else 0
+        if stat == 'min':
+            return values.min(axis=1)
+        return values.max(axis=1)
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    filled = np.where(valid, values, 0.0)
+    mean = filled.sum(axis=1) / np.maximum(count, 1)
+    if stat == 'mean':
+        return mean
+    if stat == 'std':
+        sq = np.where(valid, values - mean[:, np.newaxis], 0.0) ** 2
+        return np.where(count > 1, np.sqrt(sq.sum(axis=1) / np.maximum(count - 1, 1)), 0.0)
+    if stat == 'min':
+        return np.where(valid, values, np.inf).min(axis=1)
+    return np.where(valid, values, -np.inf).max(axis=1)
@@ -0,0 +1,350 @@
+# Backend/forecast2/models/feature_store.py
+"""
+Online Feature Store
+Persistent per-product feature state, updated one day at a time
+
+Instead of rebuilding every lag, rolling window and EWM feature from a
+product's full history on each run, the store keeps a small state per
+product (the trailing demand window, EWM, trend counter and last date) and
+folds each new day's quantity into it. Every fold appends one ready-made
+feature row, so day-over-day maintenance costs O(products) rather than
+O(products x history).
+
+Each product keeps at most `max_rows` feature rows (the training window:
+models.config max_days, else MAX_ROWS). States are saved as a small .npz
+plus a raw rows file that each save only appends the new rows to; the file
+is rewritten once it holds twice the window.
+
+Rows use the XGBoostForecaster feature set, which contains every
+LinearRegressionForecaster feature, so both models train from the same
+store and roll their forecasts out from the same state.
+"""
+
+import os
+import numpy as np
+
+try:
+    from .config import float_dtype, get_training_window
+    from .feature_rows import EPOCH, calendar_columns, calendar_fields, date_ordinals, fill_feature_rows, required_window
+    from .history import history_frame
+except ImportError:
+    from config import float_dtype, get_training_window
+    from feature_rows import EPOCH, calendar_columns, calendar_fields, date_ordinals, fill_feature_rows, required_window
+    from history import history_frame
+
+
+EWM_SPAN = 7
+ROLLING_WINDOWS = (3, 7, 14)
+
+# Rows kept per product when no training window is set (three years)
+MAX_ROWS = 1095
+
+
+def store_feature_names(lookback=7):
+    """
+    XGBoostForecaster.create_features column order for a given lookback
+    """
+    names = ['trend'] + [f'lag_{i}' for i in range(1, lookback + 1)]
+    for window in ROLLING_WINDOWS:
+        names += [f'rolling_{stat}_{window}' for stat in ('mean', 'std', 'min', 'max')]
+    names += ['ewm_mean'] + calendar_columns()
+    if lookback >= 7:
+        names.append('lag_1_7_ratio')
+    return names
+
+
+class ProductFeatureState:
+    """
+    Feature state and accumulated feature rows for one product
+    """
+
+    def __init__(self, lookback=7, feature_names=None, max_rows=MAX_ROWS):
+        self.lookback = lookback
+        self.max_rows = max_rows
+        self.feature_names = list(feature_names) if feature_names is not None else store_feature_names(lookback)
+        self.window = max(required_window(self.feature_names), lookback + 1)
+
+        self.tail = np.full(self.window, np.nan)  # last `window` days, newest last
+        self.count = 0                            # days folded in (trend index + 1)
+        self.last_ordinal = None                  # epoch day of the newest fold
+        self.ewm = np.nan
+
+        self.rows = np.empty((0, len(self.feature_names)), dtype=float_dtype())
+        self.targets = np.empty(0, dtype=float_dtype())
+        self.n_rows = 0
+
+        self.total_rows = 0     # rows ever appended
+        self._saved_rows = 0    # total_rows at the last save
+        self._file_rows = 0     # rows in the rows file
+        self._file_dtype = None
+
+    @property
+    def last_date(self):
+        return None if self.last_ordinal is None else str(EPOCH + int(self.last_ordinal))
+
+    def append(self, date, quantity):
+        """
+        Fold one day's demand into the state and append its feature row
+
+        Days skipped since the last fold are folded in first as zero demand,
+        matching the zero-filled calendar that create_features sees.
+        """
+        ordinal = int(date_ordinals([date])[0])
+        if self.last_ordinal is not None and ordinal <= self.last_ordinal:
+            raise ValueError(f"Day {date} is not after the last folded day {self.last_date}")
+
+        if self.last_ordinal is not None:
+            for missing in range(self.last_ordinal + 1, ordinal):
+                self._fold(missing, 0.0)
+        self._fold(ordinal, float(quantity))
+
+    def advance_through(self, date):
+        """
+        Fold zero demand for every day after the last fold up to and
+        including `date`, as history_frame does with end_date
+
+        Returns:
+            Number of days folded
+        """
+        if self.last_ordinal is None:
+            return 0
+        ordinal = int(date_ordinals([date])[0])
+        days = max(ordinal - self.last_ordinal, 0)
+        for missing in range(self.last_ordinal + 1, ordinal + 1):
+            self._fold(missing, 0.0)
+        return days
+
+    def _fold(self, ordinal, quantity):
+        self.tail[:-1] = self.tail[1:]
+        self.tail[-1] = quantity
+        self.ewm = quantity if self.count == 0 else self.ewm + (2.0 / (EWM_SPAN + 1)) * (quantity - self.ewm)
+        self.count += 1
+        self.last_ordinal = ordinal
+
+        # Rows without a full set of lags are dropped, as in create_features
+        if self.count <= self.lookback:
+            return
+
+        if self.n_rows == len(self.rows):
+            if self.n_rows >= 2 * self.max_rows:
+                # Drop rows outside the window (amortized over max_rows days)
+                keep = self.max_rows - 1
+                self.rows[:keep] = self.rows[self.n_rows - keep:self.n_rows]
+                self.targets[:keep] = self.targets[self.n_rows - keep:self.n_rows]
+                self.n_rows = keep
+            else:
+                capacity = min(max(64, 2 * len(self.rows)), 2 * self.max_rows)
+                self.rows = np.resize(self.rows, (capacity, self.rows.shape[1]))
+                self.targets = np.resize(self.targets, capacity)
+
+        fill_feature_rows(
+            self.rows[self.n_rows:self.n_rows + 1],
+            self.feature_names,
+            self.tail[np.newaxis, :],
+            self.count - 1,
+            calendar_fields([ordinal]),
+            self.ewm,
+        )
+        self.targets[self.n_rows] = quantity
+        self.n_rows += 1
+        self.total_rows += 1
+
+    def _window(self):
+        return slice(max(0, self.n_rows - self.max_rows), self.n_rows)
+
+    def training_data(self, feature_names=None):
+        """
+        Feature matrix and targets for the last `max_rows` days
+
+        Args:
+            feature_names: Subset/order of columns (default: all store columns)
+
+        Returns:
+            X (rows, features), y (rows,) as views where possible
+        """
+        window = self._window()
+        X = self.rows[window]
+        if feature_names is not None and list(feature_names) != self.feature_names:
+            X = X[:, [self.feature_names.index(name) for name in feature_names]]
+        return X, self.targets[window]
+
+    def save(self, path, rows_path):
+        """
+        Write the state to `path` (.npz) and append the rows added since the
+        last save to `rows_path` (rewritten once it outgrows the window)
+        """
+        dtype = self.rows.dtype
+        window = self._window()
+        new = self.total_rows - self._saved_rows
+        rewrite = (
+            new > window.stop - window.start
+            or self._file_rows + new > 2 * self.max_rows
+            or dtype.str != self._file_dtype
+        )
+        start = window.start if rewrite else self.n_rows - new
+        records = np.column_stack([self.rows[start:self.n_rows], self.targets[start:self.n_rows]]).astype(dtype)
+
+        with open(rows_path, 'ab') as f:
+            # Truncating first also drops rows written after the last
+            # completed save (e.g. a crash before the .npz was replaced)
+            f.truncate(0 if rewrite else self._file_rows * records.shape[1] * dtype.itemsize)
+            records.tofile(f)
+        self._file_rows = len(records) if rewrite else self._file_rows + len(records)
+        self._file_dtype = dtype.str
+        self._saved_rows = self.total_rows
+
+        np.savez(
+            path,
+            lookback=np.array(self.lookback),
+            feature_names=np.array(self.feature_names),
+            tail=self.tail,
+            count=np.array(self.count),
+            last_ordinal=np.array(-1 if self.last_ordinal is None else self.last_ordinal),
+            ewm=np.array(self.ewm),
+            total_rows=np.array(self.total_rows),
+            file_rows=np.array(self._file_rows),
+            rows_dtype=np.array(dtype.str),
+        )
+
+    @classmethod
+    def load(cls, path, rows_path, max_rows=MAX_ROWS):
+        with np.load(path, allow_pickle=False) as data:
+            state = cls(int(data['lookback']), data['feature_names'].tolist(), max_rows)
+            state.tail = data['tail'].copy()
+            state.count = int(data['count'])
+            state.last_ordinal = None if int(data['last_ordinal']) < 0 else int(data['last_ordinal'])
+            state.ewm = float(data['ewm'])
+            if 'rows' in data.files:
+                # Older states kept every row in the .npz; the next save moves them
+                records = np.column_stack([data['rows'], data['targets']])
+                state.total_rows = len(records)
+            else:
+                # Read only the rows inside the window
+                dtype = np.dtype(str(data['rows_dtype']))
+                width = len(state.feature_names) + 1
+                file_rows = int(data['file_rows'])
+                skip = max(0, file_rows - max_rows)
+                records = np.fromfile(
+                    rows_path, dtype=dtype, count=(file_rows - skip) * width, offset=skip * width * dtype.itemsize
+                ).reshape(-1, width)
+                state.total_rows = state._saved_rows = int(data['total_rows'])
+                state._file_rows = file_rows
+                state._file_dtype = dtype.str
+
+        records = records[-max_rows:]
+        state.rows = np.ascontiguousarray(records[:, :-1], dtype=float_dtype())
+        state.targets = np.ascontiguousarray(records[:, -1], dtype=float_dtype())
+        state.n_rows = len(records)
+        return state
+
+
+class FeatureStore:
+    """
+    Per-product feature states, persisted as one .npz file per product
+    """
+
+    def __init__(self, directory=None, lookback=7, max_rows=None):
+        """
+        Args:
+            directory: Where states are saved/loaded (None keeps them in memory)
+            lookback: Lag count for every product in this store
+            max_rows: Feature rows kept per product (default: the training
+                window's max_days, or MAX_ROWS when that is 0)
+        """
+        self.directory = directory
+        self.lookback = lookback
+        self.max_rows = max_rows or get_training_window()['max_days'] or MAX_ROWS
+        self.feature_names = store_feature_names(lookback)
+        self.closed_through = None  # last day folded for every product
+        self._states = {}
+        self._dirty = set()
+
+    def _path(self, product_id):
+        return os.path.join(self.directory, f"{product_id}.npz")
+
+    def _rows_path(self, product_id):
+        return os.path.join(self.directory, f"{product_id}.rows")
+
+    def __contains__(self, product_id):
+        return product_id in self._states or (
+            self.directory is not None and os.path.exists(self._path(product_id))
+        )
+
+    def state(self, product_id):
+        """
+        Get a product's state, loading it from disk on first access
+
+        A state loaded after days were appended is first advanced through
+        them as zero demand.
+        """
+        if product_id not in self._states:
+            if self.directory is not None and os.path.exists(self._path(product_id)):
+                state = self._states[product_id] = ProductFeatureState.load(
+                    self._path(product_id), self._rows_path(product_id), self.max_rows
+                )
+                if self.closed_through is not None and state.advance_through(self.closed_through):
+                    self._dirty.add(product_id)
+            else:
+                self._states[product_id] = ProductFeatureState(self.lookback, max_rows=self.max_rows)
+        return self._states[product_id]
+
+    def bootstrap(self, product_id, historical_data, end_date=None):
+        """
+        Rebuild a product's state from its full history (one-time cost),
+        zero-filled through the run date `end_date` if given
+        """
+        df = history_frame(historical_data, end_date=end_date)
+        state = ProductFeatureState(self.lookback, max_rows=self.max_rows)
+        for date, quantity in zip(df['date'].values, df['quantity'].values):
+            state.append(date, quantity)
+        self._states[product_id] = state
+        self._dirty.add(product_id)
+        return state
+
+    def append_day(self, date, quantities):
+        """
+        Fold one day's demand into every listed product; every other
+        product gets the day as zero demand (see advance_through)
+
+        Args:
+            date: The day being added
+            quantities: {product_id: quantity}
+        """
+        for product_id, quantity in quantities.items():
+            self.state(product_id).append(date, quantity)
+            self._dirty.add(product_id)
+        self.advance_through(date)
+
+    def advance_through(self, date, product_ids=None):
+        """
+        Close every day up to and including `date` as zero demand where no
+        sales were appended, so products without sales do not keep a stale
+        origin and stale lags
+
+        Loaded states are advanced now; states still on disk are advanced
+        when first loaded. Sales for a closed day can no longer be appended.
+
+        Args:
+            date: Run date (inclusive)
+            product_ids: Products to advance (default: every loaded state)
+        """
+        date = str(EPOCH + int(date_ordinals([date])[0]))
+        if self.closed_through is None or date > self.closed_through:
+            self.closed_through = date
+        for product_id in (list(self._states) if product_ids is None else product_ids):
+            if self.state(product_id).advance_through(date):
+                self._dirty.add(product_id)
+
+    def training_data(self, product_id, feature_names=None):
+        return self.state(product_id).training_data(feature_names)
+
+    def save(self):
+        """
+        Persist states changed since the last save
+        """
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for product_id in self._dirty:
+            self._states[product_id].save(self._path(product_id), self._rows_path(product_id))
+        self._dirty.clear()
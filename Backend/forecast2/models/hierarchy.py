@@ -0,0 +1,360 @@
+# Backend/forecast2/models/hierarchy.py
+"""
+Hierarchical Forecasting
+XGBoost at category/store level, disaggregated to SKUs
+
+Slow movers are noisy on their own and a model per SKU is expensive, so
+daily demand is summed to aggregate nodes (total, category, store) with
+one sparse multiply, XGBoostForecaster is fitted only on those aggregate
+series, and each SKU gets a share of its parent's forecast:
+
+- historical: the SKU's share of its parent's demand over the last
+  `proportion_window` days;
+- forecast:   the SKU's share of its siblings' vectorized baseline
+  forecasts (baselines.py), day by day.
+
+Optionally the forecasts of all levels are reconciled so they add up.
+With aggregation matrix A (aggregate nodes x SKUs) and base forecasts
+y_a (aggregates) and y_b (SKUs), the coherent SKU forecast is
+
+    b = y_b + W_b A' (W_a + A W_b A')^-1 (y_a - A y_b)
+
+which needs one dense solve of size (aggregate nodes), not (SKUs). W is
+the identity for OLS; for MinT it is a diagonal estimate of each node's
+forecast error variance (a full shrinkage covariance is not estimated).
+
+Category nodes use the category's tuned XGBoost parameters when tuning
+results are configured (tuning.py tuned_configs).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try:
+    from .baselines import baseline_forecast
+    from .deadline import check_deadline
+    from .tuning import tuned_configs
+    from .xgboost_model import XGBoostForecaster
+except ImportError:
+    from baselines import baseline_forecast
+    from deadline import check_deadline
+    from tuning import tuned_configs
+    from xgboost_model import XGBoostForecaster
+
+
+TOTAL = 'total'
+PROPORTIONS = ('historical', 'forecast')
+RECONCILIATION = ('none', 'ols', 'mint')
+
+# Days used for historical shares and disaggregation error variances
+PROPORTION_WINDOW = 28
+
+# Interval bounds when an aggregate model has no calibrated intervals (as XGBoost)
+RATIO_BOUNDS = (0.80, 1.20)
+
+
+def demand_matrix(product_ids, sale_product_ids, dates, quantities, end_date=None):
+    """
+    Zero-filled (products x days) demand from sale rows
+
+    Args:
+        product_ids: Row order of the matrix
+        sale_product_ids, dates, quantities: One entry per sale row
+        end_date: Last calendar day (default: last sale date)
+
+    Returns:
+        (values, start_date): float64 matrix and its first date (datetime64[D])
+    """
+    rows = pd.Index(list(product_ids)).get_indexer(list(sale_product_ids))
+    days = pd.to_datetime(pd.Series(list(dates), dtype=object)).to_numpy().astype('datetime64[D]')
+    quantities = np.asarray(quantities, dtype=np.float64)
+
+    known = rows >= 0
+    if not known.any():
+        raise ValueError("No sales for the listed products")
+    rows, days, quantities = rows[known], days[known], quantities[known]
+
+    start = days.min()
+    end = np.datetime64(end_date, 'D') if end_date else days.max()
+    values = np.zeros((len(product_ids), int((end - start).astype(np.int64)) + 1))
+    in_range = days <= end
+    np.add.at(values, (rows[in_range], (days[in_range] - start).astype(np.int64)), quantities[in_range])
+    return values, start
+
+
+class Hierarchy:
+    """
+    Aggregate nodes of a catalogue and the sparse matrix that sums SKUs into them
+    """
+
+    def __init__(self, product_ids, levels, total=True):
+        """
+        Args:
+            product_ids: SKU ids, in the row order of the demand matrix
+            levels: {level name: group label per product}, e.g.
+                {'category': [...], 'store': [...]}
+            total: Add a single node summing every product
+        """
+        self.product_ids = list(product_ids)
+        n = len(self.product_ids)
+        if total:
+            levels = {TOTAL: np.zeros(n, dtype=np.int64), **levels}
+
+        self.nodes = []       # (level, key) per aggregate row
+        self.slices = {}      # level -> rows of its nodes
+        self.codes = {}       # level -> node index (within the level) per product
+        rows = []
+        for level, labels in levels.items():
+            labels = np.asarray(labels)
+            if len(labels) != n:
+                raise ValueError(f"Level '{level}' needs one label per product")
+            keys, codes = np.unique(labels, return_inverse=True)
+            start = len(self.nodes)
+            self.nodes.extend((level, 'all' if level == TOTAL else key.item()) for key in keys)
+            self.slices[level] = slice(start, len(self.nodes))
+            self.codes[level] = codes
+            rows.append(start + codes)
+
+        rows = np.concatenate(rows)
+        columns = np.tile(np.arange(n), len(levels))
+        self.aggregation = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(self.nodes), n)
+        )
+
+    @property
+    def levels(self):
+        return list(self.slices)
+
+    def aggregate(self, values):
+        """
+        Sum (products x days) demand into (aggregate nodes x days), one sparse multiply
+        """
+        return np.asarray(self.aggregation @ values)
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def historical_proportions(values, codes, window=PROPORTION_WINDOW):
+    """
+    Each product's share of its group's demand over the last `window` days
+
+    Groups without demand in the window split evenly between their products.
+    """
+    recent = values[:, -window:].sum(axis=1)
+    group_totals = np.bincount(codes, weights=recent)
+    group_sizes = np.bincount(codes)
+    parent = group_totals[codes]
+    return np.where(parent > 0, recent / np.where(parent > 0, parent, 1.0), 1.0 / group_sizes[codes])
+
+
+def forecast_proportions(forecasts, codes, fallback):
+    """
+    Each product's share of its group's forecast, per day
+
+    Args:
+        forecasts: (products, horizon) non-negative product-level forecasts
+        codes: Group index per product
+        fallback: Shares used for days whose group forecast is zero
+
+    Returns:
+        (products, horizon) shares
+    """
+    groups = codes.max() + 1
+    group_totals = np.zeros((groups, forecasts.shape[1]))
+    np.add.at(group_totals, codes, forecasts)
+    parent = group_totals[codes]
+    return np.where(parent > 0, forecasts / np.where(parent > 0, parent, 1.0), fallback[:, np.newaxis])
+
+
+def reconcile(aggregate_forecast, product_forecast, aggregation, aggregate_var=None, product_var=None):
+    """
+    Coherent product forecasts from base forecasts at every level
+
+    Args:
+        aggregate_forecast: (nodes, horizon) base forecasts of the aggregates
+        product_forecast: (products, horizon) base forecasts of the products
+        aggregation: Sparse (nodes, products) summing matrix
+        aggregate_var, product_var: Error variances for MinT (None: OLS)
+
+    Returns:
+        (products, horizon) reconciled forecasts, clipped at zero
+    """
+    n_nodes, n_products = aggregation.shape
+    w_a = np.ones(n_nodes) if aggregate_var is None else np.asarray(aggregate_var, dtype=np.float64)
+    w_b = np.ones(n_products) if product_var is None else np.asarray(product_var, dtype=np.float64)
+
+    weighted = aggregation.multiply(w_b[np.newaxis, :]).tocsr()        # A W_b
+    system = (weighted @ aggregation.T).toarray() + np.diag(w_a)       # W_a + A W_b A'
+    gap = aggregate_forecast - aggregation @ product_forecast           # y_a - A y_b
+    adjustment = weighted.T @ np.linalg.solve(system, gap)
+    return np.maximum(product_forecast + np.asarray(adjustment), 0.0)
+
+
+class HierarchicalForecaster:
+    """
+    XGBoost fits at aggregate nodes only, shared out to products
+    """
+
+    def __init__(self, disaggregate_level=None, proportions='historical', reconciliation='none',
+                 proportion_window=PROPORTION_WINDOW, baseline_method='holt_winters', lookback=None,
+                 tuned=None, **kwargs):
+        """
+        Args:
+            disaggregate_level: Level whose forecasts are shared out to its
+                products (default: the level with the most nodes)
+            proportions: 'historical' or 'forecast' (see module docstring)
+            reconciliation: 'none', 'ols' or 'mint'; anything but 'none' also
+                fits every other aggregate level
+            proportion_window: Days for historical shares and variances
+            baseline_method: Product-level baseline for forecast proportions
+            lookback: XGBoost lag count (default: tuned, else 7)
+            tuned: TunedConfigs for category nodes (default: the
+                FORECAST_TUNED_CONFIGS file, see tuning.tuned_configs)
+            **kwargs: XGBoost parameters (take precedence over tuned ones)
+        """
+        if proportions not in PROPORTIONS:
+            raise ValueError(f"Unknown proportions: {proportions}. Use one of {PROPORTIONS}")
+        if reconciliation not in RECONCILIATION:
+            raise ValueError(f"Unknown reconciliation: {reconciliation}. Use one of {RECONCILIATION}")
+        self.disaggregate_level = disaggregate_level
+        self.proportions = proportions
+        self.reconciliation = reconciliation
+        self.proportion_window = proportion_window
+        self.baseline_method = baseline_method
+        self.lookback = lookback
+        self.tuned = tuned
+        self.params = kwargs
+
+    def _fit_node(self, series, dates, horizon, deadline=None, node=None):
+        """
+        Fit XGBoost on one aggregate series and forecast it
+
+        Args:
+            node: (level, key) of the series, for tuned category parameters
+
+        Returns:
+            (forecast, lower offsets, upper offsets, error variance, model name)
+        """
+        check_deadline(deadline, 'hierarchical fit')
+        frame = pd.DataFrame({'date': dates, 'quantity': series})
+        category = node[1] if node is not None and node[0] == 'category' else None
+        params, lookback = (self.tuned or tuned_configs()).params(category=category)
+        try:
+            model = XGBoostForecaster(**{**params, **self.params})
+            model.fit(frame, self.lookback or lookback or 7, deadline=deadline)
+        except ValueError:
+            # Too short for XGBoost: vectorized baseline instead
+            forecast = np.maximum(baseline_forecast(series, self.baseline_method, horizon)[0], 0.0)
+            low, high = RATIO_BOUNDS
+            variance = float(np.var(series[-self.proportion_window:])) or 1.0
+            return forecast, forecast * (low - 1), forecast * (high - 1), variance, self.baseline_method
+
+        forecast = model.runtime().rollout(
+            series[np.newaxis, :], [dates[-1]], horizon=horizon, deadline=deadline
+        )[0].astype(np.float64)
+        if model.intervals is not None:
+            lower, upper = model.intervals.offsets(horizon)
+            variance = float(np.mean(model.intervals.errors[:, 0].astype(np.float64) ** 2))
+        else:
+            low, high = RATIO_BOUNDS
+            lower, upper = forecast * (low - 1), forecast * (high - 1)
+            variance = float(np.var(series[-self.proportion_window:]))
+        return forecast, lower, upper, max(variance, 1e-6), 'xgboost'
+
+    def forecast(self, values, start_date, hierarchy, horizon=14, deadline=None):
+        """
+        Forecast every product through the hierarchy
+
+        Args:
+            values: (products, days) zero-filled daily demand (rows in
+                hierarchy.product_ids order), e.g. DemandMatrix.rows()
+            start_date: Date of the first column
+            hierarchy: Hierarchy over the same products
+            horizon: Number of days to forecast
+            deadline: Optional Deadline, checked before each fit and during
+                fits and rollouts (raises DeadlineExceeded; see fallback())
+
+        Returns:
+            dict with 'forecast', 'lower', 'upper' (products x horizon),
+            'aggregates' ({(level, key): forecast} for fitted nodes; the sums
+            of the product forecasts when reconciled) and 'fits'
+        """
+        values = np.asarray(values, dtype=np.float64)
+        levels = hierarchy.levels
+        level = self.disaggregate_level or max(levels, key=lambda name: hierarchy.slices[name].stop - hierarchy.slices[name].start)
+        if level not in hierarchy.slices:
+            raise ValueError(f"Unknown level: {level}. Use one of {levels}")
+
+        aggregates = hierarchy.aggregate(values)
+        dates = pd.date_range(pd.Timestamp(start_date), periods=values.shape[1], freq='D').strftime('%Y-%m-%d').to_numpy()
+
+        # Only the shared-out level needs models unless levels are reconciled
+        fitted = levels if self.reconciliation != 'none' else [level]
+        n_nodes = len(hierarchy)
+        base = np.zeros((n_nodes, horizon))
+        lower, upper = np.zeros((n_nodes, horizon)), np.zeros((n_nodes, horizon))
+        variance = np.ones(n_nodes)
+        models = {}
+        for name in fitted:
+            for node in range(hierarchy.slices[name].start, hierarchy.slices[name].stop):
+                base[node], lower[node], upper[node], variance[node], models[hierarchy.nodes[node]] = \
+                    self._fit_node(aggregates[node], dates, horizon, deadline, hierarchy.nodes[node])
+
+        # Shares of the disaggregation level's forecasts
+        codes = hierarchy.codes[level]
+        parent_rows = hierarchy.slices[level].start + codes
+        shares = historical_proportions(values, codes, self.proportion_window)
+        if self.proportions == 'forecast':
+            baseline = np.maximum(baseline_forecast(values, self.baseline_method, horizon), 0.0)
+            shares = forecast_proportions(baseline, codes, shares)
+        else:
+            shares = np.repeat(shares[:, np.newaxis], horizon, axis=1)
+        forecast = shares * base[parent_rows]
+
+        # Disaggregation error of each product over the recent window
+        recent = values[:, -self.proportion_window:]
+        residual = recent - shares[:, :1] * aggregates[parent_rows, -self.proportion_window:]
+        product_var = np.maximum(np.mean(residual ** 2, axis=1), 1e-6)
+
+        if self.reconciliation != 'none':
+            weights = (variance, product_var) if self.reconciliation == 'mint' else (None, None)
+            forecast = reconcile(base, forecast, hierarchy.aggregation, *weights)
+            # Report the coherent aggregates rather than the base fits
+            base = hierarchy.aggregate(forecast)
+
+        # Interval: the parent's interval scaled by the share, combined with
+        # the product's own disaggregation error
+        spread = 1.96 * np.sqrt(product_var)[:, np.newaxis]
+        lower = -np.hypot(shares * lower[parent_rows], spread)
+        upper = np.hypot(shares * upper[parent_rows], spread)
+
+        return {
+            'forecast': forecast,
+            'lower': np.maximum(forecast + lower, 0.0),
+            'upper': np.maximum(forecast + upper, forecast),
+            'aggregates': {hierarchy.nodes[node]: base[node] for node in range(n_nodes) if hierarchy.nodes[node] in models},
+            'models': models,
+            'fits': sum(model == 'xgboost' for model in models.values()),
+            'level': level,
+        }
+
+    def fallback(self, values, horizon=14):
+        """
+        Per-product baseline forecasts, for when the aggregate fits cannot
+        finish before the deadline (same keys as forecast(), no aggregates)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        method = self.baseline_method if values.shape[1] >= 14 else 'moving_average'
+        forecast = np.maximum(baseline_forecast(values, method, horizon), 0.0)
+        low, high = RATIO_BOUNDS
+        return {
+            'forecast': forecast,
+            'lower': forecast * low,
+            'upper': forecast * high,
+            'aggregates': {},
+            'models': {},
+            'fits': 0,
+            'level': 'product',
+        }
@@ -0,0 +1,119 @@
+# Backend/forecast2/models/history.py
+"""
+History Parsing
+Shared parsing of a product's daily demand history
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .config import float_dtype
+except ImportError:
+    from config import float_dtype
+
+
+def history_frame(historical_data, fill_gaps=True, end_date=None):
+    """
+    Parse a product's history into a clean DataFrame sorted by date
+    
+    Sales exports list only days with sales, so by default the history is
+    densified onto a daily calendar from its first date through the run
+    date (`end_date`, default: the last sale date): missing days become zero
+    demand and same-day rows are summed. Lag and rolling features then refer
+    to calendar days rather than previous sales, and a product that stopped
+    selling ends in a run of zeros.
+    
+    Args:
+        historical_data: List of dicts with 'date' and 'quantity', a DataFrame
+            with those columns, or a row view with to_history_frame() (e.g.
+            data/demand_matrix.py DemandRow)
+        fill_gaps: Zero-fill days without sales (default True)
+        end_date: Run date; days after the last sale up to it are zero
+            demand (ignored if it precedes the last sale)
+            
+    Returns:
+        DataFrame with 'date' (datetime64) and numeric 'quantity' columns
+    """
+    to_history_frame = getattr(historical_data, 'to_history_frame', None)
+    if to_history_frame is not None:
+        return to_history_frame(end_date)
+    
+    df = pd.DataFrame(historical_data)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values('date')
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+    df = df.dropna()
+    
+    if not fill_gaps or df.empty:
+        return df
+    
+    daily = df.groupby(df['date'].dt.normalize())['quantity'].sum()
+    last = daily.index[-1] if end_date is None else max(daily.index[-1], pd.Timestamp(end_date).normalize())
+    calendar = pd.date_range(daily.index[0], last, freq='D')
+    return pd.DataFrame({
+        'date': calendar,
+        'quantity': daily.reindex(calendar, fill_value=0.0).to_numpy(dtype=float_dtype())
+    })
+
+
+def history_records(df):
+    """
+    A history frame as a list of {'date', 'quantity'} dicts
+    """
+    return [
+        {'date': d, 'quantity': float(q)}
+        for d, q in zip(df['date'].dt.strftime('%Y-%m-%d'), df['quantity'])
+    ]
+
+
+def zero_share(historical_data, end_date=None):
+    """
+    Fraction of calendar days without demand in a product's history,
+    counted through the run date
+    """
+    if len(historical_data) == 0:
+        return 1.0
+    df = history_frame(historical_data, end_date=end_date)
+    if df.empty:
+        return 1.0
+    return float((df['quantity'].to_numpy() <= 0).mean())
+
+
+def prediction_records(forecast, last_date, lower_ratio, upper_ratio, intervals=None, bounds=None):
+    """
+    Format a forecast vector as the prediction dicts returned by predict()
+    
+    Args:
+        forecast: Predicted quantities for days 1..horizon
+        last_date: Date of the last observation
+        lower_ratio, upper_ratio: Interval bounds as multiples of the prediction
+        intervals: Optional EmpiricalIntervals (intervals.py) from the fit;
+            used instead of the ratios when available
+        bounds: Optional (lower, upper) arrays used as they are
+        
+    Returns:
+        List of prediction dicts
+    """
+    last_date = pd.Timestamp(last_date)
+    forecast = np.asarray(forecast, dtype=np.float64)
+    if bounds is not None:
+        lowers, uppers = bounds
+    elif intervals is not None:
+        lowers, uppers = intervals.bounds(forecast)
+    else:
+        lowers, uppers = np.maximum(forecast * lower_ratio, 0), forecast * upper_ratio
+    
+    predictions = []
+    for day, (pred, lower, upper) in enumerate(zip(forecast, lowers, uppers), start=1):
+        predictions.append({
+            'period': day,
+            'date': (last_date + pd.Timedelta(days=day)).strftime('%Y-%m-%d'),
+            'predicted': float(pred),
+            'lower95': float(lower),
+            'upper95': float(upper),
+            'yhat': float(pred),
+            'yhat_lower': float(lower),
+            'yhat_upper': float(upper)
+        })
+    return predictions
@@ -0,0 +1,165 @@
+# Backend/forecast2/models/intermittent.py
+"""
+Intermittent Demand Forecasting
+Croston, SBA and TSB smoothing for products that sell on few days
+
+Each method runs one pass over the zero-filled daily calendar (O(days)) and
+produces a flat per-day demand rate, so a slow-moving product is forecast
+without building features or fitting a regressor. The recursion is
+vectorized across products, so a whole (products x days) demand matrix is
+smoothed in one pass as well.
+
+- croston: smooths demand size and inter-demand interval, forecast size / interval
+- sba:     Croston with the Syntetos-Boylan bias correction (1 - alpha / 2)
+- tsb:     smooths demand size and demand probability (updated every day,
+           so the forecast decays when a product stops selling)
+"""
+
+import numpy as np
+
+try:
+    from .history import history_frame, prediction_records
+except ImportError:
+    from history import history_frame, prediction_records
+
+
+METHODS = ('croston', 'sba', 'tsb')
+
+
+def intermittent_rates(demand, method='tsb', alpha=0.1, beta=0.1):
+    """
+    Smooth daily demand into a per-day demand rate
+
+    Args:
+        demand: Daily demand, shape (days,) or (products, days), zero-filled
+        method: 'croston', 'sba' or 'tsb'
+        alpha: Smoothing for demand size (and interval for croston/sba)
+        beta: Smoothing for demand probability (tsb)
+
+    Returns:
+        (rate, fitted): rate is the forecast per day, shape (products,);
+        fitted holds the one-step-ahead forecasts, shape (products, days)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}. Use one of {METHODS}")
+
+    demand = np.atleast_2d(np.asarray(demand, dtype=np.float64))
+    products, days = demand.shape
+    occurs = demand > 0
+    n_demands = occurs.sum(axis=1)
+    has_demand = n_demands > 0
+
+    # Initialize from the whole series: mean demand size, mean interval / rate
+    size = np.where(has_demand, demand.sum(axis=1) / np.maximum(n_demands, 1), 0.0)
+    interval = np.where(has_demand, days / np.maximum(n_demands, 1), 1.0)
+    probability = n_demands / max(days, 1)
+    since_last = np.ones(products)
+
+    correction = 1 - alpha / 2 if method == 'sba' else 1.0
+    fitted = np.empty((products, days))
+
+    for t in range(days):
+        if method == 'tsb':
+            fitted[:, t] = probability * size
+            probability += beta * (occurs[:, t] - probability)
+        else:
+            fitted[:, t] = correction * size / interval
+            interval = np.where(occurs[:, t], interval + alpha * (since_last - interval), interval)
+            since_last = np.where(occurs[:, t], 1.0, since_last + 1)
+        size = np.where(occurs[:, t], size + alpha * (demand[:, t] - size), size)
+
+    if method == 'tsb':
+        rate = probability * size
+    else:
+        rate = correction * size / interval
+    return np.where(has_demand, rate, 0.0), fitted
+
+
+class IntermittentForecaster:
+    """
+    Croston/TSB model for intermittent demand
+    """
+
+    def __init__(self, method='tsb', alpha=0.1, beta=0.1):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method}. Use one of {METHODS}")
+        self.method = method
+        self.alpha = alpha
+        self.beta = beta
+        self.is_fitted = False
+
+    def fit(self, historical_data, end_date=None):
+        """
+        Smooth the history and record in-sample one-step-ahead error
+
+        Args:
+            historical_data: List of dicts with 'date' and 'quantity'
+            end_date: Run date; days without sales up to it are zeros, so
+                TSB decays for a product that stopped selling
+
+        Returns:
+            dict with training metrics
+        """
+        if len(historical_data) == 0:
+            raise ValueError("Insufficient data. Need at least 1 day of history")
+        df = history_frame(historical_data, end_date=end_date)
+
+        demand = df['quantity'].to_numpy(dtype=np.float64)
+        rate, fitted = intermittent_rates(demand, self.method, self.alpha, self.beta)
+        self.rate = float(rate[0])
+        self.is_fitted = True
+
+        errors = demand - fitted[0]
+        return {
+            'mae': float(np.mean(np.abs(errors))),
+            'rmse': float(np.sqrt(np.mean(errors ** 2))),
+            'zero_share': float(np.mean(demand <= 0)),
+            'demand_rate': self.rate,
+            'training_samples': len(demand)
+        }
+
+    def predict(self, historical_data, horizon=7, end_date=None):
+        """
+        Generate a flat per-day forecast for the next N days
+
+        Args:
+            historical_data: List of dicts with 'date' and 'quantity'
+            horizon: Number of days to forecast
+            end_date: Run date; the forecast starts the day after it
+
+        Returns:
+            List of predictions with confidence intervals
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before prediction")
+
+        df = history_frame(historical_data, end_date=end_date)
+        last_date = df['date'].iloc[-1]
+
+        # Daily demand is lumpy, so use a wider band (±50%)
+        return prediction_records(np.full(horizon, self.rate), last_date, 0.50, 1.50)
+
+
+def forecast_intermittent(historical_data, horizon=7, method='tsb', end_date=None):
+    """
+    Convenience function to train and predict in one call
+
+    Args:
+        historical_data: List of dicts with 'date' and 'quantity'
+        horizon: Number of days to forecast
+        method: 'croston', 'sba' or 'tsb'
+        end_date: Run date (default: last sale date)
+
+    Returns:
+        dict with predictions and metrics
+    """
+    forecaster = IntermittentForecaster(method=method)
+
+    metrics = forecaster.fit(historical_data, end_date)
+    predictions = forecaster.predict(historical_data, horizon, end_date)
+
+    return {
+        'predictions': predictions,
+        'metrics': metrics,
+        'model_type': method
+    }
@@ -0,0 +1,132 @@
+# Backend/forecast2/models/intervals.py
+"""
+Empirical Prediction Intervals
+Per-horizon error quantiles from rolling-origin backtests at fit time
+
+After a fit, the model's own recursive rollout is run from a few dozen
+origins near the end of the history (one batched call, no extra fits) and
+the errors against the following days are kept as a small float32 matrix
+(origins x horizon). At predict time the interval for day h is the
+forecast plus the split-conformal quantiles of the day-h errors; days past
+the calibrated horizon widen with sqrt(h).
+
+A two-sided split-conformal interval at level 1 - a needs the
+ceil((n + 1)(1 - a/2))-th smallest of n errors, which exists only for
+n >= 39 at 95%. With fewer errors (short histories, the ensemble holdout)
+the band is parametric instead: mean +/- a Student-t prediction quantile of
+the errors' spread, exact for normal errors.
+"""
+
+import math
+
+import numpy as np
+from scipy import stats
+
+
+CALIBRATION_HORIZON = 14
+
+# Enough origins for a two-sided 95% conformal interval (n >= 39)
+CALIBRATION_ORIGINS = 40
+
+# Fewer backtest origins than this gives no calibration (ratio intervals are used)
+MIN_ORIGINS = 10
+
+
+def backtest_origins(length, window, horizon=CALIBRATION_HORIZON, origins=CALIBRATION_ORIGINS, first=None):
+    """
+    Indices of the last observed day for each backtest origin
+
+    Args:
+        length: Days of history
+        window: Days a rollout needs before its origin
+        horizon: Days forecast from each origin (all must be observed)
+        origins: Most recent origins to use
+        first: Earliest allowed origin (e.g. start of a validation split)
+
+    Returns:
+        Ascending int array (empty if the history is too short)
+    """
+    last = length - horizon - 1
+    start = max(window - 1, last - origins + 1, first if first is not None else 0)
+    return np.arange(start, last + 1) if last >= start else np.empty(0, dtype=np.intp)
+
+
+def calibrate(quantities, window, rollout, horizon=CALIBRATION_HORIZON, origins=CALIBRATION_ORIGINS, first=None):
+    """
+    Backtest a fitted model and collect its forecast errors
+
+    Args:
+        quantities: Daily demand the model was fitted on
+        window: Trailing days the rollout needs at each origin
+        rollout: Callable(origin_indices, horizon) -> forecasts, shape
+            (origins, horizon); one batched call over all origins
+        horizon, origins, first: See backtest_origins
+
+    Returns:
+        EmpiricalIntervals, or None if the history is too short
+    """
+    quantities = np.asarray(quantities, dtype=np.float64)
+    idx = backtest_origins(len(quantities), window, horizon, origins, first)
+    if len(idx) < MIN_ORIGINS:
+        return None
+
+    forecasts = np.asarray(rollout(idx, horizon), dtype=np.float64)
+    actuals = quantities[idx[:, np.newaxis] + 1 + np.arange(horizon)]
+    return EmpiricalIntervals(actuals - forecasts)
+
+
+class EmpiricalIntervals:
+    """
+    Backtest errors (actual - forecast) per horizon day
+    """
+
+    def __init__(self, errors):
+        """
+        Args:
+            errors: Shape (origins, horizon)
+        """
+        self.errors = np.atleast_2d(np.asarray(errors, dtype=np.float32))
+        self._cache = {}
+
+    def offsets(self, horizon, level=0.95):
+        """
+        Lower and upper offsets to add to a forecast, shape (horizon,) each
+        """
+        key = (horizon, level)
+        if key not in self._cache:
+            n, calibrated = self.errors.shape
+            errors = self.errors.astype(np.float64)
+            tail = (1 - level) / 2
+            rank = math.ceil((n + 1) * (1 - tail))
+            if rank <= n:
+                # Split-conformal: the rank-th smallest and largest errors
+                ordered = np.sort(errors, axis=0)
+                lower, upper = ordered[n - rank], ordered[rank - 1]
+            else:
+                # Too few errors for the conformal rank: normal prediction band
+                spread = stats.t.ppf(1 - tail, n - 1) * errors.std(axis=0, ddof=1) * math.sqrt(1 + 1 / n)
+                lower, upper = errors.mean(axis=0) - spread, errors.mean(axis=0) + spread
+
+            days = np.arange(1, horizon + 1)
+            steps = np.minimum(days, calibrated) - 1
+            growth = np.sqrt(np.maximum(days, calibrated) / calibrated)
+            self._cache[key] = (lower[steps] * growth, upper[steps] * growth)
+        return self._cache[key]
+
+    def bounds(self, forecast, level=0.95):
+        """
+        Interval bounds for forecasts of shape (horizon,) or (products, horizon)
+
+        Returns:
+            (lower, upper), lower clipped at 0
+        """
+        forecast = np.asarray(forecast, dtype=np.float64)
+        lower, upper = self.offsets(forecast.shape[-1], level)
+        return np.maximum(forecast + lower, 0.0), np.maximum(forecast + upper, forecast)
+
+    def to_dict(self):
+        return {'errors': self.errors.round(4).tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['errors']) if data else None
@@ -8,7 +8,22 @@ import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+try:
+    from .config import compact_features, float_dtype, training_selection
+    from .deadline import check_deadline
+    from .feature_rows import date_ordinals, feature_matrix, required_window
+    from .history import history_frame, history_records, prediction_records
+    from .intervals import calibrate
+    from .linear_runtime import LinearArtifact, save_linear_artifact
+except ImportError:
+    from config import compact_features, float_dtype, training_selection
+    from deadline import check_deadline
+    from feature_rows import date_ordinals, feature_matrix, required_window
+    from history import history_frame, history_records, prediction_records
+    from intervals import calibrate
+    from linear_runtime import LinearArtifact, save_linear_artifact
 
 
 class LinearRegressionForecaster:
@@ -20,6 +35,7 @@ class LinearRegressionForecaster:
         self.model = LinearRegression()
         self.scaler = StandardScaler()
         self.is_fitted = False
+        self.intervals = None
         
     def create_features(self, data, lookback=7):
         """
@@ -32,48 +48,34 @@ class LinearRegressionForecaster:
         - Week of month
         - Trend (time index)
         """
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        df = df.set_index('date')
-        
-        # Ensure numeric quantity
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-        df = df.dropna()
-        
-        features = pd.DataFrame(index=df.index)
-        
-        # Trend feature (time index)
-        features['trend'] = range(len(df))
-        
-        # Lagged features
-        for i in range(1, lookback + 1):
-            features[f'lag_{i}'] = df['quantity'].shift(i)
-        
-        # Rolling statistics
-        features['rolling_mean_3'] = df['quantity'].rolling(window=3, min_periods=1).mean()
-        features['rolling_mean_7'] = df['quantity'].rolling(window=7, min_periods=1).mean()
-        features['rolling_std_7'] = df['quantity'].rolling(window=7, min_periods=1).std().fillna(0)
+        df = history_frame(data)
+        names = self.feature_columns(lookback)
         
-        # Cyclical features (day of week)
-        features['day_of_week'] = df.index.dayofweek  # type: ignore
-        features['week_of_month'] = (df.index.day - 1) // 7 + 1  # type: ignore
+        # Trend, lags, rolling statistics and day of week / week of month,
+        # built straight into the working precision with the target last
+        values = np.empty((len(df), len(names) + 1), dtype=float_dtype())
+        feature_matrix(values[:, :-1], names, df['quantity'].to_numpy(), date_ordinals(df['date'].values))
+        values[:, -1] = df['quantity'].to_numpy()
         
-        # Target variable
-        features['target'] = df['quantity'].values
+        # Drop rows without a full set of lags
+        features = pd.DataFrame(
+            values[lookback:],
+            index=pd.DatetimeIndex(df['date'].values[lookback:], name='date'),
+            columns=names + ['target'],
+            copy=False
+        )
         
-        # Drop rows with NaN (from lagged features)
-        features = features.dropna()
-        
-        return features
+        return compact_features(features)
     
-    def fit(self, historical_data, lookback=7):
+    def fit(self, historical_data, lookback=7, deadline=None, end_date=None):
         """
         Train the Linear Regression model
         
         Args:
             historical_data: List of dicts with 'date' and 'quantity'
             lookback: Number of past days to use as features
+            deadline: Optional Deadline (models/deadline.py), checked before fitting
+            end_date: Run date; days without sales up to it count as zero demand
             
         Returns:
             dict with training metrics
@@ -81,6 +83,9 @@ class LinearRegressionForecaster:
         if len(historical_data) < lookback + 5:
             raise ValueError(f"Insufficient data. Need at least {lookback + 5} days, got {len(historical_data)}")
         
+        if end_date is not None:
+            historical_data = history_frame(historical_data, end_date=end_date)
+        
         # Create features
         features_df = self.create_features(historical_data, lookback)
         
@@ -88,14 +93,42 @@ class LinearRegressionForecaster:
         X = features_df.drop('target', axis=1)
         y = features_df['target']
         
+        check_deadline(deadline, 'linear regression fit')
+        metrics = self.fit_features(X, y, lookback)
+        
+        # Prediction intervals from backtest errors on this history
+        self.intervals = self.calibrate_intervals(historical_data)
+        metrics['calibration_origins'] = 0 if self.intervals is None else len(self.intervals.errors)
+        return metrics
+    
+    def fit_features(self, X, y, lookback=7):
+        """
+        Train on a ready-made feature matrix
+        
+        Args:
+            X: Feature DataFrame (columns as produced by create_features)
+            y: Target values
+            lookback: Lag count the features were built with
+            
+        Returns:
+            dict with training metrics
+        """
+        # Training-window policy (models.config.set_training_window): recent
+        # rows only, optionally thinned and recency-weighted
+        rows, weights = training_selection(len(X))
+        if rows is not None:
+            X = X.iloc[rows]
+            y = y.iloc[rows] if hasattr(y, 'iloc') else np.asarray(y)[rows]
+        
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
         # Train model
-        self.model.fit(X_scaled, y)
+        self.model.fit(X_scaled, y, sample_weight=weights)
         self.is_fitted = True
         self.feature_names = X.columns.tolist()
         self.lookback = lookback
+        self.intervals = None
         
         # Calculate training metrics
         train_predictions = self.model.predict(X_scaled)
@@ -112,13 +145,15 @@ class LinearRegressionForecaster:
             'training_samples': len(X)
         }
     
-    def predict(self, historical_data, horizon=7):
+    def predict(self, historical_data, horizon=7, deadline=None, end_date=None):
         """
         Generate forecasts for the next N days
         
         Args:
             historical_data: List of dicts with 'date' and 'quantity'
             horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between horizon steps
+            end_date: Run date; the forecast starts the day after it
             
         Returns:
             List of predictions with confidence intervals
@@ -126,21 +161,26 @@ class LinearRegressionForecaster:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before prediction")
         
-        predictions = []
-        current_data = list(historical_data)
+        forecast = []
+        current_data = list(historical_data) if end_date is None else history_records(
+            history_frame(historical_data, end_date=end_date)
+        )
         
         # Get last date from historical data
         last_date = pd.to_datetime(current_data[-1]['date'])
         
         for day in range(1, horizon + 1):
+            check_deadline(deadline, 'forecast')
+            
             # Create features for prediction
             features_df = self.create_features(current_data, self.lookback)
             
             # Get latest features
             latest_features = features_df.drop('target', axis=1).iloc[-1:].copy()
             
-            # Update trend for future day
-            latest_features['trend'] = latest_features['trend'] + day
+            # Trend of the forecast day (current_data already holds the
+            # earlier predictions, so it is one past the latest row)
+            latest_features['trend'] = latest_features['trend'] + 1
             
             # Scale features
             X_scaled = self.scaler.transform(latest_features)
@@ -149,23 +189,9 @@ class LinearRegressionForecaster:
             pred = self.model.predict(X_scaled)[0]
             pred = max(0, pred)  # Ensure non-negative
             
-            # Simple confidence interval (±15%)
-            lower = max(0, pred * 0.85)
-            upper = pred * 1.15
-            
             # Forecast date
             forecast_date = last_date + timedelta(days=day)
-            
-            predictions.append({
-                'period': day,
-                'date': forecast_date.strftime('%Y-%m-%d'),
-                'predicted': float(pred),
-                'lower95': float(lower),
-                'upper95': float(upper),
-                'yhat': float(pred),
-                'yhat_lower': float(lower),
-                'yhat_upper': float(upper)
-            })
+            forecast.append(pred)
             
             # Add prediction to current_data for next iteration
             current_data.append({
@@ -173,7 +199,68 @@ class LinearRegressionForecaster:
                 'quantity': pred
             })
         
-        return predictions
+        # Backtest intervals when calibrated, otherwise ±15%
+        return prediction_records(forecast, last_date, 0.85, 1.15, self.intervals)
+    
+    @staticmethod
+    def feature_columns(lookback=7):
+        """
+        Feature columns produced by create_features, in order
+        """
+        return (['trend'] + [f'lag_{i}' for i in range(1, lookback + 1)] +
+                ['rolling_mean_3', 'rolling_mean_7', 'rolling_std_7', 'day_of_week', 'week_of_month'])
+    
+    def fit_from_store(self, store, product_id):
+        """
+        Train from a product's accumulated rows in a FeatureStore
+        (see feature_store.py), without rebuilding features from history
+        """
+        state = store.state(product_id)
+        columns = self.feature_columns(state.lookback)
+        X, y = state.training_data(columns)
+        if len(y) < 5:
+            raise ValueError(f"Insufficient data. Need at least 5 feature rows, got {len(y)}")
+        
+        return self.fit_features(pd.DataFrame(X, columns=columns), pd.Series(y), state.lookback)
+    
+    def predict_from_store(self, store, product_id, horizon=7, end_date=None):
+        """
+        Forecast from a product's FeatureStore state (trailing window and trend)
+        
+        Args:
+            end_date: Run date; days without sales up to it are folded into
+                the state as zero demand and the forecast starts the day after
+        """
+        if end_date is not None:
+            store.advance_through(end_date, [product_id])
+        state = store.state(product_id)
+        forecast = self.export_artifact().rollout(
+            state.tail[np.newaxis, :],
+            [state.last_date],
+            [state.count],
+            horizon
+        )[0]
+        return prediction_records(forecast, state.last_date, 0.85, 1.15, self.intervals)
+    
+    def calibrate_intervals(self, historical_data):
+        """
+        Backtest the fitted model from recent origins of its training history
+        (one batched rollout, see intervals.py)
+        
+        Returns:
+            EmpiricalIntervals, or None if the history is too short
+        """
+        df = history_frame(historical_data)
+        quantities = df['quantity'].to_numpy(dtype=np.float64)
+        dates = df['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        artifact = self.export_artifact()
+        window = max(required_window(self.feature_names), self.lookback + 1)
+        
+        def rollout(origins, horizon):
+            histories = quantities[origins[:, np.newaxis] - window + 1 + np.arange(window)]
+            return artifact.rollout(histories, dates[origins], origins + 1, horizon)
+        
+        return calibrate(quantities, window, rollout)
     
     def get_feature_importance(self):
         """
@@ -184,9 +271,22 @@ class LinearRegressionForecaster:
         
         importance = dict(zip(self.feature_names, self.model.coef_))
         return {k: float(v) for k, v in sorted(importance.items(), key=lambda x: abs(x[1]), reverse=True)}
+    
+    def export_artifact(self):
+        """
+        Export the fitted model with the scaler folded into the weights
+        (see linear_runtime.py; serving it needs only numpy)
+        """
+        return LinearArtifact.from_forecaster(self)
+    
+    def save_artifact(self, path):
+        """
+        Save the folded model as a .npz file (load with linear_runtime.load_linear_artifact)
+        """
+        save_linear_artifact(path, self.export_artifact())
 
 
-def forecast_linear_regression(historical_data, horizon=7, lookback=7):
+def forecast_linear_regression(historical_data, horizon=7, lookback=7, end_date=None):
     """
     Convenience function to train and predict in one call
     
@@ -194,6 +294,7 @@ def forecast_linear_regression(historical_data, horizon=7, lookback=7):
         historical_data: List of dicts with 'date' and 'quantity'
         horizon: Number of days to forecast
         lookback: Number of past days to use as features
+        end_date: Run date (default: last sale date)
         
     Returns:
         dict with predictions and metrics
@@ -201,10 +302,10 @@ def forecast_linear_regression(historical_data, horizon=7, lookback=7):
     forecaster = LinearRegressionForecaster()
     
     # Train model
-    metrics = forecaster.fit(historical_data, lookback)
+    metrics = forecaster.fit(historical_data, lookback, end_date=end_date)
     
     # Generate predictions
-    predictions = forecaster.predict(historical_data, horizon)
+    predictions = forecaster.predict(historical_data, horizon, end_date=end_date)
     
     # Get feature importance
     feature_importance = forecaster.get_feature_importance()
@@ -0,0 +1,155 @@
+# Backend/forecast2/models/linear_runtime.py
+"""
+Linear Regression Inference Artifacts
+Serves fitted LinearRegressionForecaster models without sklearn or pandas
+
+The StandardScaler is folded into the regression coefficients, so a fitted
+model becomes one weight vector and an intercept:
+
+    y = ((x - mean) / scale) @ coef + b  =  x @ (coef / scale) + (b - (mean / scale) @ coef)
+
+Serving is then a dot product per product, or one batched product across a
+stack of products' weights.
+"""
+
+import numpy as np
+
+try:
+    from .config import float_dtype
+    from .deadline import check_deadline
+    from .feature_rows import calendar_fields, date_ordinals, fill_feature_rows, required_window
+except ImportError:
+    from config import float_dtype
+    from deadline import check_deadline
+    from feature_rows import calendar_fields, date_ordinals, fill_feature_rows, required_window
+
+
+class LinearArtifact:
+    """
+    Folded linear model for one or more products
+    """
+
+    def __init__(self, weights, intercept, feature_names, lookback):
+        """
+        Args:
+            weights: Shape (features,) or (products, features)
+            intercept: Scalar or shape (products,)
+            feature_names: Column order of the weights
+            lookback: Lag count the features were built with
+        """
+        self.weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        self.intercept = np.atleast_1d(np.asarray(intercept, dtype=np.float64))
+        self.feature_names = [str(name) for name in feature_names]
+        self.lookback = int(lookback)
+
+    @classmethod
+    def from_forecaster(cls, forecaster):
+        """
+        Fold a fitted forecaster's scaler into its coefficients
+        """
+        if not forecaster.is_fitted:
+            raise ValueError("Model must be fitted before export")
+
+        coef = np.asarray(forecaster.model.coef_, dtype=np.float64)
+        mean = np.asarray(forecaster.scaler.mean_, dtype=np.float64)
+        scale = np.asarray(forecaster.scaler.scale_, dtype=np.float64)
+
+        weights = coef / scale
+        intercept = float(forecaster.model.intercept_) - float(np.dot(mean / scale, coef))
+        return cls(weights, intercept, forecaster.feature_names, forecaster.lookback)
+
+    @classmethod
+    def stack(cls, artifacts):
+        """
+        Combine per-product artifacts into one batched artifact (row i = artifact i)
+        """
+        names = artifacts[0].feature_names
+        if any(a.feature_names != names for a in artifacts):
+            raise ValueError("Only artifacts with the same features can be stacked")
+
+        return cls(
+            np.concatenate([a.weights for a in artifacts]),
+            np.concatenate([a.intercept for a in artifacts]),
+            names,
+            artifacts[0].lookback,
+        )
+
+    def predict(self, X):
+        """
+        Predict from feature rows
+
+        Args:
+            X: Shape (rows, features). With stacked weights, row i uses product i.
+
+        Returns:
+            Predictions, shape (rows,)
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.weights.shape[0] == 1:
+            return X @ self.weights[0] + self.intercept[0]
+        return np.einsum('pf,pf->p', X, self.weights) + self.intercept
+
+    def rollout(self, histories, last_dates, trends, horizon=7, deadline=None):
+        """
+        Recursive forecast, same values as LinearRegressionForecaster.predict
+
+        Args:
+            histories: Recent demand, shape (products, >= window) in date order
+            last_dates: Date of each product's last observation
+            trends: Number of observations per product (its full history length)
+            horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between steps
+
+        Returns:
+            Non-negative predictions, shape (products, horizon)
+        """
+        window = max(required_window(self.feature_names), self.lookback + 1)
+        histories = np.atleast_2d(np.asarray(histories, dtype=np.float64))[:, -window:]
+        products = histories.shape[0]
+        if histories.shape[1] < window:
+            raise ValueError(f"Insufficient data. Need at least {window} days, got {histories.shape[1]}")
+
+        last_ordinals = date_ordinals(np.atleast_1d(last_dates))
+        trends = np.atleast_1d(np.asarray(trends, dtype=np.float64))
+
+        dtype = float_dtype()
+        buffer = np.empty((products, window + horizon), dtype=dtype)
+        buffer[:, :window] = histories
+        rows = np.empty((products, len(self.feature_names)), dtype=dtype)
+
+        for step in range(horizon):
+            check_deadline(deadline, 'forecast')
+            # Features of the latest known row (history plus earlier
+            # predictions), trend of the forecast day
+            end = window + step
+            fill_feature_rows(
+                rows,
+                self.feature_names,
+                buffer[:, end - window:end],
+                trends + step,
+                calendar_fields(last_ordinals + step),
+            )
+            buffer[:, end] = np.maximum(self.predict(rows), 0)
+
+        return buffer[:, window:]
+
+
+def save_linear_artifact(path, artifact):
+    """
+    Save an artifact as a plain .npz file
+    """
+    np.savez(
+        path,
+        weights=artifact.weights,
+        intercept=artifact.intercept,
+        feature_names=np.array(artifact.feature_names),
+        lookback=np.array(artifact.lookback),
+    )
+
+
+def load_linear_artifact(path):
+    """
+    Load an artifact saved with save_linear_artifact
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return LinearArtifact(data['weights'], data['intercept'], data['feature_names'].tolist(), int(data['lookback']))
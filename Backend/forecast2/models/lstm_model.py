@@ -4,9 +4,12 @@ LSTM Forecasting Model (Experimental)
 Deep learning model for time series forecasting using TensorFlow/Keras
 """
 
+import gc
+import math
+import os
+import threading
 import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
+from numpy.lib.stride_tricks import sliding_window_view
 
 try:
     import tensorflow as tf
@@ -18,6 +21,110 @@ except ImportError:
     TENSORFLOW_AVAILABLE = False
     print("⚠️  TensorFlow not installed. Install with: pip install tensorflow")
 
+try:
+    from .config import float_dtype, training_selection
+    from .deadline import check_deadline
+    from .history import history_frame, prediction_records
+    from .intervals import calibrate
+    from .lstm_runtime import NumpyLSTMRuntime, save_lstm_artifact
+except ImportError:
+    from config import float_dtype, training_selection
+    from deadline import check_deadline
+    from history import history_frame, prediction_records
+    from intervals import calibrate
+    from lstm_runtime import NumpyLSTMRuntime, save_lstm_artifact
+
+
+# Compiled models shared across products, keyed by architecture.
+# Building and compiling a Sequential dominates fit time for short series,
+# so each worker keeps one compiled graph per shape and resets its weights.
+# The cache lock also guards the fit counter and the number of fits using a
+# shared model, so the session is never cleared under a running fit. Each
+# shared model has its own lock, so fits of the same shape run one at a time
+# within a process; parallelism comes from the worker processes.
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Condition()
+_fits_since_clear = 0
+_models_in_use = 0
+
+# Clear the Keras session after this many fits to keep worker memory flat
+RECYCLE_AFTER_FITS = int(os.environ.get('LSTM_RECYCLE_AFTER_FITS', 500))
+
+
+if TENSORFLOW_AVAILABLE:
+    class _DeadlineCallback(keras.callbacks.Callback):
+        """
+        Stops training after the batch in which the deadline passes
+        """
+        
+        def __init__(self, deadline):
+            super().__init__()
+            self.deadline = deadline
+        
+        def on_train_batch_end(self, batch, logs=None):
+            if self.deadline.expired():
+                self.model.stop_training = True
+
+
+class _SharedModel:
+    """
+    A compiled model plus its freshly initialised weights
+    """
+    
+    def __init__(self, model):
+        self.model = model
+        self.initial_weights = model.get_weights()
+        self.lock = threading.Lock()
+    
+    def reset(self):
+        """
+        Restore initial weights and clear optimizer state
+        """
+        self.model.set_weights(self.initial_weights)
+        
+        optimizer = self.model.optimizer
+        variables = optimizer.variables() if callable(optimizer.variables) else optimizer.variables
+        for var in variables:
+            if 'learning_rate' in getattr(var, 'path', var.name):
+                continue
+            var.assign(np.zeros(var.shape, dtype=getattr(var.dtype, 'name', var.dtype)))
+
+
+def _clear_locked():
+    """
+    Drop the shared models and reset the session (cache lock held, no model in use)
+    """
+    global _fits_since_clear
+    
+    _MODEL_CACHE.clear()
+    _fits_since_clear = 0
+    if TENSORFLOW_AVAILABLE:
+        keras.backend.clear_session()
+    gc.collect()
+
+
+def clear_model_cache():
+    """
+    Drop all shared models and reset the Keras session
+    
+    Waits for fits that are using a shared model to finish first.
+    """
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE_LOCK.wait_for(lambda: _models_in_use == 0)
+        _clear_locked()
+
+
+def _release_shared_model():
+    """
+    Mark a fit as done with its shared model
+    """
+    global _fits_since_clear, _models_in_use
+    
+    with _MODEL_CACHE_LOCK:
+        _models_in_use -= 1
+        _fits_since_clear += 1
+        _MODEL_CACHE_LOCK.notify_all()
+
 
 class LSTMForecaster:
     """
@@ -32,10 +139,12 @@ class LSTMForecaster:
         self.dropout = dropout
         self.epochs = epochs
         self.batch_size = batch_size
-        self.model = None
+        self.model = None  # Keras model, only via keras_model()
         self.is_fitted = False
         self.scaler_min = None
         self.scaler_max = None
+        self.intervals = None
+        self._runtime = None
         
     def normalize_data(self, data):
         """
@@ -70,11 +179,10 @@ class LSTMForecaster:
         Returns:
             X (features), y (targets)
         """
-        X, y = [], []
-        for i in range(lookback, len(data)):
-            X.append(data[i-lookback:i])
-            y.append(data[i])
-        return np.array(X), np.array(y)
+        data = np.asarray(data, dtype=np.float32)
+        X = sliding_window_view(data, lookback)[:-1]
+        y = data[lookback:]
+        return X, y
     
     def build_model(self, input_shape):
         """
@@ -97,7 +205,40 @@ class LSTMForecaster:
         
         return model
     
-    def fit(self, historical_data, lookback=14, validation_split=0.2, verbose=0):
+    def _shared_model(self, lookback):
+        """
+        Get the compiled model for this architecture, building it on first use
+        
+        The model counts as in use until _release_shared_model(). When a
+        recycle is due, new fits wait for running ones to drain first.
+        """
+        global _models_in_use
+        
+        key = (lookback, self.units, self.dropout)
+        with _MODEL_CACHE_LOCK:
+            if RECYCLE_AFTER_FITS and _fits_since_clear >= RECYCLE_AFTER_FITS:
+                _MODEL_CACHE_LOCK.wait_for(lambda: _models_in_use == 0)
+                if _fits_since_clear >= RECYCLE_AFTER_FITS:
+                    _clear_locked()
+            
+            shared = _MODEL_CACHE.get(key)
+            if shared is None:
+                shared = _SharedModel(self.build_model(input_shape=(lookback, 1)))
+                _MODEL_CACHE[key] = shared
+            _models_in_use += 1
+        return shared
+    
+    def make_dataset(self, X, y, shuffle=False, sample_weight=None):
+        """
+        Stream sequences (and optional per-sequence weights) through tf.data
+        """
+        tensors = (X[..., np.newaxis], y) if sample_weight is None else (X[..., np.newaxis], y, sample_weight)
+        dataset = tf.data.Dataset.from_tensor_slices(tensors)
+        if shuffle:
+            dataset = dataset.shuffle(len(X), reshuffle_each_iteration=True)
+        return dataset.batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+    
+    def fit(self, historical_data, lookback=14, validation_split=0.2, verbose=0, deadline=None, end_date=None):
         """
         Train the LSTM model
         
@@ -106,6 +247,13 @@ class LSTMForecaster:
             lookback: Number of time steps to look back
             validation_split: Fraction of data to use for validation
             verbose: Training verbosity (0=silent, 1=progress bar, 2=one line per epoch)
+            deadline: Optional Deadline (models/deadline.py); training stops at
+                the next batch once it passes and DeadlineExceeded is raised
+            end_date: Run date; days without sales up to it count as zero demand
+            
+        Trains the process-wide compiled model for this shape, so fits of the
+        same shape wait for each other. Only the trained weights are kept on
+        the forecaster (see keras_model() for a Keras model).
             
         Returns:
             dict with training metrics
@@ -115,48 +263,82 @@ class LSTMForecaster:
             raise ValueError(f"Insufficient data. Need at least {min_required} days, got {len(historical_data)}")
         
         # Prepare data
-        df = pd.DataFrame(historical_data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-        df = df.dropna()
-        
-        quantities = df['quantity'].values
+        quantities = history_frame(historical_data, end_date=end_date)['quantity'].values
         
         # Normalize data
         normalized_data, self.scaler_min, self.scaler_max = self.normalize_data(quantities)
         
-        # Create sequences
+        # Create sequences [samples, time steps]
         X, y = self.create_sequences(normalized_data, lookback)
         
-        # Reshape for LSTM [samples, time steps, features]
-        X = X.reshape(X.shape[0], X.shape[1], 1)
+        # Hold out the last fraction for validation (same split as Keras' validation_split)
+        split_at = int(math.ceil(len(X) * (1 - validation_split)))
         
-        # Build model
-        self.model = self.build_model(input_shape=(lookback, 1))
+        # Training-window policy (models.config.set_training_window), with
+        # ages counted from the end of the full series
+        rows, weights = training_selection(len(X))
+        rows = np.arange(len(X)) if rows is None else rows
+        train = rows < split_at
+        train_ds = self.make_dataset(
+            X[rows[train]], y[rows[train]], shuffle=True,
+            sample_weight=None if weights is None else weights[train].astype(np.float32)
+        )
+        val_ds = self.make_dataset(X[split_at:], y[split_at:]) if split_at < len(X) else None
         
         # Early stopping to prevent overfitting
         early_stop = EarlyStopping(
-            monitor='val_loss',
+            monitor='val_loss' if val_ds is not None else 'loss',
             patience=10,
             restore_best_weights=True
         )
         
-        # Train model
-        history = self.model.fit(
-            X, y,
-            epochs=self.epochs,
-            batch_size=self.batch_size,
-            validation_split=validation_split,
-            callbacks=[early_stop],
-            verbose=verbose
-        )
+        callbacks = [early_stop]
+        if deadline is not None:
+            callbacks.append(_DeadlineCallback(deadline))
+        
+        # Reuse the compiled model for this shape with fresh weights
+        shared = self._shared_model(lookback)
+        try:
+            with shared.lock:
+                check_deadline(deadline, 'lstm fit')
+                shared.reset()
+                model = shared.model
+                
+                # Train model
+                history = model.fit(
+                    train_ds,
+                    epochs=self.epochs,
+                    validation_data=val_ds,
+                    shuffle=False,  # train_ds reshuffles every epoch
+                    callbacks=callbacks,
+                    verbose=verbose
+                )
+                
+                # Training was cut short; the weights are not a finished model
+                check_deadline(deadline, 'lstm fit')
+                
+                self.weights = model.get_weights()
+                self.model = None
+                self._runtime = None
+                
+                # Calculate metrics
+                train_predictions = model.predict(X[..., np.newaxis], batch_size=self.batch_size, verbose=0).flatten()
+        finally:
+            _release_shared_model()
         
         self.is_fitted = True
         self.lookback = lookback
         
-        # Calculate metrics
-        train_predictions = self.model.predict(X, verbose=0).flatten()
+        # Prediction intervals from rollouts over the validation split only,
+        # which the weights were not trained on
+        runtime = self._runtime = self.to_runtime()
+        
+        def rollout(origins, horizon):
+            windows = quantities[origins[:, np.newaxis] - lookback + 1 + np.arange(lookback)]
+            return runtime.forecast(windows, horizon)
+        
+        self.intervals = calibrate(quantities, lookback, rollout, first=split_at + lookback - 1)
+        
         train_predictions = self.denormalize_data(train_predictions)
         y_denorm = self.denormalize_data(y)
         
@@ -173,76 +355,103 @@ class LSTMForecaster:
             'final_loss': float(final_loss),
             'final_val_loss': float(final_val_loss),
             'epochs_trained': len(history.history['loss']),
-            'training_samples': len(X)
+            'training_samples': len(X),
+            'calibration_origins': 0 if self.intervals is None else len(self.intervals.errors)
         }
     
-    def predict(self, historical_data, horizon=7):
+    def predict(self, historical_data, horizon=7, deadline=None, end_date=None):
         """
         Generate forecasts for the next N days
         
         Args:
             historical_data: List of dicts with 'date' and 'quantity'
             horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between horizon steps
+            end_date: Run date; the forecast starts the day after it
             
         Returns:
             List of predictions with confidence intervals
         """
+        return self.predict_batch([historical_data], horizon, deadline, end_date)[0]
+    
+    def predict_batch(self, histories, horizon=7, deadline=None, end_date=None):
+        """
+        Generate forecasts for many products with this model
+        
+        All products advance together: each horizon step is one forward pass
+        over a (products, lookback) batch, so N products cost `horizon` model
+        calls rather than N * horizon. Inputs are scaled with the training
+        min/max stored at fit time.
+        
+        Args:
+            histories: List of historical_data lists (one per product)
+            horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between horizon steps
+            end_date: Run date shared by all products (default: each
+                product's last sale date)
+            
+        Returns:
+            List of prediction lists, in the same order as `histories`
+        """
         if not self.is_fitted:
             raise ValueError("Model must be fitted before prediction")
         
-        # Prepare data
-        df = pd.DataFrame(historical_data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-        df = df.dropna()
+        if self._runtime is None:
+            self._runtime = self.to_runtime()
         
-        quantities = df['quantity'].values
-        last_date = df['date'].iloc[-1]
+        windows = np.empty((len(histories), self.lookback), dtype=float_dtype())
+        last_dates = []
+        for i, historical_data in enumerate(histories):
+            df = history_frame(historical_data, end_date=end_date)
+            quantities = df['quantity'].values[-self.lookback:]
+            if len(quantities) < self.lookback:
+                raise ValueError(f"Insufficient data. Need at least {self.lookback} days, got {len(quantities)}")
+            windows[i] = quantities
+            last_dates.append(df['date'].iloc[-1])
         
-        # Normalize
-        normalized_data, _, _ = self.normalize_data(quantities)
+        forecasts = self._runtime.forecast(windows, horizon, deadline)
         
-        # Use last lookback values as initial sequence
-        current_sequence = normalized_data[-self.lookback:]
-        predictions = []
+        # Backtest intervals when calibrated, otherwise ±25% (LSTM has
+        # higher uncertainty)
+        return [
+            prediction_records(forecast, last_date, 0.75, 1.25, self.intervals)
+            for last_date, forecast in zip(last_dates, forecasts)
+        ]
+    
+    def keras_model(self):
+        """
+        A Keras model with this forecaster's fitted weights
         
-        for day in range(1, horizon + 1):
-            # Reshape for prediction
-            X_pred = current_sequence[-self.lookback:].reshape(1, self.lookback, 1)
-            
-            # Predict next value
-            pred_normalized = self.model.predict(X_pred, verbose=0)[0, 0]  # type: ignore
-            
-            # Denormalize
-            pred = self.denormalize_data(np.array([pred_normalized]))[0]
-            pred = max(0, pred)  # Ensure non-negative
-            
-            # Confidence interval (±25% for LSTM due to higher uncertainty)
-            lower = max(0, pred * 0.75)
-            upper = pred * 1.25
-            
-            # Forecast date
-            forecast_date = last_date + timedelta(days=day)
-            
-            predictions.append({
-                'period': day,
-                'date': forecast_date.strftime('%Y-%m-%d'),
-                'predicted': float(pred),
-                'lower95': float(lower),
-                'upper95': float(upper),
-                'yhat': float(pred),
-                'yhat_lower': float(lower),
-                'yhat_upper': float(upper)
-            })
-            
-            # Update sequence with new prediction (normalized)
-            current_sequence = np.append(current_sequence, pred_normalized)
+        Built on first call and kept on the instance. The compiled model
+        used for training is shared with later fits of the same shape, so it
+        is never exposed.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before export")
+        
+        if self.model is None:
+            self.model = self.build_model(input_shape=(self.lookback, 1))
+            self.model.set_weights(self.weights)
+        return self.model
+    
+    def to_runtime(self):
+        """
+        Export the fitted model as a NumPy runtime (see lstm_runtime.py)
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before export")
         
-        return predictions
+        return NumpyLSTMRuntime.from_keras_weights(self.weights, self.scaler_min, self.scaler_max, self.lookback)
+    
+    def save_artifact(self, path):
+        """
+        Save plain weight arrays for TensorFlow-free inference workers
+        (load with lstm_runtime.load_lstm_artifact)
+        """
+        save_lstm_artifact(path, self.to_runtime())
 
 
-def forecast_lstm(historical_data, horizon=7, lookback=14, **kwargs):
+def forecast_lstm(historical_data, horizon=7, lookback=14, end_date=None, **kwargs):
     """
     Convenience function to train and predict with LSTM
     
@@ -250,6 +459,7 @@ def forecast_lstm(historical_data, horizon=7, lookback=14, **kwargs):
         historical_data: List of dicts with 'date' and 'quantity'
         horizon: Number of days to forecast
         lookback: Number of time steps to look back
+        end_date: Run date (default: last sale date)
         **kwargs: Additional LSTM parameters (units, dropout, epochs, batch_size)
         
     Returns:
@@ -261,10 +471,10 @@ def forecast_lstm(historical_data, horizon=7, lookback=14, **kwargs):
     forecaster = LSTMForecaster(**kwargs)
     
     # Train model
-    metrics = forecaster.fit(historical_data, lookback)
+    metrics = forecaster.fit(historical_data, lookback, end_date=end_date)
     
     # Generate predictions
-    predictions = forecaster.predict(historical_data, horizon)
+    predictions = forecaster.predict(historical_data, horizon, end_date=end_date)
     
     return {
         'predictions': predictions,
@@ -0,0 +1,213 @@
+# Backend/forecast2/models/lstm_runtime.py
+"""
+NumPy LSTM Inference Runtime
+Runs fitted LSTM forecasters without TensorFlow
+
+A fitted LSTMForecaster exports its weights as plain arrays. This module
+re-implements the forward pass of its architecture (LSTM -> LSTM -> Dense(25)
+-> Dense(1), dropout disabled) in NumPy, so inference workers only need numpy.
+Weights carry a leading model axis, so many products' models can be stacked
+and advanced together in one call.
+"""
+
+import numpy as np
+
+try:
+    from .deadline import check_deadline
+except ImportError:
+    from deadline import check_deadline
+
+
+# Order of Keras get_weights() for LSTMForecaster.build_model
+WEIGHT_NAMES = (
+    'lstm1_kernel', 'lstm1_recurrent_kernel', 'lstm1_bias',
+    'lstm2_kernel', 'lstm2_recurrent_kernel', 'lstm2_bias',
+    'dense1_kernel', 'dense1_bias',
+    'dense2_kernel', 'dense2_bias',
+)
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _matmul(x, w):
+    """
+    (batch, in) @ (models, in, out) -> (batch, out), one model per row or shared
+    """
+    if w.shape[0] == 1:
+        return x @ w[0]
+    return np.matmul(x[:, np.newaxis, :], w)[:, 0, :]
+
+
+def _lstm_step(z, c):
+    """
+    Keras LSTM cell update from pre-activations z = x W + h U + b (gate order i, f, c, o)
+    """
+    i, f, g, o = np.split(z, 4, axis=-1)
+    c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+    h = _sigmoid(o) * np.tanh(c)
+    return h, c
+
+
+class NumpyLSTMRuntime:
+    """
+    Pure-NumPy forward pass for one or more fitted LSTM forecasters
+    """
+
+    def __init__(self, weights, scaler_min, scaler_max, lookback, dtype=np.float32):
+        """
+        Args:
+            weights: dict of arrays keyed by WEIGHT_NAMES, each with a leading
+                model axis (size 1 for a single forecaster)
+            scaler_min, scaler_max: Training min/max per model
+            lookback: Input window length
+        """
+        self.weights = {name: np.asarray(weights[name], dtype=dtype) for name in WEIGHT_NAMES}
+        self.scaler_min = np.atleast_1d(np.asarray(scaler_min, dtype=np.float64))
+        self.scaler_max = np.atleast_1d(np.asarray(scaler_max, dtype=np.float64))
+        self.lookback = int(lookback)
+        self.dtype = dtype
+        self.n_models = self.weights['lstm1_kernel'].shape[0]
+
+    @classmethod
+    def from_keras_weights(cls, weight_list, scaler_min, scaler_max, lookback):
+        """
+        Build a single-model runtime from Keras model.get_weights()
+        """
+        weights = {name: np.asarray(w)[np.newaxis] for name, w in zip(WEIGHT_NAMES, weight_list)}
+        return cls(weights, scaler_min, scaler_max, lookback)
+
+    @classmethod
+    def stack(cls, runtimes):
+        """
+        Combine per-product runtimes into one batched runtime (row i = runtime i)
+        """
+        lookbacks = {rt.lookback for rt in runtimes}
+        if len(lookbacks) != 1:
+            raise ValueError("Only runtimes with the same lookback can be stacked")
+
+        weights = {name: np.concatenate([rt.weights[name] for rt in runtimes]) for name in WEIGHT_NAMES}
+        return cls(
+            weights,
+            np.concatenate([rt.scaler_min for rt in runtimes]),
+            np.concatenate([rt.scaler_max for rt in runtimes]),
+            lookbacks.pop(),
+        )
+
+    def forward(self, windows):
+        """
+        One-step prediction
+
+        Args:
+            windows: Normalized inputs, shape (batch, lookback)
+
+        Returns:
+            Normalized predictions, shape (batch,)
+        """
+        w = self.weights
+        windows = np.asarray(windows, dtype=self.dtype)
+        batch = windows.shape[0]
+        units1 = w['lstm1_recurrent_kernel'].shape[1]
+        units2 = w['lstm2_recurrent_kernel'].shape[1]
+
+        # Input dimension is 1, so the first layer's input projection for all
+        # time steps is a single broadcast: (batch, lookback, 4 * units1)
+        x_proj = windows[:, :, np.newaxis] * w['lstm1_kernel'][:, np.newaxis, 0, :] + w['lstm1_bias'][:, np.newaxis, :]
+
+        h1 = np.zeros((batch, units1), dtype=self.dtype)
+        c1 = np.zeros_like(h1)
+        h2 = np.zeros((batch, units2), dtype=self.dtype)
+        c2 = np.zeros_like(h2)
+
+        for t in range(windows.shape[1]):
+            h1, c1 = _lstm_step(x_proj[:, t] + _matmul(h1, w['lstm1_recurrent_kernel']), c1)
+            z2 = _matmul(h1, w['lstm2_kernel']) + _matmul(h2, w['lstm2_recurrent_kernel']) + w['lstm2_bias']
+            h2, c2 = _lstm_step(z2, c2)
+
+        hidden = _matmul(h2, w['dense1_kernel']) + w['dense1_bias']
+        return (_matmul(hidden, w['dense2_kernel']) + w['dense2_bias'])[:, 0]
+
+    def rollout(self, windows, horizon, deadline=None):
+        """
+        Recursive multi-step forecast in normalized space
+
+        Each step feeds the latest `lookback` values (history followed by
+        earlier predictions) back into the model. Values are written into one
+        preallocated buffer, so the loop does not reallocate.
+
+        Args:
+            windows: Normalized inputs, shape (batch, lookback)
+            horizon: Number of steps to forecast
+            deadline: Optional Deadline, checked between steps
+
+        Returns:
+            Normalized predictions, shape (batch, horizon)
+        """
+        windows = np.asarray(windows, dtype=self.dtype)
+        batch, lookback = windows.shape
+
+        buffer = np.empty((batch, lookback + horizon), dtype=self.dtype)
+        buffer[:, :lookback] = windows
+
+        for step in range(horizon):
+            check_deadline(deadline, 'forecast')
+            buffer[:, lookback + step] = self.forward(buffer[:, step:step + lookback])
+
+        return buffer[:, lookback:]
+
+    def normalize(self, values):
+        """
+        Scale raw values with each model's training min/max
+        """
+        scale = self.scaler_max - self.scaler_min
+        safe_scale = np.where(scale == 0, 1.0, scale)
+        normalized = (np.asarray(values, dtype=np.float64) - self.scaler_min[:, np.newaxis]) / safe_scale[:, np.newaxis]
+        return np.where(scale[:, np.newaxis] == 0, 0.0, normalized)
+
+    def denormalize(self, normalized):
+        """
+        Reverse normalize(); constant training series map back to their value
+        """
+        scale = self.scaler_max - self.scaler_min
+        return normalized * scale[:, np.newaxis] + self.scaler_min[:, np.newaxis]
+
+    def forecast(self, histories, horizon=7, deadline=None):
+        """
+        Forecast raw demand for a batch of products
+
+        Args:
+            histories: Raw demand, shape (batch, >= lookback); the last
+                `lookback` values of each row are used
+            horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between steps
+
+        Returns:
+            Non-negative predictions, shape (batch, horizon)
+        """
+        histories = np.atleast_2d(np.asarray(histories, dtype=np.float64))
+        windows = self.normalize(histories[:, -self.lookback:])
+        predictions = self.denormalize(self.rollout(windows, horizon, deadline).astype(np.float64))
+        return np.maximum(predictions, 0)
+
+
+def save_lstm_artifact(path, runtime):
+    """
+    Save a runtime's weights and scaler as a plain .npz file
+    """
+    np.savez(
+        path,
+        scaler_min=runtime.scaler_min,
+        scaler_max=runtime.scaler_max,
+        lookback=np.array(runtime.lookback),
+        **runtime.weights
+    )
+
+
+def load_lstm_artifact(path):
+    """
+    Load a runtime saved with save_lstm_artifact (no TensorFlow needed)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        weights = {name: data[name] for name in WEIGHT_NAMES}
+        return NumpyLSTMRuntime(weights, data['scaler_min'], data['scaler_max'], int(data['lookback']))
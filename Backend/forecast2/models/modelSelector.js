@@ -12,12 +12,13 @@ const __dirname = path.dirname(__filename);
 
 /**
  * Run Python ML model
- * @param {string} modelName - 'linear_regression', 'xgboost', or 'lstm'
+ * @param {string} modelName - 'linear_regression', 'xgboost', 'lstm', 'intermittent', or 'ensemble'
  * @param {Array} historicalData - Array of {date, quantity} objects
  * @param {number} horizon - Forecast horizon
+ * @param {string} endDate - Run date (YYYY-MM-DD); days without sales up to it are zero demand
  * @returns {Promise<Object>} - Predictions and metrics
  */
-function runPythonModel(modelName, historicalData, horizon) {
+function runPythonModel(modelName, historicalData, horizon, endDate) {
   return new Promise((resolve, reject) => {
     const modelsDir = __dirname;
     const pythonScript = path.join(modelsDir, `${modelName}.py`);
@@ -41,6 +42,12 @@ try:
     elif "${modelName}" == "lstm_model":
         from lstm_model import forecast_lstm
         forecast_func = forecast_lstm
+    elif "${modelName}" == "intermittent":
+        from intermittent import forecast_intermittent
+        forecast_func = forecast_intermittent
+    elif "${modelName}" == "ensemble":
+        from ensemble import forecast_ensemble
+        forecast_func = forecast_ensemble
     else:
         raise ValueError(f"Unknown model: ${modelName}")
     
@@ -50,7 +57,7 @@ try:
     horizon = input_data['horizon']
     
     # Run forecast
-    result = forecast_func(historical_data, horizon)
+    result = forecast_func(historical_data, horizon, end_date=input_data.get('end_date'))
     
     # Output result
     print(json.dumps(result))
@@ -74,7 +81,7 @@ except Exception as e:
 
     // Send data to Python
     try {
-      python.stdin.write(JSON.stringify({ historical_data: historicalData, horizon }));
+      python.stdin.write(JSON.stringify({ historical_data: historicalData, horizon, end_date: endDate }));
       python.stdin.end();
     } catch (err) {
       reject(new Error(`Failed to send data to Python: ${err.message}`));
@@ -117,17 +124,51 @@ except Exception as e:
   });
 }
 
+// Share of zero-demand days above which 'auto' uses Croston/TSB
+const INTERMITTENT_ZERO_SHARE = parseFloat(process.env.FORECAST_INTERMITTENT_ZERO_SHARE || '0.5');
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+const today = () => new Date().toISOString().split('T')[0];
+
+/**
+ * Share of calendar days without demand between the first point and the
+ * run date (the series only lists days with sales)
+ * @param {Array} series - [{date, demand}]
+ * @param {string} endDate - Run date (YYYY-MM-DD, default: today)
+ * @returns {{ zeroShare: number, calendarDays: number }}
+ */
+export const intermittency = (series, endDate = today()) => {
+  if (series.length === 0) return { zeroShare: 1, calendarDays: 0 };
+
+  const times = series.map(point => new Date(point.date).getTime());
+  const end = Math.max(...times, new Date(endDate).getTime());
+  const calendarDays = Math.round((end - Math.min(...times)) / DAY_MS) + 1;
+  const demandDays = new Set(
+    series
+      .filter(point => (point.quantity ?? point.demand) > 0)
+      .map(point => new Date(point.date).toISOString().split('T')[0])
+  ).size;
+
+  return { zeroShare: 1 - demandDays / calendarDays, calendarDays };
+};
+
 /**
  * Run forecast with specified model
  * @param {Array} series - Historical sales data
  * @param {number} horizon - Forecast horizon (days)
- * @param {string} modelType - 'moving_average', 'exponential_smoothing', 'linear_regression', 'xgboost', 'lstm', 'auto'
+ * @param {string} modelType - 'moving_average', 'exponential_smoothing', 'linear_regression', 'xgboost', 'lstm', 'croston', 'ensemble', 'auto'
+ * @param {string} endDate - Run date (YYYY-MM-DD, default: today); ML forecasts start the day after
  * @returns {Promise<Object>} - Forecast results
  */
-export const runForecastModel = async (series, horizon = 14, modelType = 'auto') => {
+export const runForecastModel = async (series, horizon = 14, modelType = 'auto', endDate = today()) => {
   // Auto-select model based on data availability
   if (modelType === 'auto') {
-    if (series.length < 14) {
+    const { zeroShare, calendarDays } = intermittency(series, endDate);
+
+    if (calendarDays >= 14 && zeroShare >= INTERMITTENT_ZERO_SHARE) {
+      // Mostly zero days: lag features carry little signal, use Croston/TSB
+      modelType = 'croston';
+    } else if (series.length < 14) {
       modelType = 'moving_average';
     } else if (series.length < 30) {
       modelType = 'exponential_smoothing';
@@ -165,13 +206,13 @@ export const runForecastModel = async (series, horizon = 14, modelType = 'auto')
     // Prepare historical data for Python
     const historicalData = series.map(point => ({
       date: point.date,
-      quantity: point.quantity
+      quantity: point.quantity ?? point.demand
     }));
 
     let result;
     switch (modelType) {
       case 'linear_regression':
-        result = await runPythonModel('linear_regression', historicalData, horizon);
+        result = await runPythonModel('linear_regression', historicalData, horizon, endDate);
         return {
           method: 'LINEAR_REGRESSION',
           points: result.predictions,
@@ -179,7 +220,7 @@ export const runForecastModel = async (series, horizon = 14, modelType = 'auto')
         };
 
       case 'xgboost':
-        result = await runPythonModel('xgboost_model', historicalData, horizon);
+        result = await runPythonModel('xgboost_model', historicalData, horizon, endDate);
         return {
           method: 'XGBOOST',
           points: result.predictions,
@@ -187,7 +228,7 @@ export const runForecastModel = async (series, horizon = 14, modelType = 'auto')
         };
 
       case 'lstm':
-        result = await runPythonModel('lstm_model', historicalData, horizon);
+        result = await runPythonModel('lstm_model', historicalData, horizon, endDate);
         return {
           method: 'LSTM',
           points: result.predictions,
@@ -195,6 +236,25 @@ export const runForecastModel = async (series, horizon = 14, modelType = 'auto')
           note: result.note
         };
 
+      case 'croston':
+        result = await runPythonModel('intermittent', historicalData, horizon, endDate);
+        return {
+          method: 'CROSTON_TSB',
+          points: result.predictions,
+          metrics: result.metrics
+        };
+
+      case 'ensemble':
+        // Linear regression + XGBoost blended by holdout error
+        result = await runPythonModel('ensemble', historicalData, horizon, endDate);
+        return {
+          method: 'ENSEMBLE',
+          points: result.predictions,
+          components: result.components,
+          weights: result.weights,
+          metrics: result.metrics
+        };
+
       default:
         throw new Error(`Unknown model type: ${modelType}`);
     }
@@ -0,0 +1,191 @@
+# Backend/forecast2/models/replenishment.py
+"""
+Replenishment Planning
+Reorder points, safety stock and order quantities for a whole catalogue
+
+Works on a (products x horizon) forecast matrix, a daily demand standard
+deviation per product (from forecast residuals) and a padded matrix of
+observed lead times. Demand over the lead time is read off the cumulative
+forecast, and safety stock covers both demand and lead-time uncertainty:
+
+    safety_stock  = z * sqrt(L * sigma_d^2 + d^2 * sigma_L^2)
+    reorder_point = demand over L + safety_stock
+    order_up_to   = demand over (L + review_period) + safety_stock
+
+Products whose inventory position (stock + on order) is at or below the
+reorder point get an order up to order_up_to, rounded to the pack size
+and at least the minimum order quantity.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+# Same fallback as data/leadTime.js when fewer than two receipts exist
+DEFAULT_LEAD_TIME_DAYS = 7
+
+
+def _vector(values, n):
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (n,))
+
+
+def service_level_z(service_level):
+    """
+    Standard normal quantile for a service level (scalar or per product)
+    """
+    levels = np.asarray(service_level, dtype=np.float64)
+    if np.any((levels <= 0) | (levels >= 1)):
+        raise ValueError("service_level must be between 0 and 1")
+    # Few distinct levels in practice: invert each once
+    unique, inverse = np.unique(levels, return_inverse=True)
+    z = np.array([NormalDist().inv_cdf(level) for level in unique])
+    return z[inverse].reshape(levels.shape)
+
+
+def pad_samples(rows, max_samples=None):
+    """
+    Ragged per-product samples as a NaN-padded (products, k) matrix
+    """
+    width = max_samples or max((len(row) for row in rows), default=0)
+    samples = np.full((len(rows), max(width, 1)), np.nan)
+    for i, row in enumerate(rows):
+        row = list(row)[-width:] if width else []
+        samples[i, :len(row)] = row
+    return samples
+
+
+def receipt_intervals(receipts_by_product, max_samples=20):
+    """
+    Lead-time samples as gaps between consecutive receipts (as data/leadTime.js)
+
+    Args:
+        receipts_by_product: List (one entry per product) of receipt dates
+        max_samples: Most recent gaps kept per product
+
+    Returns:
+        (products, max_samples) float matrix of gaps in days, NaN-padded
+    """
+    samples = np.full((len(receipts_by_product), max_samples), np.nan)
+    for row, receipts in enumerate(receipts_by_product):
+        if len(receipts) < 2:
+            continue
+        days = np.sort(pd.to_datetime(pd.Series(receipts)).to_numpy('datetime64[D]').astype(np.int64))
+        gaps = np.diff(days)[-max_samples:]
+        samples[row, :len(gaps)] = gaps
+    return samples
+
+
+def lead_time_stats(samples, n=None):
+    """
+    Mean and standard deviation of lead time per product
+
+    Args:
+        samples: (products, k) NaN-padded lead-time samples, or one value
+            per product / for all products
+        n: Number of products (needed when samples is a scalar)
+
+    Returns:
+        (mean_days, std_days); products without samples get
+        DEFAULT_LEAD_TIME_DAYS and no spread
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.ndim < 2:
+        mean = _vector(samples, n if n is not None else samples.size).copy()
+        std = np.zeros_like(mean)
+    else:
+        counts = np.sum(~np.isnan(samples), axis=1)
+        filled = np.where(np.isnan(samples), 0.0, samples)
+        safe_counts = np.maximum(counts, 1)
+        mean = filled.sum(axis=1) / safe_counts
+        squares = np.where(np.isnan(samples), 0.0, (samples - mean[:, None]) ** 2)
+        std = np.sqrt(squares.sum(axis=1) / safe_counts)
+        mean[counts == 0] = DEFAULT_LEAD_TIME_DAYS
+    return mean, std
+
+
+def demand_over(forecast, days):
+    """
+    Forecast demand over the next `days` (fractional) days per product
+
+    Beyond the horizon the last week's average daily demand is carried forward.
+    """
+    n, horizon = forecast.shape
+    cumulative = np.zeros((n, horizon + 1))
+    np.cumsum(forecast, axis=1, out=cumulative[:, 1:])
+
+    days = np.maximum(days, 0.0)
+    whole = np.minimum(np.floor(days), horizon).astype(np.intp)
+    rows = np.arange(n)
+    demand = cumulative[rows, whole]
+
+    # Fraction of the next day inside the horizon
+    inside = whole < horizon
+    fraction = np.where(inside, days - whole, 0.0)
+    demand += fraction * forecast[rows, np.minimum(whole, horizon - 1)]
+
+    tail_days = min(7, horizon)
+    tail_rate = (cumulative[:, horizon] - cumulative[:, horizon - tail_days]) / tail_days
+    demand += np.maximum(days - horizon, 0.0) * tail_rate
+    return demand
+
+
+def plan_replenishment(product_ids, forecast, demand_std, lead_time_samples, current_stock,
+                       on_order=0.0, service_level=0.95, review_period=7.0,
+                       pack_size=1.0, min_order=0.0):
+    """
+    Reorder point, safety stock and suggested order for every product
+
+    Args:
+        product_ids: Product ids (one per forecast row)
+        forecast: (products, horizon) predicted daily demand
+        demand_std: Daily demand standard deviation per product (e.g.
+            forecast residual std)
+        lead_time_samples: (products, k) NaN-padded lead times in days
+            (see receipt_intervals), or one lead time per product / for all
+        current_stock: Stock on hand per product
+        on_order: Units already ordered and not yet received
+        service_level: Target cycle service level (e.g. 0.95)
+        review_period: Days until the next planning run
+        pack_size: Orders are rounded up to a multiple of this
+        min_order: Minimum order quantity when ordering at all
+
+    Returns:
+        DataFrame with one row per product
+    """
+    forecast = np.atleast_2d(np.asarray(forecast, dtype=np.float64))
+    n, horizon = forecast.shape
+    if horizon == 0:
+        raise ValueError("forecast needs at least one day")
+
+    lead_mean, lead_std = lead_time_stats(lead_time_samples, n)
+    sigma_d = _vector(demand_std, n)
+    z = np.broadcast_to(service_level_z(service_level), (n,))
+
+    lead_demand = demand_over(forecast, lead_mean)
+    daily_rate = np.divide(
+        lead_demand, lead_mean, out=forecast.mean(axis=1), where=lead_mean > 0
+    )
+    safety_stock = z * np.sqrt(lead_mean * sigma_d ** 2 + daily_rate ** 2 * lead_std ** 2)
+    reorder_point = lead_demand + safety_stock
+    order_up_to = demand_over(forecast, lead_mean + _vector(review_period, n)) + safety_stock
+
+    position = _vector(current_stock, n) + _vector(on_order, n)
+    reorder = position <= reorder_point
+    pack = np.maximum(_vector(pack_size, n), 1e-9)
+    quantity = np.ceil(np.maximum(order_up_to - position, 0.0) / pack) * pack
+    quantity = np.where(reorder, np.maximum(quantity, _vector(min_order, n)), 0.0)
+
+    return pd.DataFrame({
+        'productId': np.asarray(product_ids),
+        'lead_time_days': lead_mean,
+        'lead_time_std': lead_std,
+        'lead_time_demand': lead_demand,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+        'order_up_to': order_up_to,
+        'inventory_position': position,
+        'reorder': reorder,
+        'order_quantity': quantity,
+    })
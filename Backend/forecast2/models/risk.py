@@ -0,0 +1,180 @@
+# Backend/forecast2/models/risk.py
+"""
+Stockout and Overstock Risk
+Catalogue-wide port of risk/stockoutRisk.js and risk/overstockRisk.js
+
+Both rules are evaluated for every product at once from a (products x
+horizon) forecast matrix and stock, lead-time and overstock-limit vectors.
+RiskLevels remembers each product's last levels so only products whose
+level changed (a threshold crossing) need to go to the Node alert engine.
+"""
+
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+LOW, MEDIUM, HIGH = 0, 1, 2
+
+
+def _vector(values, n):
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (n,))
+
+
+def stockout_risk(forecast, current_stock, lead_time):
+    """
+    evaluateStockoutRisk for every product
+
+    Args:
+        forecast: (products, horizon) predicted demand
+        current_stock: Stock per product (or one value for all)
+        lead_time: Lead time in days per product (or one value for all)
+
+    Returns:
+        (levels, days_to_stockout): int8 level codes and float days
+        (NaN where the JS returns null)
+    """
+    forecast = np.atleast_2d(np.asarray(forecast, dtype=np.float64))
+    n, horizon = forecast.shape
+    stock = _vector(current_stock, n)
+    lead = _vector(lead_time, n)
+
+    # Demand over the lead time: forecastPoints.slice(0, leadTime)
+    cumulative = np.zeros((n, horizon + 1))
+    np.cumsum(forecast, axis=1, out=cumulative[:, 1:])
+    steps = np.clip(lead, 0, horizon).astype(np.intp)
+    expected = cumulative[np.arange(n), steps]
+
+    out = stock <= 0
+    short = ~out & (expected > stock)
+    tight = ~out & ~short & (expected > stock * 0.7)
+
+    levels = np.full(n, LOW, dtype=np.int8)
+    levels[tight] = MEDIUM
+    levels[out | short] = HIGH
+
+    days = np.full(n, np.nan)
+    days[out] = 0
+    days[short] = np.floor(stock[short] / expected[short] * lead[short])
+    days[tight] = lead[tight]
+    return levels, days
+
+
+def overstock_risk(forecast, current_stock, overstock_limit):
+    """
+    evaluateOverstockRisk for every product
+
+    Args:
+        forecast: (products, horizon) predicted demand
+        current_stock: Stock per product (or one value for all)
+        overstock_limit: Overstock limit per product (or one value for all)
+
+    Returns:
+        (levels, excess_units): int8 level codes and float excess units
+    """
+    forecast = np.atleast_2d(np.asarray(forecast, dtype=np.float64))
+    n = forecast.shape[0]
+    stock = _vector(current_stock, n)
+    limit = _vector(overstock_limit, n)
+    total = forecast.sum(axis=1)
+
+    high = (stock > limit) & (stock > total)
+    medium = ~high & (stock > total * 1.5)
+
+    levels = np.full(n, LOW, dtype=np.int8)
+    levels[medium] = MEDIUM
+    levels[high] = HIGH
+    excess = np.where(high | medium, stock - total, 0.0)
+    return levels, excess
+
+
+def evaluate_catalogue(product_ids, forecast, current_stock, lead_time, overstock_limit):
+    """
+    Both risk rules for a catalogue
+
+    Returns:
+        DataFrame with one row per product: productId, stockout_level,
+        days_to_stockout, overstock_level, excess_units (levels are int8
+        codes into LEVELS)
+    """
+    stockout_levels, days = stockout_risk(forecast, current_stock, lead_time)
+    overstock_levels, excess = overstock_risk(forecast, current_stock, overstock_limit)
+    return pd.DataFrame({
+        'productId': np.asarray(product_ids),
+        'stockout_level': stockout_levels,
+        'days_to_stockout': days,
+        'overstock_level': overstock_levels,
+        'excess_units': excess,
+    })
+
+
+def risk_records(table):
+    """
+    Rows as the JS evaluators return them, for the alert engine and API
+
+    Days to stockout are whole days, rounded up: a fractional lead time
+    (MEDIUM) counts as the day it ends on rather than the day before.
+    """
+    return [
+        {
+            'productId': pid.item() if hasattr(pid, 'item') else pid,
+            'stockout': {
+                'riskLevel': LEVELS[stockout],
+                'daysToStockout': None if np.isnan(days) else math.ceil(days),
+            },
+            'overstock': {'riskLevel': LEVELS[overstock], 'excessUnits': float(excess)},
+        }
+        for pid, stockout, days, overstock, excess in zip(
+            table['productId'], table['stockout_level'], table['days_to_stockout'],
+            table['overstock_level'], table['excess_units']
+        )
+    ]
+
+
+class RiskLevels:
+    """
+    Last evaluated levels per product, optionally persisted as JSON
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file to persist levels (None keeps them in memory)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._levels = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._levels = json.load(f)
+
+    def crossings(self, table):
+        """
+        Rows whose stockout or overstock level changed since the last
+        evaluation, and remember the new levels
+
+        Products seen for the first time count as previously LOW.
+        """
+        keys = [str(pid) for pid in table['productId']]
+        current = np.stack([table['stockout_level'], table['overstock_level']], axis=1)
+        with self._lock:
+            previous = np.array(
+                [self._levels.get(key, (LOW, LOW)) for key in keys], dtype=np.int8
+            ).reshape(-1, 2)
+            changed = (current != previous).any(axis=1)
+            for key, levels in zip(np.asarray(keys)[changed], current[changed]):
+                self._levels[key] = levels.tolist()
+            if self.path and changed.any():
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._levels, f)
+                os.replace(tmp_path, self.path)
+        return table[changed]
+
+    def __len__(self):
+        return len(self._levels)
@@ -0,0 +1,286 @@
+# Backend/forecast2/models/tuning.py
+"""
+XGBoost Hyperparameter Tuning
+Successive halving over configs, with boosting rounds as the budget
+
+For each product the feature matrix is built once per lookback and shared by
+every candidate config. All candidates start with a small number of boosting
+rounds; after each rung only the best 1/eta (by validation MAE) keep
+boosting, continuing from their existing trees rather than retraining. The
+survivor of the last rung is the product's config.
+
+Products are tuned in parallel worker processes. Winning configs are saved
+per product, and per category (the config that won most of its products),
+for nightly runs to reuse through TunedConfigs. The serving paths (worker
+jobs, cascade, ensemble, hierarchy) read the file named by
+FORECAST_TUNED_CONFIGS through tuned_configs() and fall back to the default
+XGBoost parameters for products with no result.
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import xgboost as xgb
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+try:
+    from .config import set_thread_budget, threads_per_fit
+    from .xgboost_model import XGBoostForecaster
+except ImportError:
+    from config import set_thread_budget, threads_per_fit
+    from xgboost_model import XGBoostForecaster
+
+
+# Candidate values; configs are sampled from their product
+SEARCH_SPACE = {
+    'lookback': [7, 14],
+    'max_depth': [3, 4, 6, 8],
+    'learning_rate': [0.03, 0.1, 0.3],
+    'subsample': [0.6, 0.8, 1.0],
+    'colsample_bytree': [0.6, 0.8, 1.0],
+    'min_child_weight': [1, 5],
+}
+
+
+def sample_configs(n_configs=27, seed=42, space=None):
+    """
+    Sample distinct configs from the search space (same list for every product)
+    """
+    space = space or SEARCH_SPACE
+    names = list(space)
+    grid = list(itertools.product(*(space[name] for name in names)))
+    picked = random.Random(seed).sample(grid, min(n_configs, len(grid)))
+    return [dict(zip(names, values)) for values in picked]
+
+
+def _booster_params(config, n_threads):
+    params = {
+        'objective': 'reg:squarederror',
+        'tree_method': 'hist',
+        'seed': 42,
+        'nthread': n_threads,
+    }
+    params.update({k: v for k, v in config.items() if k != 'lookback'})
+    return params
+
+
+def successive_halving(historical_data, configs, min_rounds=20, max_rounds=180, eta=3, holdout=30):
+    """
+    Tune one product
+
+    Args:
+        historical_data: List of dicts with 'date' and 'quantity'
+        configs: Candidate configs (from sample_configs)
+        min_rounds: Boosting rounds every config gets in the first rung
+        max_rounds: Rounds the final survivors reach
+        eta: Keep the best 1/eta configs at each rung
+        holdout: Trailing feature rows used for validation
+
+    Returns:
+        dict with the winning config, its rounds and validation MAE
+    """
+    if not XGBOOST_AVAILABLE:
+        raise ImportError("XGBoost is not installed. Install with: pip install xgboost")
+
+    # Feature matrices: one per lookback, shared by all configs using it
+    forecaster = XGBoostForecaster()
+    datasets = {}
+    for lookback in sorted({config['lookback'] for config in configs}):
+        features = forecaster.create_features(historical_data, lookback)
+        if len(features) <= holdout + 10:
+            continue
+        X = features.drop('target', axis=1)
+        y = features['target'].to_numpy()
+        datasets[lookback] = (
+            xgb.DMatrix(X.iloc[:-holdout], label=y[:-holdout]),
+            xgb.DMatrix(X.iloc[-holdout:]),
+            y[-holdout:],
+        )
+    if not datasets:
+        raise ValueError(f"Insufficient data. Need more than {holdout + 10} feature rows to tune")
+
+    n_threads = threads_per_fit()
+    alive = [
+        {'config': config, 'booster': None, 'rounds': 0, 'mae': np.inf}
+        for config in configs if config['lookback'] in datasets
+    ]
+
+    rounds = min_rounds
+    while True:
+        for trial in alive:
+            dtrain, dvalid, y_valid = datasets[trial['config']['lookback']]
+            # Continue boosting from the trees built in earlier rungs
+            trial['booster'] = xgb.train(
+                _booster_params(trial['config'], n_threads),
+                dtrain,
+                num_boost_round=rounds - trial['rounds'],
+                xgb_model=trial['booster'],
+            )
+            trial['rounds'] = rounds
+            trial['mae'] = float(np.mean(np.abs(y_valid - trial['booster'].predict(dvalid))))
+
+        alive.sort(key=lambda trial: trial['mae'])
+        if rounds >= max_rounds or len(alive) == 1:
+            break
+        alive = alive[:max(1, len(alive) // eta)]
+        rounds = min(rounds * eta, max_rounds)
+
+    best = alive[0]
+    return {
+        'config': best['config'],
+        'n_estimators': best['rounds'],
+        'validation_mae': best['mae'],
+    }
+
+
+def _init_worker(workers):
+    # Share the cores between worker processes instead of oversubscribing them
+    set_thread_budget(concurrent_fits=workers)
+
+
+def _tune_one(job):
+    product_id, historical_data, configs, options = job
+    try:
+        return product_id, successive_halving(historical_data, configs, **options)
+    except ValueError as e:
+        return product_id, {'error': str(e)}
+
+
+def tune_catalogue(series_by_product, categories=None, n_configs=27, workers=None, seed=42, **options):
+    """
+    Tune every product in parallel worker processes
+
+    Args:
+        series_by_product: {product_id: [{'date', 'quantity'}, ...]}
+        categories: Optional {product_id: category}
+        n_configs: Candidate configs per product
+        workers: Worker processes (default: all cores)
+        seed: Seed for sampling the candidate configs
+        **options: successive_halving options (min_rounds, max_rounds, eta, holdout)
+
+    Returns:
+        TunedConfigs with per-product and per-category winners
+    """
+    configs = sample_configs(n_configs, seed)
+    workers = workers or os.cpu_count() or 1
+    jobs = [(pid, history, configs, options) for pid, history in series_by_product.items()]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+        results = dict(pool.map(_tune_one, jobs))
+
+    products = {str(pid): result for pid, result in results.items() if 'error' not in result}
+    return TunedConfigs(products, _category_winners(products, categories or {}))
+
+
+def _category_winners(products, categories):
+    """
+    Per category, the config that won the most products (ties: lower mean MAE)
+    """
+    by_category = {}
+    for pid, category in categories.items():
+        if str(pid) in products:
+            by_category.setdefault(str(category), []).append(products[str(pid)])
+
+    winners = {}
+    for category, results in by_category.items():
+        keys = [json.dumps({**r['config'], 'n_estimators': r['n_estimators']}, sort_keys=True) for r in results]
+        counts = Counter(keys)
+        mean_mae = {key: np.mean([r['validation_mae'] for k, r in zip(keys, results) if k == key]) for key in counts}
+        best = min(counts, key=lambda key: (-counts[key], mean_mae[key]))
+        config = json.loads(best)
+        n_estimators = config.pop('n_estimators')
+        winners[category] = {'config': config, 'n_estimators': n_estimators, 'products': counts[best]}
+    return winners
+
+
+class TunedConfigs:
+    """
+    Saved tuning results, looked up by product then category
+    """
+
+    def __init__(self, products=None, categories=None):
+        self.products = products or {}
+        self.categories = categories or {}
+
+    def best(self, product_id=None, category=None):
+        """
+        Winning config for a product, else its category, else None
+        """
+        if product_id is not None and str(product_id) in self.products:
+            return self.products[str(product_id)]
+        if category is not None and str(category) in self.categories:
+            return self.categories[str(category)]
+        return None
+
+    def params(self, product_id=None, category=None):
+        """
+        Tuned XGBoostForecaster parameters and lookback
+
+        Returns:
+            (params dict, lookback); ({}, None) when nothing was tuned
+        """
+        result = self.best(product_id, category)
+        if result is None:
+            return {}, None
+
+        params = {k: v for k, v in result['config'].items() if k != 'lookback'}
+        params['n_estimators'] = result['n_estimators']
+        return params, result['config']['lookback']
+
+    def forecaster(self, product_id=None, category=None):
+        """
+        XGBoostForecaster with the tuned parameters and the lookback to fit it with
+
+        Returns:
+            (XGBoostForecaster, lookback); defaults when nothing was tuned
+        """
+        params, lookback = self.params(product_id, category)
+        return XGBoostForecaster(**params), lookback or 7
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'products': self.products, 'categories': self.categories}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get('products'), data.get('categories'))
+
+
+_serving = {}
+_serving_lock = threading.Lock()
+
+
+def tuned_configs(path=None):
+    """
+    Tuning results for the serving paths, reloaded when the file changes
+
+    Args:
+        path: Saved TunedConfigs (default: FORECAST_TUNED_CONFIGS)
+
+    Returns:
+        TunedConfigs; empty when no file is configured or it does not exist yet
+    """
+    path = path or os.environ.get('FORECAST_TUNED_CONFIGS')
+    if not path or not os.path.exists(path):
+        return TunedConfigs()
+
+    mtime = os.path.getmtime(path)
+    with _serving_lock:
+        cached = _serving.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _serving[path] = (mtime, TunedConfigs.load(path))
+        return cached[1]
@@ -15,13 +15,50 @@ except ImportError:
     XGBOOST_AVAILABLE = False
     print("⚠️  XGBoost not installed. Install with: pip install xgboost")
 
+try:
+    from .config import compact_features, float_dtype, threads_per_fit, training_selection
+    from .deadline import check_deadline
+    from .feature_rows import calendar_columns, date_ordinals, feature_matrix
+    from .history import history_frame, prediction_records
+    from .intervals import calibrate
+    from .xgboost_runtime import EWM_SPAN, XGBoostRuntime
+except ImportError:
+    from config import compact_features, float_dtype, threads_per_fit, training_selection
+    from deadline import check_deadline
+    from feature_rows import calendar_columns, date_ordinals, feature_matrix
+    from history import history_frame, prediction_records
+    from intervals import calibrate
+    from xgboost_runtime import EWM_SPAN, XGBoostRuntime
+
+
+if XGBOOST_AVAILABLE:
+    class _DeadlineCallback(xgb.callback.TrainingCallback):
+        """
+        Stops boosting after the round in which the deadline passes
+        """
+        
+        def __init__(self, deadline):
+            super().__init__()
+            self.deadline = deadline
+        
+        def after_iteration(self, model, epoch, evals_log):
+            return self.deadline.expired()
+
 
 class XGBoostForecaster:
     """
     XGBoost model for demand forecasting
     """
     
-    def __init__(self, **kwargs):
+    def __init__(self, eval_train=False, **kwargs):
+        """
+        Args:
+            eval_train: Evaluate on the training set during fit (debugging only,
+                doubles evaluation work)
+            **kwargs: XGBoost parameters. When neither n_jobs nor nthread is
+                given, the thread count comes from the global thread budget
+                (see models.config.set_thread_budget)
+        """
         if not XGBOOST_AVAILABLE:
             raise ImportError("XGBoost is not installed. Install with: pip install xgboost")
         
@@ -33,12 +70,17 @@ class XGBoostForecaster:
             'n_estimators': 100,
             'subsample': 0.8,
             'colsample_bytree': 0.8,
+            'tree_method': 'hist',
             'random_state': 42
         }
         self.params.update(kwargs)
+        self.budget_threads = 'n_jobs' not in kwargs and 'nthread' not in kwargs
+        self.eval_train = eval_train
         
         self.model = xgb.XGBRegressor(**self.params)
         self.is_fitted = False
+        self.intervals = None
+        self._runtimes = {}
         
     def create_features(self, data, lookback=7):
         """
@@ -50,57 +92,45 @@ class XGBoostForecaster:
         - Date-based features
         - Interaction features
         """
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
-        df = df.set_index('date')
-        
-        # Ensure numeric quantity
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-        df = df.dropna()
-        
-        features = pd.DataFrame(index=df.index)
+        df = history_frame(data)
         
         # Trend feature
-        features['trend'] = range(len(df))
+        names = ['trend']
         
         # Lagged features (more lags for XGBoost)
-        for i in range(1, lookback + 1):
-            features[f'lag_{i}'] = df['quantity'].shift(i)
+        names += [f'lag_{i}' for i in range(1, lookback + 1)]
         
         # Rolling statistics (multiple windows)
         for window in [3, 7, 14]:
             if len(df) >= window:
-                features[f'rolling_mean_{window}'] = df['quantity'].rolling(window=window, min_periods=1).mean()
-                features[f'rolling_std_{window}'] = df['quantity'].rolling(window=window, min_periods=1).std().fillna(0)
-                features[f'rolling_min_{window}'] = df['quantity'].rolling(window=window, min_periods=1).min()
-                features[f'rolling_max_{window}'] = df['quantity'].rolling(window=window, min_periods=1).max()
+                names += [f'rolling_{stat}_{window}' for stat in ('mean', 'std', 'min', 'max')]
         
         # Exponential weighted moving average
-        features['ewm_mean'] = df['quantity'].ewm(span=7, adjust=False).mean()
+        names.append('ewm_mean')
         
-        # Date features
-        features['day_of_week'] = df.index.dayofweek  # type: ignore
-        features['day_of_month'] = df.index.day  # type: ignore
-        features['week_of_month'] = (df.index.day - 1) // 7 + 1  # type: ignore
-        features['month'] = df.index.month  # type: ignore
-        features['is_weekend'] = (df.index.dayofweek >= 5).astype(int)  # type: ignore
-        features['is_month_start'] = df.index.is_month_start.astype(int)  # type: ignore
-        features['is_month_end'] = df.index.is_month_end.astype(int)  # type: ignore
+        # Date features (one gather from the shared calendar table)
+        names += calendar_columns()
         
         # Interaction features
-        if 'lag_1' in features.columns and 'lag_7' in features.columns:
-            features['lag_1_7_ratio'] = features['lag_1'] / (features['lag_7'] + 1)
-        
-        # Target variable
-        features['target'] = df['quantity'].values
-        
-        # Drop rows with NaN
-        features = features.dropna()
+        if lookback >= 7:
+            names.append('lag_1_7_ratio')
+        
+        # Built straight into the working precision, target last
+        values = np.empty((len(df), len(names) + 1), dtype=float_dtype())
+        feature_matrix(values[:, :-1], names, df['quantity'].to_numpy(), date_ordinals(df['date'].values))
+        values[:, -1] = df['quantity'].to_numpy()
+        
+        # Drop rows without a full set of lags
+        features = pd.DataFrame(
+            values[lookback:],
+            index=pd.DatetimeIndex(df['date'].values[lookback:], name='date'),
+            columns=names + ['target'],
+            copy=False
+        )
         
-        return features
+        return compact_features(features)
     
-    def fit(self, historical_data, lookback=7, verbose=False):
+    def fit(self, historical_data, lookback=7, verbose=False, deadline=None, end_date=None):
         """
         Train the XGBoost model
         
@@ -108,6 +138,9 @@ class XGBoostForecaster:
             historical_data: List of dicts with 'date' and 'quantity'
             lookback: Number of past days to use as features
             verbose: Print training progress
+            deadline: Optional Deadline (models/deadline.py); raises
+                DeadlineExceeded if training cannot finish in time
+            end_date: Run date; days without sales up to it count as zero demand
             
         Returns:
             dict with training metrics
@@ -115,6 +148,9 @@ class XGBoostForecaster:
         if len(historical_data) < lookback + 10:
             raise ValueError(f"Insufficient data. Need at least {lookback + 10} days, got {len(historical_data)}")
         
+        if end_date is not None:
+            historical_data = history_frame(historical_data, end_date=end_date)
+        
         # Create features
         features_df = self.create_features(historical_data, lookback)
         
@@ -122,16 +158,63 @@ class XGBoostForecaster:
         X = features_df.drop('target', axis=1)
         y = features_df['target']
         
+        metrics = self.fit_features(X, y, lookback, verbose, deadline)
+        
+        # Prediction intervals from backtest errors on this history
+        self.intervals = self.calibrate_intervals(historical_data)
+        metrics['calibration_origins'] = 0 if self.intervals is None else len(self.intervals.errors)
+        return metrics
+    
+    def fit_features(self, X, y, lookback=7, verbose=False, deadline=None):
+        """
+        Train on a ready-made feature matrix
+        
+        Args:
+            X: Feature DataFrame (columns as produced by create_features)
+            y: Target values
+            lookback: Lag count the features were built with
+            verbose: Print training progress
+            deadline: Optional Deadline, checked after every boosting round
+            
+        Returns:
+            dict with training metrics
+        """
+        check_deadline(deadline, 'xgboost fit')
+        
+        # Size the booster's thread pool from the global budget at fit time,
+        # so concurrent fits share the cores instead of oversubscribing them
+        if self.budget_threads:
+            self.model.set_params(n_jobs=threads_per_fit())
+        
+        # Training-window policy (models.config.set_training_window): recent
+        # rows only, optionally thinned and recency-weighted
+        rows, weights = training_selection(len(X))
+        if rows is not None:
+            X = X.iloc[rows]
+            y = y.iloc[rows] if hasattr(y, 'iloc') else np.asarray(y)[rows]
+        
         # Train model
-        self.model.fit(
-            X, y,
-            eval_set=[(X, y)],
-            verbose=verbose
-        )
+        fit_kwargs = {'verbose': verbose, 'sample_weight': weights}
+        if self.eval_train:
+            fit_kwargs['eval_set'] = [(X, y)]
+        
+        if deadline is not None:
+            self.model.set_params(callbacks=[_DeadlineCallback(deadline)])
+        try:
+            self.model.fit(X, y, **fit_kwargs)
+        finally:
+            if deadline is not None:
+                self.model.set_params(callbacks=None)
+        
+        # A truncated ensemble is not a usable model
+        if deadline is not None and self.model.get_booster().num_boosted_rounds() < self.model.n_estimators:
+            deadline.check('xgboost fit')
         
         self.is_fitted = True
         self.feature_names = X.columns.tolist()
         self.lookback = lookback
+        self.intervals = None
+        self._runtimes = {}
         
         # Calculate training metrics
         train_predictions = self.model.predict(X)
@@ -149,13 +232,15 @@ class XGBoostForecaster:
             'n_estimators': self.params['n_estimators']
         }
     
-    def predict(self, historical_data, horizon=7):
+    def predict(self, historical_data, horizon=7, deadline=None, end_date=None):
         """
         Generate forecasts for the next N days
         
         Args:
             historical_data: List of dicts with 'date' and 'quantity'
             horizon: Number of days to forecast
+            deadline: Optional Deadline, checked between horizon steps
+            end_date: Run date; the forecast starts the day after it
             
         Returns:
             List of predictions with confidence intervals
@@ -163,59 +248,93 @@ class XGBoostForecaster:
         if not self.is_fitted:
             raise ValueError("Model must be fitted before prediction")
         
-        predictions = []
-        current_data = list(historical_data)
+        df = history_frame(historical_data, end_date=end_date)
         
-        # Get last date from historical data
-        last_date = pd.to_datetime(current_data[-1]['date'])
+        quantities = df['quantity'].values.astype(np.float64)
+        last_date = df['date'].iloc[-1]
         
-        for day in range(1, horizon + 1):
-            # Create features for prediction
-            features_df = self.create_features(current_data, self.lookback)
-            
-            # Get latest features
-            latest_features = features_df.drop('target', axis=1).iloc[-1:].copy()
-            
-            # Update trend for future day
-            latest_features['trend'] = latest_features['trend'] + day
-            
-            # Update date features for forecast date
-            forecast_date = last_date + timedelta(days=day)
-            latest_features['day_of_week'] = forecast_date.dayofweek
-            latest_features['day_of_month'] = forecast_date.day
-            latest_features['week_of_month'] = (forecast_date.day - 1) // 7 + 1
-            latest_features['month'] = forecast_date.month
-            latest_features['is_weekend'] = int(forecast_date.dayofweek >= 5)
-            latest_features['is_month_start'] = int(forecast_date.day == 1)
-            latest_features['is_month_end'] = int(forecast_date.day == forecast_date.days_in_month)
-            
-            # Predict
-            pred = self.model.predict(latest_features)[0]
-            pred = max(0, pred)  # Ensure non-negative
-            
-            # Confidence interval based on prediction variance
-            # XGBoost doesn't provide native uncertainty, so use ±20%
-            lower = max(0, pred * 0.80)
-            upper = pred * 1.20
-            
-            predictions.append({
-                'period': day,
-                'date': forecast_date.strftime('%Y-%m-%d'),
-                'predicted': float(pred),
-                'lower95': float(lower),
-                'upper95': float(upper),
-                'yhat': float(pred),
-                'yhat_lower': float(lower),
-                'yhat_upper': float(upper)
-            })
-            
-            # Add prediction to current_data for next iteration
-            current_data.append({
-                'date': forecast_date.strftime('%Y-%m-%d'),
-                'quantity': pred
-            })
+        # Roll out with float32 buffers and Booster.inplace_predict
+        # (same features as create_features, without a DataFrame per step)
+        forecast = self.runtime().rollout(
+            quantities[np.newaxis, :],
+            [last_date.strftime('%Y-%m-%d')],
+            horizon=horizon,
+            deadline=deadline
+        )[0]
+        
+        # XGBoost has no native uncertainty: backtest intervals when
+        # calibrated, otherwise ±20%
+        return prediction_records(forecast, last_date, 0.80, 1.20, self.intervals)
+    
+    def fit_from_store(self, store, product_id, verbose=False):
+        """
+        Train from a product's accumulated rows in a FeatureStore
+        (see feature_store.py), without rebuilding features from history
+        """
+        state = store.state(product_id)
+        X, y = state.training_data()
+        if len(y) < 10:
+            raise ValueError(f"Insufficient data. Need at least 10 feature rows, got {len(y)}")
+        
+        # A state loaded from disk keeps the columns it was built with
+        X = pd.DataFrame(X, columns=state.feature_names)
+        return self.fit_features(X, pd.Series(y), state.lookback, verbose)
+    
+    def predict_from_store(self, store, product_id, horizon=7, end_date=None):
+        """
+        Forecast from a product's FeatureStore state (trailing window, EWM, trend)
+        
+        Args:
+            end_date: Run date; days without sales up to it are folded into
+                the state as zero demand and the forecast starts the day after
+        """
+        if end_date is not None:
+            store.advance_through(end_date, [product_id])
+        state = store.state(product_id)
+        forecast = self.runtime().rollout(
+            state.tail[np.newaxis, :],
+            [state.last_date],
+            trends=[state.count],
+            horizon=horizon,
+            ewm=[state.ewm]
+        )[0]
+        return prediction_records(forecast, state.last_date, 0.80, 1.20, self.intervals)
+    
+    def calibrate_intervals(self, historical_data):
+        """
+        Backtest the fitted model from recent origins of its training history
+        (one batched rollout, see intervals.py)
+        
+        Returns:
+            EmpiricalIntervals, or None if the history is too short
+        """
+        df = history_frame(historical_data)
+        quantities = df['quantity'].to_numpy(dtype=np.float64)
+        dates = df['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        ewm = df['quantity'].ewm(span=EWM_SPAN, adjust=False).mean().to_numpy()
+        runtime = self.runtime()
+        window = runtime.window
+        
+        def rollout(origins, horizon):
+            histories = quantities[origins[:, np.newaxis] - window + 1 + np.arange(window)]
+            return runtime.rollout(histories, dates[origins], trends=origins + 1, horizon=horizon, ewm=ewm[origins])
+        
+        return calibrate(quantities, window, rollout)
+    
+    def runtime(self, compiled=False):
+        """
+        Batch inference runtime for this booster (see xgboost_runtime.py)
+        
+        Args:
+            compiled: Evaluate the trees as flat NumPy arrays instead of
+                calling into XGBoost
+        """
+        if not self.is_fitted:
+            raise ValueError("Model must be fitted before prediction")
         
-        return predictions
+        if self._runtimes.get(compiled) is None:
+            self._runtimes[compiled] = XGBoostRuntime.from_forecaster(self, compiled=compiled)
+        return self._runtimes[compiled]
     
     def get_feature_importance(self):
         """
@@ -293,7 +412,7 @@ class XGBoostForecaster:
         return np.array(predictions_list)
 
 
-def forecast_xgboost(historical_data, horizon=7, lookback=7, **kwargs):
+def forecast_xgboost(historical_data, horizon=7, lookback=7, end_date=None, **kwargs):
     """
     Convenience function to train and predict with XGBoost
     
@@ -301,6 +420,7 @@ def forecast_xgboost(historical_data, horizon=7, lookback=7, **kwargs):
         historical_data: List of dicts with 'date' and 'quantity'
         horizon: Number of days to forecast
         lookback: Number of past days to use as features
+        end_date: Run date (default: last sale date)
         **kwargs: Additional XGBoost parameters
         
     Returns:
@@ -312,10 +432,10 @@ def forecast_xgboost(historical_data, horizon=7, lookback=7, **kwargs):
     forecaster = XGBoostForecaster(**kwargs)
     
     # Train model
-    metrics = forecaster.fit(historical_data, lookback)
+    metrics = forecaster.fit(historical_data, lookback, end_date=end_date)
     
     # Generate predictions
-    predictions = forecaster.predict(historical_data, horizon)
+    predictions = forecaster.predict(historical_data, horizon, end_date=end_date)
     
     # Get feature importance
     feature_importance = forecaster.get_feature_importance()
@@ -0,0 +1,196 @@
+# Backend/forecast2/models/xgboost_runtime.py
+"""
+XGBoost Batch Inference
+Recursive XGBoost forecasts without pandas in the loop
+
+XGBoostForecaster.predict used to rebuild a pandas feature frame and call
+XGBRegressor.predict on a one-row DataFrame for every horizon day. This
+runtime keeps a float32 feature buffer per batch and feeds it straight to
+Booster.inplace_predict, one call per horizon step for all products that
+share a booster. For global or cached boosters the trees can also be
+compiled into flat arrays and evaluated in NumPy (FlatTreeEnsemble).
+"""
+
+import json
+import numpy as np
+
+try:
+    from .config import float_dtype
+    from .deadline import check_deadline
+    from .feature_rows import calendar_fields, date_ordinals, ewm_last, fill_feature_rows, required_window
+except ImportError:
+    from config import float_dtype
+    from deadline import check_deadline
+    from feature_rows import calendar_fields, date_ordinals, ewm_last, fill_feature_rows, required_window
+
+
+EWM_SPAN = 7
+
+
+class FlatTreeEnsemble:
+    """
+    XGBoost trees flattened into (trees, nodes) arrays
+
+    Leaves point back to themselves, so evaluation is `max_depth` rounds of
+    fancy indexing over every (row, tree) pair at once.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing, value, base_score, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing = missing
+        self.value = value
+        self.base_score = np.float32(base_score)
+        self.max_depth = max_depth
+        self._tree_index = np.arange(feature.shape[0])[np.newaxis, :]
+
+    @classmethod
+    def from_booster(cls, booster, feature_names=None):
+        """
+        Compile a trained xgboost.Booster (regression, single output)
+        """
+        feature_names = feature_names or booster.feature_names
+        feature_index = {name: i for i, name in enumerate(feature_names or [])}
+        trees = [json.loads(dump) for dump in booster.get_dump(dump_format='json')]
+
+        nodes_per_tree = []
+        for tree in trees:
+            stack, nodes = [tree], []
+            while stack:
+                node = stack.pop()
+                nodes.append(node)
+                stack.extend(node.get('children', []))
+            nodes_per_tree.append(nodes)
+
+        n_trees = len(trees)
+        n_nodes = max(max(node['nodeid'] for node in nodes) + 1 for nodes in nodes_per_tree)
+
+        feature = np.zeros((n_trees, n_nodes), dtype=np.int32)
+        threshold = np.zeros((n_trees, n_nodes), dtype=np.float32)
+        value = np.zeros((n_trees, n_nodes), dtype=np.float32)
+        self_index = np.tile(np.arange(n_nodes, dtype=np.int32), (n_trees, 1))
+        left, right, missing = self_index.copy(), self_index.copy(), self_index.copy()
+        max_depth = 0
+
+        for t, nodes in enumerate(nodes_per_tree):
+            for node in nodes:
+                nid = node['nodeid']
+                if 'leaf' in node:
+                    value[t, nid] = node['leaf']
+                    continue
+                split = node['split']
+                feature[t, nid] = feature_index[split] if split in feature_index else int(split.lstrip('f'))
+                threshold[t, nid] = node['split_condition']
+                left[t, nid] = node['yes']
+                right[t, nid] = node['no']
+                missing[t, nid] = node['missing']
+                max_depth = max(max_depth, node.get('depth', 0) + 1)
+
+        config = json.loads(booster.save_config())
+        base_score = float(str(config['learner']['learner_model_param']['base_score']).strip('[]'))
+        return cls(feature, threshold, left, right, missing, value, base_score, max_depth)
+
+    def predict(self, X):
+        """
+        Predict from feature rows, shape (rows, features) -> (rows,)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        trees = self._tree_index
+        node = np.zeros((X.shape[0], self.feature.shape[0]), dtype=np.int32)
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[trees, node]]
+            go_left = x < self.threshold[trees, node]
+            node = np.where(
+                np.isnan(x),
+                self.missing[trees, node],
+                np.where(go_left, self.left[trees, node], self.right[trees, node]),
+            )
+
+        return self.value[trees, node].sum(axis=1, dtype=np.float32) + self.base_score
+
+
+class XGBoostRuntime:
+    """
+    Batched recursive forecasting for products sharing one booster
+    """
+
+    def __init__(self, booster, feature_names, lookback, compiled=False):
+        """
+        Args:
+            booster: Trained xgboost.Booster
+            feature_names: Column order the booster was trained with
+            lookback: Lag count the features were built with
+            compiled: Evaluate with FlatTreeEnsemble instead of the XGBoost library
+        """
+        self.booster = booster
+        self.feature_names = list(feature_names)
+        self.lookback = int(lookback)
+        self.window = max(required_window(self.feature_names), self.lookback + 1)
+        self.ensemble = FlatTreeEnsemble.from_booster(booster, self.feature_names) if compiled else None
+
+    @classmethod
+    def from_forecaster(cls, forecaster, compiled=False):
+        if not forecaster.is_fitted:
+            raise ValueError("Model must be fitted before export")
+        return cls(forecaster.model.get_booster(), forecaster.feature_names, forecaster.lookback, compiled)
+
+    def predict_rows(self, X):
+        """
+        One prediction per feature row (float32 buffer, no DataFrame/DMatrix conversion)
+        """
+        if self.ensemble is not None:
+            return self.ensemble.predict(X)
+        return self.booster.inplace_predict(X, validate_features=False)
+
+    def rollout(self, histories, last_dates, trends=None, horizon=7, ewm=None, deadline=None):
+        """
+        Recursive forecast with the features of XGBoostForecaster.create_features
+
+        Args:
+            histories: Demand in date order, shape (products, >= window)
+            last_dates: Date of each product's last observation
+            trends: Observations per product (default: history width)
+            horizon: Number of days to forecast
+            ewm: EWM mean (span 7) of each full history (default: computed
+                from `histories`, which must then be the full histories)
+            deadline: Optional Deadline, checked between steps
+
+        Returns:
+            Non-negative predictions, shape (products, horizon)
+        """
+        histories = np.atleast_2d(np.asarray(histories, dtype=np.float64))
+        products, available = histories.shape
+        if available < self.window:
+            raise ValueError(f"Insufficient data. Need at least {self.window} days, got {available}")
+
+        trends = np.full(products, available, dtype=np.float64) if trends is None else np.asarray(trends, dtype=np.float64)
+        ewm = ewm_last(histories, EWM_SPAN) if ewm is None else np.array(ewm, dtype=np.float64)
+        alpha = 2.0 / (EWM_SPAN + 1)
+        last_ordinals = date_ordinals(np.atleast_1d(last_dates))
+
+        window = self.window
+        buffer = np.empty((products, window + horizon), dtype=float_dtype())
+        buffer[:, :window] = histories[:, -window:]
+        rows = np.empty((products, len(self.feature_names)), dtype=np.float32)
+
+        for step in range(horizon):
+            check_deadline(deadline, 'forecast')
+            # Lag/rolling features of the latest known row, calendar features
+            # and trend of the forecast date
+            end = window + step
+            fill_feature_rows(
+                rows,
+                self.feature_names,
+                buffer[:, end - window:end],
+                trends + step,
+                calendar_fields(last_ordinals + step + 1),
+                ewm,
+            )
+            buffer[:, end] = np.maximum(self.predict_rows(rows), 0)
+            ewm += alpha * (buffer[:, end] - ewm)
+
+        return buffer[:, window:]
@@ -0,0 +1,110 @@
+"""
+Hierarchical Reconciliation Test
+AI-Enabled Inventory Forecasting System
+
+Checks that reconcile (models/hierarchy.py) gives the OLS and MinT
+adjustments worked out by hand, and that with reconciliation the SKU
+forecasts of HierarchicalForecaster add up to the reported total, category
+and store forecasts.
+
+Usage:
+    python test_hierarchy.py      (or: python -m pytest test_hierarchy.py)
+"""
+
+import os
+import sys
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.hierarchy import Hierarchy, HierarchicalForecaster, reconcile
+from test_model_accuracy import generate_sample_sme_data
+
+
+HORIZON = 7
+
+CATEGORIES = ['dairy', 'dairy', 'dairy', 'bakery', 'bakery', 'bakery']
+STORES = ['nairobi', 'mombasa', 'nairobi', 'mombasa', 'nairobi', 'mombasa']
+
+
+def _values(days=120, seed=0):
+    np.random.seed(seed)
+    scales = [1.0, 0.5, 0.2, 0.8, 0.3, 0.1]
+    return np.array([generate_sample_sme_data(days=days)['quantity'].to_numpy() * scale for scale in scales])
+
+
+def _two_products():
+    # One total node over two products
+    return Hierarchy(['a', 'b'], {}).aggregation
+
+
+def test_reconcile_ols_by_hand():
+    # Gap 12 - 8 = 4 over (1 + 2): each product gets 4/3
+    reconciled = reconcile(np.array([[12.0]]), np.array([[4.0], [4.0]]), _two_products())
+
+    np.testing.assert_allclose(reconciled, [[16 / 3], [16 / 3]])
+
+
+def test_reconcile_mint_by_hand():
+    # W_b = diag(1, 3): gap 4 over (1 + 4) = 0.8, shared 1:3
+    reconciled = reconcile(
+        np.array([[12.0]]), np.array([[4.0], [4.0]]), _two_products(), aggregate_var=[1.0], product_var=[1.0, 3.0]
+    )
+
+    np.testing.assert_allclose(reconciled, [[4.8], [6.4]])
+
+
+def test_reconcile_keeps_coherent_forecasts():
+    hierarchy = Hierarchy(list('abcdef'), {'category': CATEGORIES, 'store': STORES})
+    products = np.random.default_rng(0).uniform(1, 10, size=(6, HORIZON))
+    aggregates = hierarchy.aggregate(products)
+
+    np.testing.assert_allclose(reconcile(aggregates, products, hierarchy.aggregation), products)
+    np.testing.assert_allclose(
+        reconcile(aggregates, products, hierarchy.aggregation, np.arange(1, len(hierarchy) + 1), np.arange(1, 7)),
+        products
+    )
+
+
+def test_reconciled_forecasts_add_up_across_levels():
+    values = _values()
+    hierarchy = Hierarchy(list('abcdef'), {'category': CATEGORIES, 'store': STORES})
+
+    for method in ('ols', 'mint'):
+        result = HierarchicalForecaster(reconciliation=method, n_estimators=20).forecast(
+            values, '2024-01-01', hierarchy, horizon=HORIZON
+        )
+        sums = hierarchy.aggregate(result['forecast'])
+
+        assert set(result['aggregates']) == set(hierarchy.nodes), method
+        for node, key in enumerate(hierarchy.nodes):
+            np.testing.assert_allclose(sums[node], result['aggregates'][key], err_msg=f"{method} {key}")
+        # Total, categories and stores each cover the whole catalogue
+        for level in hierarchy.levels:
+            np.testing.assert_allclose(sums[hierarchy.slices[level]].sum(axis=0), result['forecast'].sum(axis=0))
+
+
+def test_shared_out_level_adds_up_without_reconciliation():
+    values = _values()
+    hierarchy = Hierarchy(list('abcdef'), {'category': CATEGORIES, 'store': STORES})
+
+    for proportions in ('historical', 'forecast'):
+        result = HierarchicalForecaster(disaggregate_level='category', proportions=proportions, n_estimators=20).forecast(
+            values, '2024-01-01', hierarchy, horizon=HORIZON
+        )
+        sums = hierarchy.aggregate(result['forecast'])
+        for node in range(hierarchy.slices['category'].start, hierarchy.slices['category'].stop):
+            np.testing.assert_allclose(sums[node], result['aggregates'][hierarchy.nodes[node]], err_msg=proportions)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_reconcile_ols_by_hand,
+        test_reconcile_mint_by_hand,
+        test_reconcile_keeps_coherent_forecasts,
+        test_reconciled_forecasts_add_up_across_levels,
+        test_shared_out_level_adds_up_without_reconciliation,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
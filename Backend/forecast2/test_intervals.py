@@ -0,0 +1,118 @@
+"""
+Empirical Interval Coverage Test
+AI-Enabled Inventory Forecasting System
+
+Checks that EmpiricalIntervals (models/intervals.py) bands cover a fresh
+error at the stated 95% rate, both with enough backtest errors for the
+split-conformal rank and with too few (the Student-t fallback).
+
+Each column of the error matrix is an independent calibration set, so one
+offsets() call scores thousands of trials; a fresh draw per column is the
+error the band must cover.
+
+Usage:
+    python test_intervals.py      (or: python -m pytest test_intervals.py)
+"""
+
+import os
+import sys
+import numpy as np
+from scipy import stats
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.intervals import CALIBRATION_HORIZON, CALIBRATION_ORIGINS, EmpiricalIntervals, calibrate
+from models.xgboost_model import XGBoostForecaster
+from test_model_accuracy import generate_sample_sme_data
+
+
+TRIALS = 20000
+LEVEL = 0.95
+
+# Binomial noise over TRIALS is about 0.0015
+COVERAGE_TOLERANCE = 0.01
+
+
+def _coverage(calibration, fresh):
+    lower, upper = EmpiricalIntervals(calibration).offsets(calibration.shape[1], LEVEL)
+    return np.mean((fresh >= lower) & (fresh <= upper))
+
+
+def test_conformal_coverage_with_calibration_origins():
+    rng = np.random.default_rng(0)
+    n = CALIBRATION_ORIGINS
+    # Skewed errors: the conformal band does not assume normality
+    calibration = rng.gamma(2.0, 3.0, size=(n, TRIALS)) - 6.0
+    fresh = rng.gamma(2.0, 3.0, size=TRIALS) - 6.0
+
+    # Rank ceil(41 * 0.975) = 40: the band spans the 1st to 40th smallest
+    # errors, which holds a fresh error with probability 39/41 = 0.951
+    rank = np.ceil((n + 1) * (1 - (1 - LEVEL) / 2))
+    expected = (2 * rank - n - 1) / (n + 1)
+    coverage = _coverage(calibration, fresh)
+    assert coverage >= LEVEL - COVERAGE_TOLERANCE, coverage
+    assert abs(coverage - expected) < COVERAGE_TOLERANCE, (coverage, expected)
+
+
+def test_few_origins_use_parametric_band_with_stated_coverage():
+    rng = np.random.default_rng(1)
+    for n in (14, 28):
+        calibration = rng.normal(2.0, 5.0, size=(n, TRIALS))
+        fresh = rng.normal(2.0, 5.0, size=TRIALS)
+
+        coverage = _coverage(calibration, fresh)
+        assert abs(coverage - LEVEL) < COVERAGE_TOLERANCE, (n, coverage)
+
+
+def test_few_origins_are_not_the_error_range():
+    rng = np.random.default_rng(2)
+    calibration = rng.normal(0.0, 1.0, size=(28, 1))
+    lower, upper = EmpiricalIntervals(calibration).offsets(1, LEVEL)
+
+    # Clipping the conformal rank to 1.0 gave exactly the min and max error;
+    # 28 errors get the t prediction band around their mean instead
+    errors = calibration[:, 0].astype(np.float32).astype(np.float64)
+    spread = stats.t.ppf(0.975, 27) * errors.std(ddof=1) * np.sqrt(1 + 1 / 28)
+    np.testing.assert_allclose([lower[0], upper[0]], [errors.mean() - spread, errors.mean() + spread])
+    assert (lower[0], upper[0]) != (errors.min(), errors.max())
+
+
+def test_model_calibration_uses_enough_origins():
+    np.random.seed(0)
+    df = generate_sample_sme_data(days=200)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    history = df[['date', 'quantity']].to_dict('records')
+
+    forecaster = XGBoostForecaster()
+    metrics = forecaster.fit(history)
+
+    assert metrics['calibration_origins'] == CALIBRATION_ORIGINS
+    assert forecaster.intervals.errors.shape == (CALIBRATION_ORIGINS, CALIBRATION_HORIZON)
+
+
+def test_backtest_coverage_on_exchangeable_series():
+    # A fixed-mean "model" on i.i.d. demand: backtest errors and future
+    # errors come from the same distribution, so coverage holds per day
+    rng = np.random.default_rng(3)
+    series = rng.poisson(20, size=(TRIALS // 10, 120)).astype(float)
+    covered = []
+    for quantities in series:
+        intervals = calibrate(quantities[:-CALIBRATION_HORIZON], 1, lambda idx, h: np.full((len(idx), h), 20.0))
+        lower, upper = intervals.offsets(CALIBRATION_HORIZON, LEVEL)
+        future = quantities[-CALIBRATION_HORIZON:] - 20.0
+        covered.append((future >= lower) & (future <= upper))
+
+    assert np.mean(covered) >= LEVEL - COVERAGE_TOLERANCE, np.mean(covered)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_conformal_coverage_with_calibration_origins,
+        test_few_origins_use_parametric_band_with_stated_coverage,
+        test_few_origins_are_not_the_error_range,
+        test_model_calibration_uses_enough_origins,
+        test_backtest_coverage_on_exchangeable_series,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,107 @@
+"""
+Linear Regression Artifact Parity Test
+AI-Enabled Inventory Forecasting System
+
+Checks that the folded linear artifact (models/linear_runtime.py) reproduces
+LinearRegressionForecaster.predict, and that it loads and serves without
+sklearn or pandas importable.
+
+Usage:
+    python test_linear_runtime.py      (or: python -m pytest test_linear_runtime.py)
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.linear_regression import LinearRegressionForecaster
+from models.linear_runtime import LinearArtifact, load_linear_artifact
+from test_model_accuracy import generate_sample_sme_data
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+HORIZON = 30
+
+
+def _history(days=200, seed=0):
+    np.random.seed(seed)
+    df = generate_sample_sme_data(days=days)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df[['date', 'quantity']].to_dict('records')
+
+
+def _fit(history):
+    forecaster = LinearRegressionForecaster()
+    forecaster.fit(history)
+    return forecaster
+
+
+def _artifact_forecast(artifact, histories):
+    values = np.array([[row['quantity'] for row in h] for h in histories], dtype=float)
+    last_dates = [h[-1]['date'] for h in histories]
+    return artifact.rollout(values, last_dates, [len(h) for h in histories], HORIZON)
+
+
+def test_artifact_matches_sklearn_predict():
+    history = _history()
+    forecaster = _fit(history)
+
+    expected = np.array([p['predicted'] for p in forecaster.predict(history, HORIZON)])
+    actual = _artifact_forecast(forecaster.export_artifact(), [history])[0]
+
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_stacked_artifacts_match_per_product_predict():
+    histories = [_history(seed=seed) for seed in range(5)]
+    forecasters = [_fit(h) for h in histories]
+
+    expected = np.array([[p['predicted'] for p in f.predict(h, HORIZON)] for f, h in zip(forecasters, histories)])
+    stacked = LinearArtifact.stack([f.export_artifact() for f in forecasters])
+
+    np.testing.assert_allclose(_artifact_forecast(stacked, histories), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_artifact_roundtrip_without_sklearn_or_pandas():
+    history = _history()
+    forecaster = _fit(history)
+    expected = _artifact_forecast(forecaster.export_artifact(), [history])[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'artifact.npz')
+        forecaster.save_artifact(path)
+        np.testing.assert_allclose(_artifact_forecast(load_linear_artifact(path), [history])[0], expected)
+
+        # Serve from a fresh interpreter where sklearn and pandas cannot be imported
+        values = os.path.join(tmp, 'values.npy')
+        np.save(values, np.array([[row['quantity'] for row in history]], dtype=float))
+        code = (
+            "import sys\n"
+            "sys.modules['sklearn'] = None\n"
+            "sys.modules['pandas'] = None\n"
+            f"sys.path.insert(0, {MODELS_DIR!r})\n"
+            "import numpy as np\n"
+            "from linear_runtime import load_linear_artifact\n"
+            f"artifact = load_linear_artifact({path!r})\n"
+            f"out = artifact.rollout(np.load({values!r}), [{history[-1]['date']!r}], [{len(history)}], {HORIZON})\n"
+            "print(' '.join(repr(float(v)) for v in out[0]))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    served = np.array([float(v) for v in result.stdout.split()])
+    np.testing.assert_allclose(served, expected)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_artifact_matches_sklearn_predict,
+        test_stacked_artifacts_match_per_product_predict,
+        test_artifact_roundtrip_without_sklearn_or_pandas,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
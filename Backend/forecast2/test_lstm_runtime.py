@@ -0,0 +1,148 @@
+"""
+LSTM Runtime Parity Test
+AI-Enabled Inventory Forecasting System
+
+Checks that the NumPy LSTM forward pass (models/lstm_runtime.py) reproduces
+the Keras model it was exported from, and that a saved artifact loads and
+serves without TensorFlow importable.
+
+Both sides compute in float32 and accumulate in a different order, so
+one-step outputs agree to within 1e-6 and drift slightly over a rollout.
+
+Usage:
+    python test_lstm_runtime.py      (or: python -m pytest test_lstm_runtime.py)
+"""
+
+import os
+import sys
+import subprocess
+import tempfile
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.lstm_model import LSTMForecaster
+from models.lstm_runtime import NumpyLSTMRuntime, load_lstm_artifact
+from test_model_accuracy import generate_sample_sme_data
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+HORIZON = 7
+LOOKBACK = 14
+
+# float32 on both sides, different accumulation order
+FORWARD_TOLERANCE = 1e-5
+ROLLOUT_TOLERANCE = 1e-4
+
+
+def _history(days=200, seed=0):
+    np.random.seed(seed)
+    df = generate_sample_sme_data(days=days)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df[['date', 'quantity']].to_dict('records')
+
+
+def _fit(history):
+    forecaster = LSTMForecaster(epochs=2)
+    forecaster.fit(history, LOOKBACK)
+    return forecaster
+
+
+def _keras_model(forecaster):
+    # The compiled training model is shared with later fits of the same
+    # shape; keras_model() is a private copy with the fitted weights
+    assert forecaster.model is None
+    return forecaster.keras_model()
+
+
+def _windows(runtime, histories):
+    values = np.array([[row['quantity'] for row in h] for h in histories], dtype=float)
+    return runtime.normalize(values[:, -LOOKBACK:])
+
+
+def _keras_forward(model, windows):
+    inputs = np.asarray(windows, dtype=np.float32)[..., np.newaxis]
+    return model(inputs, training=False).numpy()[:, 0]
+
+
+def test_forward_matches_keras():
+    history = _history()
+    forecaster = _fit(history)
+    runtime = forecaster.to_runtime()
+
+    # Every window of the history, not just the last one
+    quantities = np.array([row['quantity'] for row in history], dtype=float)
+    windows = runtime.normalize(np.lib.stride_tricks.sliding_window_view(quantities, LOOKBACK))
+    expected = _keras_forward(_keras_model(forecaster), windows)
+
+    np.testing.assert_allclose(runtime.forward(windows), expected, rtol=FORWARD_TOLERANCE, atol=FORWARD_TOLERANCE)
+
+
+def test_rollout_matches_keras_recursion():
+    history = _history()
+    forecaster = _fit(history)
+    runtime = forecaster.to_runtime()
+    model = _keras_model(forecaster)
+
+    buffer = list(_windows(runtime, [history])[0])
+    for _ in range(HORIZON):
+        buffer.append(float(_keras_forward(model, [buffer[-LOOKBACK:]])[0]))
+    expected = np.array(buffer[LOOKBACK:])
+
+    actual = runtime.rollout(_windows(runtime, [history]), HORIZON)[0]
+    np.testing.assert_allclose(actual, expected, rtol=ROLLOUT_TOLERANCE, atol=ROLLOUT_TOLERANCE)
+
+
+def test_stacked_runtimes_match_per_model_forward():
+    histories = [_history(seed=seed) for seed in range(3)]
+    forecasters = [_fit(h) for h in histories]
+    runtimes = [f.to_runtime() for f in forecasters]
+
+    expected = np.array([
+        _keras_forward(_keras_model(f), _windows(r, [h]))[0]
+        for f, r, h in zip(forecasters, runtimes, histories)
+    ])
+    stacked = NumpyLSTMRuntime.stack(runtimes)
+    windows = np.concatenate([_windows(r, [h]) for r, h in zip(runtimes, histories)])
+
+    np.testing.assert_allclose(stacked.forward(windows), expected, rtol=FORWARD_TOLERANCE, atol=FORWARD_TOLERANCE)
+
+
+def test_artifact_roundtrip_without_tensorflow():
+    history = _history()
+    forecaster = _fit(history)
+    expected = forecaster.to_runtime().forecast(np.array([[row['quantity'] for row in history]]), HORIZON)[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'artifact.npz')
+        forecaster.save_artifact(path)
+        np.testing.assert_allclose(load_lstm_artifact(path).forecast([[row['quantity'] for row in history]], HORIZON)[0], expected)
+
+        # Serve from a fresh interpreter where TensorFlow cannot be imported
+        values = os.path.join(tmp, 'values.npy')
+        np.save(values, np.array([[row['quantity'] for row in history]], dtype=float))
+        code = (
+            "import sys\n"
+            "sys.modules['tensorflow'] = None\n"
+            f"sys.path.insert(0, {MODELS_DIR!r})\n"
+            "import numpy as np\n"
+            "from lstm_runtime import load_lstm_artifact\n"
+            f"out = load_lstm_artifact({path!r}).forecast(np.load({values!r}), {HORIZON})\n"
+            "print(' '.join(repr(float(v)) for v in out[0]))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    served = np.array([float(v) for v in result.stdout.split()])
+    np.testing.assert_allclose(served, expected)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_forward_matches_keras,
+        test_rollout_matches_keras_recursion,
+        test_stacked_runtimes_match_per_model_forward,
+        test_artifact_roundtrip_without_tensorflow,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -49,6 +49,38 @@ def generate_sample_sme_data(days=365):
     return df
 
 
+def generate_sample_catalogue(products=1000, days=365, intermittent_share=0.3, seed=None):
+    """
+    Generate a synthetic catalogue of many products at once (vectorized).
+    Each product follows the generate_sample_sme_data pattern with its own
+    scale, yearly/weekly amplitudes and phases, and growth or decline;
+    a share of products is intermittent (sales on a few random days).
+
+    Returns:
+        (dates, demand): DatetimeIndex of `days` days and an int
+        (products, days) demand matrix
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    dates = pd.date_range(end=pd.Timestamp(datetime.now()).normalize(), periods=days, freq='D')
+
+    base = rng.lognormal(np.log(30), 0.8, (products, 1))
+    yearly = rng.uniform(0, 0.3, (products, 1)) * np.sin((t + rng.integers(0, 365, (products, 1))) * 2 * np.pi / 365)
+    weekly = rng.uniform(0, 0.25, (products, 1)) * np.sin((t + rng.integers(0, 7, (products, 1))) * 2 * np.pi / 7)
+    trend = rng.normal(0, 0.2, (products, 1)) * t / days
+    noise = rng.normal(0, 0.1, (products, days))
+    demand = np.maximum(base * (1 + yearly + weekly + trend + noise), 0)
+
+    # Intermittent products: small orders on a random subset of days
+    intermittent = rng.random(products) < intermittent_share
+    k = int(intermittent.sum())
+    occurrence = rng.uniform(0.05, 0.4, (k, 1))
+    sizes = rng.poisson(rng.lognormal(np.log(3), 0.5, (k, 1)) * np.ones((k, days)))
+    demand[intermittent] = np.where(rng.random((k, days)) < occurrence, np.maximum(sizes, 1), 0)
+
+    return dates, demand.astype(int)
+
+
 def calculate_expiry_alert_accuracy(test_days=30):
     """
     Evaluate expiry alert system accuracy.
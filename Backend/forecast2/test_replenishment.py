@@ -0,0 +1,115 @@
+"""
+Replenishment Planning Test
+AI-Enabled Inventory Forecasting System
+
+Checks the reorder points, safety stock and order quantities of
+models/replenishment.py against values worked out by hand.
+
+Usage:
+    python test_replenishment.py      (or: python -m pytest test_replenishment.py)
+"""
+
+import math
+import os
+import sys
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.replenishment import (
+    DEFAULT_LEAD_TIME_DAYS, demand_over, lead_time_stats, plan_replenishment, receipt_intervals, service_level_z
+)
+
+
+# 95% cycle service level
+Z_95 = 1.6448536269514722
+
+# Receipts 4 and 6 days apart: lead time 5 days, standard deviation 1
+RECEIPTS = ['2024-01-01', '2024-01-05', '2024-01-11']
+
+
+def test_lead_time_from_receipts():
+    samples = receipt_intervals([RECEIPTS, ['2024-01-01']])
+    mean, std = lead_time_stats(samples)
+
+    np.testing.assert_allclose(mean, [5.0, DEFAULT_LEAD_TIME_DAYS])
+    np.testing.assert_allclose(std, [1.0, 0.0])
+
+
+def test_demand_over_fractional_days_and_beyond_horizon():
+    forecast = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]])
+
+    # 1 + 2 + half of day 3
+    np.testing.assert_allclose(demand_over(forecast, np.array([2.5])), [4.5])
+    # All 28 units, then 3 more days at the last week's average of 4
+    np.testing.assert_allclose(demand_over(forecast, np.array([10.0])), [40.0])
+
+
+def test_reorder_point_and_order_quantity_by_hand():
+    forecast = np.full((2, 14), 10.0)
+    plan = plan_replenishment(
+        ['reorder', 'covered'],
+        forecast,
+        demand_std=3.0,
+        lead_time_samples=receipt_intervals([RECEIPTS, RECEIPTS]),
+        current_stock=[40.0, 80.0],
+        on_order=[10.0, 0.0],
+        service_level=0.95,
+        review_period=7.0,
+        pack_size=12.0,
+        min_order=0.0,
+    )
+
+    # L = 5, sigma_L = 1, d = 10, sigma_d = 3
+    safety_stock = Z_95 * math.sqrt(5 * 3 ** 2 + 10 ** 2 * 1 ** 2)     # 19.81
+    reorder_point = 5 * 10 + safety_stock                              # 69.81
+    order_up_to = (5 + 7) * 10 + safety_stock                          # 139.81
+
+    np.testing.assert_allclose(plan['lead_time_demand'], [50.0, 50.0])
+    np.testing.assert_allclose(plan['safety_stock'], [safety_stock] * 2)
+    np.testing.assert_allclose(plan['reorder_point'], [reorder_point] * 2)
+    np.testing.assert_allclose(plan['order_up_to'], [order_up_to] * 2)
+    np.testing.assert_allclose(plan['inventory_position'], [50.0, 80.0])
+
+    # Position 50 is below the reorder point: 139.81 - 50 = 89.81 units,
+    # rounded up to 8 packs of 12. Position 80 is above it: no order.
+    assert list(plan['reorder']) == [True, False]
+    np.testing.assert_allclose(plan['order_quantity'], [96.0, 0.0])
+
+
+def test_minimum_order_applies_only_when_reordering():
+    plan = plan_replenishment(
+        ['reorder', 'covered'],
+        np.full((2, 14), 10.0),
+        demand_std=3.0,
+        lead_time_samples=receipt_intervals([RECEIPTS, RECEIPTS]),
+        current_stock=[40.0, 80.0],
+        on_order=[10.0, 0.0],
+        pack_size=12.0,
+        min_order=100.0,
+    )
+
+    np.testing.assert_allclose(plan['order_quantity'], [100.0, 0.0])
+
+
+def test_fixed_lead_time_has_demand_risk_only():
+    plan = plan_replenishment(['p1'], np.full((1, 14), 10.0), demand_std=3.0, lead_time_samples=4.0,
+                              current_stock=0.0, service_level=0.90)
+
+    # z(0.90) * sqrt(4 * 9) = 1.2816 * 6
+    np.testing.assert_allclose(plan['safety_stock'], [service_level_z(0.90) * 6.0])
+    np.testing.assert_allclose(plan['reorder_point'], [40.0 + service_level_z(0.90) * 6.0])
+    np.testing.assert_allclose(plan['order_quantity'], [math.ceil(110.0 + service_level_z(0.90) * 6.0)])
+
+
+if __name__ == "__main__":
+    for test in (
+        test_lead_time_from_receipts,
+        test_demand_over_fractional_days_and_beyond_horizon,
+        test_reorder_point_and_order_quantity_by_hand,
+        test_minimum_order_applies_only_when_reordering,
+        test_fixed_lead_time_has_demand_risk_only,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
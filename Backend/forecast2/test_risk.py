@@ -0,0 +1,144 @@
+"""
+Risk Rules Test
+AI-Enabled Inventory Forecasting System
+
+Checks that the catalogue-wide risk engine (models/risk.py) gives the same
+levels as the JS rules it ports (risk/stockoutRisk.js and
+risk/overstockRisk.js), run through Node on the same cases.
+
+The JS returns the lead time itself as days to stockout for MEDIUM risk;
+risk_records rounds it up to whole days, so a fractional lead time counts
+as the day it ends on.
+
+Usage:
+    python test_risk.py      (or: python -m pytest test_risk.py)
+"""
+
+import json
+import math
+import os
+import sys
+import subprocess
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.risk import LEVELS, RiskLevels, evaluate_catalogue, overstock_risk, risk_records, stockout_risk
+
+
+RISK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk')
+
+FORECAST = [10.0, 12.0, 8.0, 9.0, 11.0, 10.0, 10.0]
+
+# (current stock, lead time, overstock limit) over FORECAST; lead-time demand
+# is 10, 22, 30, 39, ... for lead times 1, 2, 3, 4, ...
+CASES = [
+    (0, 3, 100),        # out of stock
+    (-5, 3, 100),       # negative stock
+    (20, 3, 100),       # short: 30 > 20
+    (29.5, 3, 100),     # short by half a unit
+    (35, 3, 100),       # tight: 30 > 0.7 * 35
+    (42.8, 3, 100),     # tight at the 0.7 boundary (30 > 29.96)
+    (43, 3, 100),       # comfortable: 30 <= 0.7 * 43
+    (25, 2.5, 100),     # fractional lead time, tight (slice keeps 2 days)
+    (15, 2.5, 100),     # fractional lead time, short
+    (50, 10, 100),      # lead time beyond the horizon
+    (100, 0, 100),      # no lead time
+    (150, 3, 100),      # overstock HIGH: above the limit and total demand
+    (90, 3, 80),        # above the limit and total demand (70), below 1.5x
+    (110, 3, 200),      # MEDIUM overstock: above 1.5x total demand
+    (105, 3, 200),      # exactly 1.5x total demand
+]
+
+
+def _js_rules(cases, forecast):
+    """
+    Both JS evaluators on every case, through Node
+    """
+    points = [{'predicted': value} for value in forecast]
+    script = (
+        f"import {{ evaluateStockoutRisk }} from {json.dumps(os.path.join(RISK_DIR, 'stockoutRisk.js'))};\n"
+        f"import {{ evaluateOverstockRisk }} from {json.dumps(os.path.join(RISK_DIR, 'overstockRisk.js'))};\n"
+        f"const points = {json.dumps(points)};\n"
+        f"const cases = {json.dumps(cases)};\n"
+        "console.log(JSON.stringify(cases.map(([stock, lead, limit]) => ({\n"
+        "  stockout: evaluateStockoutRisk(stock, points, lead),\n"
+        "  overstock: evaluateOverstockRisk(stock, points, limit),\n"
+        "}))));\n"
+    )
+    result = subprocess.run(
+        ['node', '--input-type=module', '-e', script], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def _evaluate(cases, forecast):
+    stock, lead, limit = (np.array(column, dtype=float) for column in zip(*cases))
+    forecast = np.tile(forecast, (len(cases), 1))
+    return evaluate_catalogue(np.arange(len(cases)), forecast, stock, lead, limit)
+
+
+def test_levels_match_js_rules():
+    expected = _js_rules(CASES, FORECAST)
+    records = risk_records(_evaluate(CASES, FORECAST))
+
+    for case, js, record in zip(CASES, expected, records):
+        assert record['stockout']['riskLevel'] == js['stockout']['riskLevel'], case
+        assert record['overstock']['riskLevel'] == js['overstock']['riskLevel'], case
+
+
+def test_days_and_excess_match_js_rules():
+    expected = _js_rules(CASES, FORECAST)
+    records = risk_records(_evaluate(CASES, FORECAST))
+
+    for case, js, record in zip(CASES, expected, records):
+        days = js['stockout']['daysToStockout']
+        assert record['stockout']['daysToStockout'] == (None if days is None else math.ceil(days)), case
+        np.testing.assert_allclose(record['overstock']['excessUnits'], js['overstock']['excessUnits'], err_msg=str(case))
+
+
+def test_fractional_lead_time_rounds_up():
+    levels, days = stockout_risk([FORECAST], 25, 2.5)
+    record = risk_records(evaluate_catalogue(['p1'], [FORECAST], 25, 2.5, 100))[0]
+
+    assert LEVELS[levels[0]] == 'MEDIUM'
+    assert days[0] == 2.5
+    assert record['stockout'] == {'riskLevel': 'MEDIUM', 'daysToStockout': 3}
+
+
+def test_overstock_levels_per_product():
+    forecast = np.array([[10.0] * 7, [1.0] * 7, [5.0] * 7])
+    levels, excess = overstock_risk(forecast, [50, 20, 60], [100, 10, 40])
+
+    # 50 < 1.5 * 70; 20 > limit and > 7; 60 > limit and > 35
+    assert [LEVELS[level] for level in levels] == ['LOW', 'HIGH', 'HIGH']
+    np.testing.assert_allclose(excess, [0.0, 13.0, 25.0])
+
+
+def test_crossings_only_report_changed_levels():
+    levels = RiskLevels()
+    first = _evaluate(CASES, FORECAST)
+    changed = levels.crossings(first)
+
+    # New products count as previously LOW
+    not_low = (first['stockout_level'] != 0) | (first['overstock_level'] != 0)
+    assert list(changed['productId']) == list(first['productId'][not_low])
+    assert len(levels.crossings(first)) == 0
+
+    moved = [(0, 3, 100)] + CASES[1:]
+    assert list(levels.crossings(_evaluate(moved, FORECAST))['productId']) == []
+    moved = [(43, 3, 100)] + CASES[1:]
+    assert list(levels.crossings(_evaluate(moved, FORECAST))['productId']) == [0]
+
+
+if __name__ == "__main__":
+    for test in (
+        test_levels_match_js_rules,
+        test_days_and_excess_match_js_rules,
+        test_fractional_lead_time_rounds_up,
+        test_overstock_levels_per_product,
+        test_crossings_only_report_changed_levels,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,123 @@
+"""
+XGBoost Runtime Parity Test
+AI-Enabled Inventory Forecasting System
+
+Checks that the flattened trees (models/xgboost_runtime.py FlatTreeEnsemble)
+reproduce Booster.predict, and that XGBoostRuntime.rollout reproduces a
+recursion built from create_features rows and Booster.predict.
+
+FlatTreeEnsemble sums the leaf values in float32 in a different order from
+XGBoost, so predictions differ by up to about 5e-5 on this data (demand in
+the tens); the tolerance below allows 1e-4.
+
+Usage:
+    python test_xgboost_runtime.py      (or: python -m pytest test_xgboost_runtime.py)
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.feature_rows import calendar_fields, date_ordinals
+from models.xgboost_model import XGBoostForecaster
+from models.xgboost_runtime import FlatTreeEnsemble
+from test_model_accuracy import generate_sample_sme_data
+
+
+HORIZON = 14
+
+# float32 leaf sums in a different order than XGBoost
+TOLERANCE = 1e-4
+
+
+def _history(days=200, seed=0):
+    np.random.seed(seed)
+    df = generate_sample_sme_data(days=days)
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    return df[['date', 'quantity']].to_dict('records')
+
+
+def _fit(history):
+    forecaster = XGBoostForecaster()
+    forecaster.fit(history)
+    return forecaster
+
+
+def _booster_predict(forecaster, X):
+    booster = forecaster.model.get_booster()
+    return booster.predict(xgb.DMatrix(np.asarray(X, dtype=np.float32), feature_names=forecaster.feature_names))
+
+
+def test_flat_trees_match_booster_predict():
+    history = _history()
+    forecaster = _fit(history)
+    X = forecaster.create_features(history).drop('target', axis=1)
+
+    ensemble = FlatTreeEnsemble.from_booster(forecaster.model.get_booster(), forecaster.feature_names)
+
+    np.testing.assert_allclose(ensemble.predict(X), _booster_predict(forecaster, X), rtol=0, atol=TOLERANCE)
+
+
+def test_flat_trees_follow_missing_branches():
+    history = _history()
+    forecaster = _fit(history)
+    X = np.array(forecaster.create_features(history).drop('target', axis=1), dtype=np.float32)
+    X[::3, 1:4] = np.nan
+
+    ensemble = FlatTreeEnsemble.from_booster(forecaster.model.get_booster(), forecaster.feature_names)
+
+    np.testing.assert_allclose(ensemble.predict(X), _booster_predict(forecaster, X), rtol=0, atol=TOLERANCE)
+
+
+def test_rollout_matches_create_features_recursion():
+    history = _history()
+    forecaster = _fit(history)
+    last_date = pd.Timestamp(history[-1]['date'])
+
+    # Reference: features of the latest known row from create_features, with
+    # the calendar and trend of the forecast day, predicted by the booster
+    extended = list(history)
+    expected = []
+    for step in range(HORIZON):
+        row = forecaster.create_features(extended).drop('target', axis=1).iloc[-1:].copy()
+        forecast_date = last_date + pd.Timedelta(days=step + 1)
+        calendar = calendar_fields(date_ordinals([forecast_date.strftime('%Y-%m-%d')]))
+        for name in row.columns:
+            if name in calendar:
+                row[name] = calendar[name][0]
+        row['trend'] = len(history) + step
+        prediction = max(float(_booster_predict(forecaster, row)[0]), 0.0)
+        expected.append(prediction)
+        extended.append({'date': forecast_date.strftime('%Y-%m-%d'), 'quantity': prediction})
+
+    actual = np.array([p['predicted'] for p in forecaster.predict(history, HORIZON)])
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=TOLERANCE)
+
+
+def test_compiled_rollout_matches_library_rollout():
+    histories = [_history(seed=seed) for seed in range(3)]
+    forecaster = _fit(histories[0])
+    values = np.array([[row['quantity'] for row in h] for h in histories], dtype=float)
+    last_dates = [h[-1]['date'] for h in histories]
+
+    library = forecaster.runtime().rollout(values, last_dates, horizon=HORIZON)
+    compiled = forecaster.runtime(compiled=True).rollout(values, last_dates, horizon=HORIZON)
+
+    # Recursion carries the per-step differences forward
+    np.testing.assert_allclose(compiled, library, rtol=1e-5, atol=10 * TOLERANCE)
+
+
+if __name__ == "__main__":
+    for test in (
+        test_flat_trees_match_booster_predict,
+        test_flat_trees_follow_missing_branches,
+        test_rollout_matches_create_features_recursion,
+        test_compiled_rollout_matches_library_rollout,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
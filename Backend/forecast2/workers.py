@@ -0,0 +1,437 @@
+# Backend/forecast2/workers.py
+"""
+Forecast Worker Pool
+Runs forecast jobs in worker processes, each with a deadline
+
+Every job carries a deadline. Workers enforce it cooperatively: fits stop at
+the next Keras batch or XGBoost round and rollouts check it between horizon
+steps, returning a cheap baseline forecast marked as a fallback. If a worker
+is still busy `grace_seconds` after the deadline (stuck in native code, for
+example), the pool kills it, starts a replacement and returns the fallback
+itself, so a job never holds its caller longer than deadline + grace.
+
+The parent imports the numeric stack before forking (preload) so workers
+share those pages copy-on-write. Each worker then runs one synthetic
+fit/predict per model (warm-up) before taking jobs, and is recycled after
+`max_jobs` jobs or once its RSS passes `max_rss_mb`.
+"""
+
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.baselines import forecast_baseline
+from models.config import apply_thread_limits, set_thread_budget
+from models.deadline import Deadline, DeadlineExceeded
+
+
+MODELS = ('linear_regression', 'xgboost', 'lstm', 'baseline', 'intermittent', 'ensemble')
+
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get('FORECAST_DEADLINE_SECONDS', 30))
+DEFAULT_GRACE_SECONDS = float(os.environ.get('FORECAST_GRACE_SECONDS', 5))
+DEFAULT_MAX_JOBS = int(os.environ.get('FORECAST_WORKER_MAX_JOBS', 500))
+DEFAULT_MAX_RSS_MB = float(os.environ.get('FORECAST_WORKER_MAX_RSS_MB', 1024))
+
+# Pause before replacing a worker that failed to start
+RESPAWN_DELAY_SECONDS = 1.0
+
+# Imported in the parent before forking. TensorFlow is left out: it starts
+# threads at import, which do not survive fork, so workers load it at warm-up
+PRELOAD_MODULES = (
+    'numpy', 'pandas', 'sklearn.linear_model', 'sklearn.preprocessing', 'xgboost',
+    'models.feature_rows', 'models.linear_regression', 'models.xgboost_model',
+    'models.baselines', 'models.intermittent', 'models.ensemble',
+)
+
+
+def preload(modules=PRELOAD_MODULES):
+    """
+    Import modules in this (parent) process so forked workers inherit them
+
+    Returns:
+        List of modules that could not be imported
+    """
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
+
+
+def warmup_history(days=120):
+    """
+    Synthetic daily history with a weekly cycle, long enough for every model
+    """
+    start = date(2024, 1, 1)
+    return [
+        {
+            'date': (start + timedelta(days=day)).isoformat(),
+            'quantity': float(20 + 5 * (day % 7 >= 5) + day % 3),
+        }
+        for day in range(days)
+    ]
+
+
+def warm_up(models=MODELS):
+    """
+    Run one small fit/predict per model so the first real job does not pay
+    for lazy imports and first-call initialization
+
+    Returns:
+        {model: seconds} for models that warmed up, and
+        {model: error} for models that could not (e.g. TensorFlow missing)
+    """
+    history = warmup_history()
+    timings, errors = {}, {}
+    for model in models:
+        start = time.perf_counter()
+        try:
+            result = run_job({'model': model, 'historical_data': history, 'horizon': 7})
+            if 'error' in result:
+                raise ValueError(result['error'])
+            timings[model] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            errors[model] = str(e)
+    return timings, errors
+
+
+def rss_mb(pid):
+    """
+    Resident set size of a process in MB (None if it cannot be read)
+    """
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process(pid).memory_info().rss / 2 ** 20
+        except psutil.Error:
+            return None
+    # Linux without psutil
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def fallback_forecast(job, reason):
+    """
+    Cheap baseline forecast returned when the requested model cannot finish
+    """
+    history = job['historical_data']
+    method = 'holt_winters' if len(history) >= 14 else 'moving_average'
+    result = forecast_baseline(history, job.get('horizon', 7), method, job.get('end_date'))
+    result['fallback'] = True
+    result['fallback_reason'] = reason
+    result['requested_model'] = job.get('model')
+    return result
+
+
+def run_job(job, deadline=None):
+    """
+    Fit and forecast one product with the requested model
+
+    Args:
+        job: dict with 'model', 'historical_data', 'horizon' and optional
+            'lookback', 'end_date' (run date; the history is zero-filled
+            through it and the forecast starts the day after), and
+            'product_id' / 'category' to look up tuned XGBoost parameters
+            (models/tuning.py tuned_configs); 'refit' opts an ensemble job
+            into the second, full-history fit
+        deadline: Optional Deadline
+
+    Returns:
+        dict with predictions and metrics (fallback: True if the deadline hit)
+    """
+    model = job.get('model', 'xgboost')
+    history = job['historical_data']
+    horizon = job.get('horizon', 7)
+    end_date = job.get('end_date')
+
+    try:
+        if model in ('xgboost', 'ensemble'):
+            from models.tuning import tuned_configs
+            params, tuned_lookback = tuned_configs().params(job.get('product_id'), job.get('category'))
+
+        if model == 'baseline':
+            return forecast_baseline(history, horizon, job.get('method', 'holt_winters'), end_date)
+
+        if model == 'intermittent':
+            from models.intermittent import forecast_intermittent
+            return forecast_intermittent(history, horizon, end_date=end_date)
+
+        if model == 'ensemble':
+            from models.ensemble import forecast_ensemble
+            return forecast_ensemble(
+                history, horizon, job.get('lookback', tuned_lookback or 7), deadline=deadline, end_date=end_date,
+                **{**params, 'refit': bool(job.get('refit', False))}
+            )
+
+        if model == 'linear_regression':
+            from models.linear_regression import LinearRegressionForecaster
+            forecaster, lookback = LinearRegressionForecaster(), job.get('lookback', 7)
+        elif model == 'xgboost':
+            from models.xgboost_model import XGBoostForecaster
+            forecaster, lookback = XGBoostForecaster(**params), job.get('lookback', tuned_lookback or 7)
+        elif model == 'lstm':
+            from models.lstm_model import LSTMForecaster
+            forecaster, lookback = LSTMForecaster(), job.get('lookback', 14)
+        else:
+            raise ValueError(f"Unknown model: {model}. Use one of {MODELS}")
+
+        metrics = forecaster.fit(history, lookback, deadline=deadline, end_date=end_date)
+        predictions = forecaster.predict(history, horizon, deadline=deadline, end_date=end_date)
+        return {'predictions': predictions, 'metrics': metrics, 'model_type': model}
+
+    except DeadlineExceeded as e:
+        result = fallback_forecast(job, 'deadline')
+        result['detail'] = str(e)
+        return result
+
+
+def _worker_main(conn, warmup_models, threads):
+    """
+    Worker loop: warm up, report ready, then receive (job, expires_at)
+    and send back the result
+    """
+    # One job at a time per worker: give it its share of the cores, once
+    set_thread_budget(total_threads=threads, concurrent_fits=1)
+    apply_thread_limits()
+    timings, errors = warm_up(warmup_models) if warmup_models else ({}, {})
+    conn.send({'ready': True, 'warmup': timings, 'warmup_errors': errors})
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        job, expires_at = message
+        try:
+            result = run_job(job, Deadline.until(expires_at))
+        except Exception as e:
+            result = {'error': str(e)}
+        conn.send(result)
+
+
+class _Worker:
+    def __init__(self, context, warmup_models, threads):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, warmup_models, threads), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.warmup = None
+
+    def wait_ready(self, timeout):
+        """
+        Wait for the warm-up report; False if the worker died or timed out
+        """
+        try:
+            if not self.conn.poll(timeout):
+                return False
+            report = self.conn.recv()
+        except (EOFError, OSError):
+            return False
+        self.warmup = {'seconds': report['warmup'], 'errors': report['warmup_errors']}
+        return True
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Fixed set of warmed-up worker processes with hard deadline enforcement
+    """
+
+    def __init__(self, workers=None, grace_seconds=DEFAULT_GRACE_SECONDS, warmup_models=(),
+                 max_jobs=DEFAULT_MAX_JOBS, max_rss_mb=DEFAULT_MAX_RSS_MB, warmup_timeout=300):
+        """
+        Args:
+            workers: Worker processes (default: FORECAST_WORKERS or all cores)
+            grace_seconds: Time past the deadline before a worker is killed
+            warmup_models: Models each worker fits once before taking jobs
+                (empty: no warm-up)
+            max_jobs: Jobs after which a worker is replaced (0: never)
+            max_rss_mb: Worker RSS after which it is replaced (0: never)
+            warmup_timeout: Seconds a new worker may take to warm up
+        """
+        self.size = workers or int(os.environ.get('FORECAST_WORKERS', 0)) or os.cpu_count() or 1
+        self.grace_seconds = grace_seconds
+        self.warmup_models = tuple(warmup_models)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.warmup_timeout = warmup_timeout
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.size)
+        # fork shares the parent's imported modules; other platforms spawn
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(method)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._warming = 0
+        self._abandoned = 0
+        self._closed = threading.Event()
+        self.ready = threading.Event()
+        self.warmup = None
+        self.stats = {'jobs': 0, 'fallbacks': 0, 'killed': 0, 'recycled': 0, 'failed_starts': 0}
+        for _ in range(self.size):
+            self._start_worker()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _start_worker(self):
+        """
+        Fork a worker and hand it to the idle queue once it has warmed up
+        (in the background, so replacing a worker never blocks a request)
+        """
+        with self._lock:
+            self._warming += 1
+        self._spawn(self.warmup_models)
+
+    def _spawn(self, warmup_models):
+        worker = _Worker(self._context, warmup_models, self.threads_per_worker)
+        threading.Thread(target=self._await_ready, args=(worker,), daemon=True).start()
+
+    def _await_ready(self, worker):
+        if not worker.wait_ready(self.warmup_timeout):
+            # Never hand out a dead worker: retry (without warm-up) until
+            # one starts; the slot stays 'warming' meanwhile
+            self._count('failed_starts')
+            worker.stop(kill=True)
+            if self._closed.is_set():
+                with self._lock:
+                    self._warming -= 1
+                    self._abandoned += 1
+                return
+            threading.Timer(RESPAWN_DELAY_SECONDS, self._spawn, args=((),)).start()
+            return
+        with self._lock:
+            self._warming -= 1
+            if self.warmup is None:
+                self.warmup = worker.warmup
+            if self._warming == 0:
+                self.ready.set()
+        self._idle.put(worker)
+
+    def _recycle_due(self, worker):
+        if self.max_jobs and worker.jobs >= self.max_jobs:
+            return True
+        if self.max_rss_mb:
+            rss = rss_mb(worker.process.pid)
+            return rss is not None and rss > self.max_rss_mb
+        return False
+
+    def wait_ready(self, timeout=None):
+        """
+        Block until the initial workers have warmed up
+        """
+        return self.ready.wait(timeout)
+
+    def status(self):
+        """
+        Readiness, warm-up timings and counters
+        """
+        with self._lock:
+            return {
+                'ready': self.ready.is_set(),
+                'workers': self.size,
+                'warming': self._warming,
+                'idle': self._idle.qsize(),
+                'warmup': self.warmup,
+                'max_jobs': self.max_jobs,
+                'max_rss_mb': self.max_rss_mb,
+                'stats': dict(self.stats),
+            }
+
+    def submit(self, job, deadline_seconds=DEFAULT_DEADLINE_SECONDS):
+        """
+        Run a job on the next free worker and wait for its result
+
+        Args:
+            job: See run_job
+            deadline_seconds: Budget from now, including time waiting for a worker
+
+        Returns:
+            Result dict; fallback results carry 'fallback': True
+        """
+        deadline = Deadline(deadline_seconds)
+        try:
+            worker = self._idle.get(timeout=deadline.remaining() + self.grace_seconds)
+        except queue.Empty:
+            self._count('fallbacks')
+            return fallback_forecast(job, 'no_worker_available')
+
+        kill = False
+        try:
+            worker.conn.send((job, deadline.expires_at))
+            if worker.conn.poll(deadline.remaining() + self.grace_seconds):
+                result = worker.conn.recv()
+            else:
+                # Cooperative checks did not return in time: kill and recycle
+                kill = True
+                self._count('killed')
+                result = fallback_forecast(job, 'worker_killed')
+        except (EOFError, BrokenPipeError, OSError):
+            kill = True
+            result = fallback_forecast(job, 'worker_crashed')
+        finally:
+            worker.jobs += 1
+            if kill or self._recycle_due(worker):
+                if not kill:
+                    self._count('recycled')
+                worker.stop(kill=kill)
+                self._start_worker()
+            else:
+                self._idle.put(worker)
+
+        self._count('jobs')
+        if result.get('fallback'):
+            self._count('fallbacks')
+        return result
+
+    def close(self):
+        """
+        Stop every worker (waits for running jobs and warm-ups to finish;
+        workers that keep failing to start are given up)
+        """
+        self._closed.set()
+        stopped = 0
+        while True:
+            with self._lock:
+                if stopped + self._abandoned >= self.size:
+                    return
+            try:
+                self._idle.get(timeout=0.5).stop()
+                stopped += 1
+            except queue.Empty:
+                continue